@@ -0,0 +1,52 @@
+"""add held/confirmed counters to time_slots
+
+Revision ID: 3b7e91c4d2a6
+Revises: 39f2cc203303
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e91c4d2a6'
+down_revision: Union[str, Sequence[str], None] = '39f2cc203303'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('time_slots', sa.Column('held_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('time_slots', sa.Column('confirmed_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем счётчики из текущих данных: активные holds и заказы без hold
+    op.execute("""
+        UPDATE time_slots ts SET
+            held_count = (
+                SELECT count(*) FROM slot_holds h
+                WHERE h.slot_id = ts.id AND h.expires_at > now()
+            ),
+            confirmed_count = (
+                SELECT count(*) FROM orders o
+                WHERE o.slot_id = ts.id AND o.status != 'cancelled'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM slot_holds h
+                      WHERE h.order_id = o.id AND h.expires_at > now()
+                  )
+            )
+    """)
+    op.execute("DELETE FROM slot_holds WHERE expires_at <= now()")
+    op.create_index('ix_slot_holds_expires_at', 'slot_holds', ['expires_at'])
+    op.create_index('ix_slot_holds_order_id', 'slot_holds', ['order_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_slot_holds_order_id', table_name='slot_holds')
+    op.drop_index('ix_slot_holds_expires_at', table_name='slot_holds')
+    op.drop_column('time_slots', 'confirmed_count')
+    op.drop_column('time_slots', 'held_count')
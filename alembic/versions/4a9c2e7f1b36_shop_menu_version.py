@@ -0,0 +1,28 @@
+"""shops.menu_version for the cached shop menu
+
+Revision ID: 4a9c2e7f1b36
+Revises: e7a3b5c90d12
+Create Date: 2026-10-18 17:21:40.913204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9c2e7f1b36'
+down_revision: Union[str, Sequence[str], None] = 'e7a3b5c90d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shops', sa.Column('menu_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shops', 'menu_version')
@@ -0,0 +1,36 @@
+"""orders.created_at not null + keyset indexes for order listing
+
+Revision ID: 5e2c8a71f0b4
+Revises: 9d4f0a6b8e13
+Create Date: 2026-10-18 14:05:31.402917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c8a71f0b4'
+down_revision: Union[str, Sequence[str], None] = '9d4f0a6b8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # курсор строится по created_at, поэтому NULL недопустим
+    op.execute("UPDATE orders SET created_at = COALESCE(paid_at, now()) WHERE created_at IS NULL")
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(timezone=True),
+                    nullable=False, server_default=sa.text('now()'))
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_shop_created_at_id', 'orders', ['shop_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_shop_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(timezone=True),
+                    nullable=True, server_default=None)
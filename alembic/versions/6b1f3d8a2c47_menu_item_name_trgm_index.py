@@ -0,0 +1,33 @@
+"""pg_trgm GIN index on normalised menu_items.item_name for menu search
+
+Revision ID: 6b1f3d8a2c47
+Revises: 4a9c2e7f1b36
+Create Date: 2026-10-18 18:05:12.447310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1f3d8a2c47'
+down_revision: Union[str, Sequence[str], None] = '4a9c2e7f1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # выражение должно совпадать с app.crud.menu_search._search_pg
+    op.execute(
+        "CREATE INDEX ix_menu_items_item_name_trgm ON menu_items "
+        "USING gin (replace(lower(item_name), 'ё', 'е') gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_menu_items_item_name_trgm")
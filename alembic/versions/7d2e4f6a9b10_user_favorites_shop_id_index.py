@@ -0,0 +1,30 @@
+"""index on user_favorites.shop_id
+
+Revision ID: 7d2e4f6a9b10
+Revises: 6b1f3d8a2c47
+Create Date: 2026-10-18 19:12:40.118263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4f6a9b10'
+down_revision: Union[str, Sequence[str], None] = '6b1f3d8a2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_tables удалил старые индексы; по user_id работает uq_user_shop_favorite,
+    # а удаление магазина (ON DELETE CASCADE) без этого индекса читает всю таблицу
+    op.create_index('ix_user_favorites_shop_id', 'user_favorites', ['shop_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_favorites_shop_id', table_name='user_favorites')
@@ -0,0 +1,58 @@
+"""unique (shop_id, start) for time_slots
+
+Revision ID: 9d4f0a6b8e13
+Revises: 3b7e91c4d2a6
+Create Date: 2026-10-18 12:40:07.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f0a6b8e13'
+down_revision: Union[str, Sequence[str], None] = '3b7e91c4d2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Прежний генератор мог создавать дубли (shop_id, start): из каждой группы
+    # остаётся один слот (с наибольшим числом подтверждённых мест), заказы и holds
+    # переносятся на него вместе со счётчиками, остальные слоты удаляются.
+    op.execute("""
+        CREATE TEMP TABLE time_slot_dups ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY shop_id, start
+                ORDER BY confirmed_count DESC, held_count DESC, id
+            ) AS keep_id
+            FROM time_slots
+            WHERE start IS NOT NULL
+        ) t
+        WHERE id != keep_id
+    """)
+    op.execute("UPDATE orders o SET slot_id = d.keep_id FROM time_slot_dups d WHERE o.slot_id = d.id")
+    op.execute("UPDATE orders o SET time_slot_id = d.keep_id FROM time_slot_dups d WHERE o.time_slot_id = d.id")
+    op.execute("UPDATE slot_holds h SET slot_id = d.keep_id FROM time_slot_dups d WHERE h.slot_id = d.id")
+    op.execute("""
+        UPDATE time_slots ts SET
+            held_count = ts.held_count + s.held,
+            confirmed_count = ts.confirmed_count + s.confirmed
+        FROM (
+            SELECT d.keep_id, sum(t.held_count) AS held, sum(t.confirmed_count) AS confirmed
+            FROM time_slot_dups d JOIN time_slots t ON t.id = d.id
+            GROUP BY d.keep_id
+        ) s
+        WHERE ts.id = s.keep_id
+    """)
+    op.execute("DELETE FROM time_slots WHERE id IN (SELECT id FROM time_slot_dups)")
+    op.create_unique_constraint('uq_time_slot_shop_start', 'time_slots', ['shop_id', 'start'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_time_slot_shop_start', 'time_slots', type_='unique')
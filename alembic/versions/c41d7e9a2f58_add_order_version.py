@@ -0,0 +1,28 @@
+"""orders.version for status long-poll
+
+Revision ID: c41d7e9a2f58
+Revises: 5e2c8a71f0b4
+Create Date: 2026-10-18 15:20:44.671302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e9a2f58'
+down_revision: Union[str, Sequence[str], None] = '5e2c8a71f0b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'version')
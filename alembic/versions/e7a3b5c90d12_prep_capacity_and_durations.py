@@ -0,0 +1,30 @@
+"""shops.barista_capacity + menu_items.prep_seconds for the preparation scheduler
+
+Revision ID: e7a3b5c90d12
+Revises: c41d7e9a2f58
+Create Date: 2026-10-18 16:02:13.584120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3b5c90d12'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e9a2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shops', sa.Column('barista_capacity', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('menu_items', sa.Column('prep_seconds', sa.Integer(), server_default='120', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('menu_items', 'prep_seconds')
+    op.drop_column('shops', 'barista_capacity')
@@ -1,15 +1,15 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from app.core.config import settings
-
-DATABASE_URL = settings.DATABASE_URL
-
-engine: AsyncEngine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-Base = declarative_base()
-
-async def get_db():
-    async with AsyncSessionLocal() as session:
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+from app.core.config import settings
+
+DATABASE_URL = settings.DATABASE_URL
+
+engine: AsyncEngine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+Base = declarative_base()
+
+async def get_db():
+    async with AsyncSessionLocal() as session:
         yield session
\ No newline at end of file
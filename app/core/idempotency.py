@@ -0,0 +1,274 @@
+# app/core/idempotency.py
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+from app.logger import logger
+
+HEADER = "Idempotency-Key"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# запросы и ответы больше этого (загрузка и выгрузка меню) не буферизуются и не сохраняются
+MAX_STORED_BYTES = 1024 * 1024
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[str, str]]  # как в raw_headers: с повторами (Set-Cookie), без content-length
+    body: bytes
+
+    def to_json(self) -> str:
+        return json.dumps({"s": self.status, "h": self.headers, "b": base64.b64encode(self.body).decode()})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StoredResponse":
+        data = json.loads(raw)
+        return cls(status=data["s"], headers=[tuple(h) for h in data["h"]], body=base64.b64decode(data["b"]))
+
+
+class KeyMismatch(Exception):
+    """Ключ уже использован с другим телом запроса."""
+
+
+class KeyInFlight(Exception):
+    """Первый запрос с этим ключом не завершился за время ожидания."""
+
+
+class IdempotencyStore:
+    """Хранилище ключ -> сохранённый ответ.
+
+    begin() либо закрепляет ключ за текущим запросом (возвращает None), либо
+    возвращает ответ первого запроса — дождавшись его, если тот ещё выполняется.
+    """
+
+    ttl: float
+
+    async def begin(self, key: str, fingerprint: str, wait: float) -> Optional[StoredResponse]:
+        raise NotImplementedError
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        raise NotImplementedError
+
+    async def abort(self, key: str) -> None:
+        """Снимает ключ без ответа (5xx, исключение): повтор выполнится заново."""
+        raise NotImplementedError
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    response: Optional[StoredResponse] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """LRU с TTL в памяти процесса: повторы, попавшие в другой воркер, не распознаются."""
+
+    def __init__(self, ttl: float, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now and e.done.is_set()]:
+            del self._entries[key]
+        # выполняющиеся запросы не вытесняем
+        for key in list(self._entries):
+            if len(self._entries) < self.max_keys:
+                break
+            if self._entries[key].done.is_set():
+                del self._entries[key]
+
+    async def begin(self, key: str, fingerprint: str, wait: float) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.done.is_set() and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            if len(self._entries) >= self.max_keys:
+                self._evict()
+            self._entries[key] = _Entry(fingerprint=fingerprint, expires_at=time.monotonic() + self.ttl)
+            return None
+
+        if entry.fingerprint != fingerprint:
+            raise KeyMismatch()
+        self._entries.move_to_end(key)
+        try:
+            await asyncio.wait_for(entry.done.wait(), wait)
+        except asyncio.TimeoutError:
+            raise KeyInFlight()
+        if entry.response is None:
+            # первый запрос упал и снял ключ — этот выполняется заново
+            return await self.begin(key, fingerprint, wait)
+        return entry.response
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.response = response
+            entry.expires_at = time.monotonic() + self.ttl
+            entry.done.set()
+
+    async def abort(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Ключи в Redis: общие для всех воркеров, срок жизни — нативный TTL."""
+
+    prefix = "idem:"
+    # сколько держится метка "в работе", если воркер умер, не завершив запрос
+    lock_ttl = 60.0
+    poll_interval = 0.05
+
+    def __init__(self, ttl: float, client=None):
+        self.ttl = ttl
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.core.redis import get_redis
+            self._client = get_redis()
+        return self._client
+
+    async def begin(self, key: str, fingerprint: str, wait: float) -> Optional[StoredResponse]:
+        rkey = self.prefix + key
+        pending = json.dumps({"f": fingerprint})
+        deadline = time.monotonic() + wait
+        while True:
+            if await self.client.set(rkey, pending, nx=True, px=int(self.lock_ttl * 1000)):
+                return None
+            raw = await self.client.get(rkey)
+            if raw is not None:
+                data = json.loads(raw)
+                if data["f"] != fingerprint:
+                    raise KeyMismatch()
+                if "r" in data:
+                    return StoredResponse.from_json(data["r"])
+            if time.monotonic() >= deadline:
+                raise KeyInFlight()
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        await self.client.set(
+            self.prefix + key, json.dumps({"f": fingerprint, "r": response.to_json()}), px=int(self.ttl * 1000),
+        )
+
+    async def abort(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+@lru_cache()
+def get_idempotency_store() -> IdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+    if settings.IDEMPOTENCY_BACKEND == "memory":
+        return MemoryIdempotencyStore(ttl=settings.IDEMPOTENCY_TTL_SECONDS, max_keys=settings.IDEMPOTENCY_MAX_KEYS)
+    raise RuntimeError(f"Unknown IDEMPOTENCY_BACKEND: {settings.IDEMPOTENCY_BACKEND}")
+
+
+def _with_headers(response: Response, headers: List[Tuple[str, str]]) -> Response:
+    # raw_headers, а не response.headers[...] = ...: повторяющиеся заголовки не склеиваются
+    response.raw_headers.extend(
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in headers if name != "content-length"
+    )
+    return response
+
+
+def _too_large(length: Optional[str]) -> bool:
+    return length is not None and (not length.isdigit() or int(length) > MAX_STORED_BYTES)
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """Повтор изменяющего запроса с тем же Idempotency-Key получает сохранённый ответ.
+
+    Пока первый запрос выполняется, дубликаты ждут его результата, а не
+    выполняются параллельно. Ответы 5xx не сохраняются. Потоковые ответы
+    (без content-length) и тела больше MAX_STORED_BYTES не сохраняются:
+    ключ держится, пока ответ не отдан, а повтор выполняется заново.
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None, wait: Optional[float] = None):
+        super().__init__(app)
+        self._store = store
+        self.wait = settings.IDEMPOTENCY_WAIT_SECONDS if wait is None else wait
+
+    @property
+    def store(self) -> IdempotencyStore:
+        if self._store is None:
+            self._store = get_idempotency_store()
+        return self._store
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(HEADER)
+        if not key or request.method not in UNSAFE_METHODS:
+            return await call_next(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JSONResponse({"detail": f"{HEADER} is too long"}, status_code=400)
+        if "transfer-encoding" in request.headers or _too_large(request.headers.get("content-length")):
+            # большое или потоковое тело не читаем в память ради отпечатка
+            return await call_next(request)
+
+        body = await request.body()
+        scoped = f"{request.method}:{request.url.path}:{key}"
+        fingerprint = hashlib.sha256(body).hexdigest()
+        try:
+            stored = await self.store.begin(scoped, fingerprint, self.wait)
+        except KeyMismatch:
+            return JSONResponse({"detail": f"{HEADER} was already used with a different request body"}, status_code=422)
+        except KeyInFlight:
+            return JSONResponse({"detail": f"A request with this {HEADER} is still in progress"}, status_code=409)
+        if stored is not None:
+            response = _with_headers(Response(content=stored.body, status_code=stored.status), stored.headers)
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = await call_next(request)
+            if response.status_code >= 500:
+                await self.store.abort(scoped)
+                return response
+            length = response.headers.get("content-length")
+            if length is None or _too_large(length):
+                return self._pass_through(response, scoped)
+            content = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            await self.store.abort(scoped)
+            raise
+
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.raw_headers if k != b"content-length"]
+        try:
+            await self.store.complete(scoped, fingerprint, StoredResponse(status=response.status_code, headers=headers, body=content))
+        except Exception:
+            logger.exception("idempotency: failed to store response")
+        return _with_headers(Response(content=content, status_code=response.status_code), headers)
+
+    def _pass_through(self, response: Response, scoped: str) -> Response:
+        body = response.body_iterator
+
+        async def stream():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await self.store.abort(scoped)
+
+        response.body_iterator = stream()
+        return response
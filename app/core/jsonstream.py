@@ -0,0 +1,58 @@
+# app/core/jsonstream.py
+# Потоковое чтение JSON-массивов и NDJSON: записи отдаются по мере прихода байтов
+import codecs
+import json
+from typing import Any, AsyncIterator, Tuple
+
+READ_CHUNK = 64 * 1024
+# запись длиннее этого считается битой, а не недочитанной
+MAX_RECORD_BYTES = 1_000_000
+
+
+async def file_chunks(path: str, size: int = READ_CHUNK) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+async def iter_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """(номер, значение) записей JSON-массива или NDJSON, без загрузки всего потока.
+
+    ValueError — поток не разобрать дальше этой записи.
+    """
+    decoder = json.JSONDecoder()
+    text = iter_text(chunks)
+    buf, n, eof = "", 0, False
+    while True:
+        pos = 0
+        while pos < len(buf) and buf[pos] in " \t\r\n[],":
+            pos += 1
+        buf = buf[pos:]
+        if buf:
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError as e:
+                if eof or len(buf) > MAX_RECORD_BYTES:
+                    raise ValueError(f"record {n + 1}: invalid JSON: {e.msg}")
+            else:
+                n += 1
+                yield n, obj
+                buf = buf[end:]
+                continue
+        elif eof:
+            return
+        try:
+            buf += await text.__anext__()
+        except StopAsyncIteration:
+            eof = True
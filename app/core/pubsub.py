@@ -0,0 +1,183 @@
+# app/core/pubsub.py
+import asyncio
+import json
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.logger import logger
+
+PG_CHANNEL = "app_events"
+SUBSCRIBER_BUFFER = 100
+LISTEN_RETRY_SECONDS = 5.0
+# NOTIFY ограничен 8000 байт; события больше этого не уходят в другие воркеры
+MAX_NOTIFY_BYTES = 7900
+
+
+class Subscription:
+    """Ограниченный буфер событий одного подписчика.
+
+    При переполнении старые события выбрасываются, а следующий get() вернёт
+    {"type": "resync"} — клиенту нужно перечитать состояние целиком.
+    """
+
+    def __init__(self, topic: str, maxsize: int = SUBSCRIBER_BUFFER):
+        self.topic = topic
+        self._buffer: Deque[dict] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self.lagged = False
+
+    def push(self, event: dict) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.lagged = True
+        self._buffer.append(event)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Следующее событие или None по таймауту."""
+        if not self._buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.lagged:
+            self.lagged = False
+            self._buffer.clear()
+            return {"type": "resync"}
+        return self._buffer.popleft()
+
+
+class Broker:
+    """In-process pub/sub по топикам с доставкой между воркерами через Postgres LISTEN/NOTIFY.
+
+    publish() раздаёт событие локальным подписчикам сразу и отправляет его в
+    NOTIFY; слушатель каждого воркера раздаёт чужие события своим подписчикам.
+    Подписчик — это только буфер в памяти, без соединения с БД.
+    """
+
+    def __init__(self, channel: str = PG_CHANNEL):
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._hooks: List[Callable[[str, dict], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def distributed(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    @contextmanager
+    def subscribe(self, topic: str, maxsize: int = SUBSCRIBER_BUFFER) -> Iterator[Subscription]:
+        sub = Subscription(topic, maxsize)
+        self._topics.setdefault(topic, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self._topics.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[topic]
+
+    def subscribers(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def add_hook(self, hook: Callable[[str, dict], None]) -> None:
+        """hook(topic, event) вызывается для каждого события всех топиков, включая чужие воркеры."""
+        self._hooks.append(hook)
+
+    def publish_local(self, topic: str, event: dict) -> None:
+        for hook in self._hooks:
+            try:
+                hook(topic, event)
+            except Exception:
+                logger.exception(f"pubsub: hook failed for {topic}")
+        for sub in self._topics.get(topic, ()):
+            sub.push(event)
+
+    async def publish(self, topic: str, event: dict) -> None:
+        """Вызывать после commit: событие уходит подписчикам всех воркеров."""
+        await self.publish_many(topic, [event])
+
+    async def publish_many(self, topic: str, events: List[dict]) -> None:
+        """Пачка событий одного топика: NOTIFY пакуются до MAX_NOTIFY_BYTES в одном соединении."""
+        for event in events:
+            self.publish_local(topic, event)
+        if not self.distributed or not events:
+            return
+        payloads, chunk, size = [], [], 0
+        for event in events:
+            encoded = json.dumps(event, default=str)
+            if len(encoded.encode()) > MAX_NOTIFY_BYTES:
+                logger.warning(f"pubsub: event for {topic} is too large for NOTIFY, delivered locally only")
+                continue
+            if chunk and size + len(encoded.encode()) > MAX_NOTIFY_BYTES:
+                payloads.append(chunk)
+                chunk, size = [], 0
+            chunk.append(encoded)
+            size += len(encoded.encode()) + 1
+        if chunk:
+            payloads.append(chunk)
+        try:
+            async with engine.connect() as conn:
+                for chunk in payloads:
+                    payload = f'{{"o": "{self.origin}", "t": {json.dumps(topic)}, "e": [{",".join(chunk)}]}}'
+                    await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+                await conn.commit()
+        except Exception:
+            # доставка событий не должна ломать запрос, который их породил
+            logger.exception(f"pubsub: NOTIFY for {topic} failed")
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self.origin:
+            return  # своё событие уже раздано в publish()
+        for event in message["e"]:
+            self.publish_local(message["t"], event)
+
+    def start(self) -> None:
+        if self.distributed and self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="pubsub-listen")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self) -> None:
+        # одно выделенное соединение на воркер; при обрыве переподключаемся
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    try:
+                        raw = (await conn.get_raw_connection()).driver_connection
+                        lost = asyncio.Event()
+                        raw.add_termination_listener(lambda _conn: lost.set())
+                        await raw.add_listener(self.channel, self._on_notify)
+                        logger.info(f"pubsub: listening on {self.channel}")
+                        await lost.wait()
+                        logger.warning("pubsub: listener connection lost")
+                    finally:
+                        # соединение со слушателем не возвращаем в пул
+                        await conn.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("pubsub: listener failed")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+broker = Broker()
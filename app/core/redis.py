@@ -0,0 +1,14 @@
+# app/core/redis.py
+from functools import lru_cache
+
+from app.core.config import settings
+
+
+@lru_cache()
+def get_redis():
+    """Общий асинхронный клиент Redis (создаётся при первом обращении)."""
+    try:
+        from redis import asyncio as aioredis
+    except ImportError as e:  # redis нужен только при включённых Redis-бэкендах
+        raise RuntimeError("Redis backend requires the 'redis' package") from e
+    return aioredis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
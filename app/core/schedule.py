@@ -0,0 +1,119 @@
+# app/core/schedule.py
+# Разбор Shop.open_hours: {"mon-fri": "08:00-20:00", "sat": "09:00-17:00"}
+import re
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MINUTES_PER_DAY = 24 * 60
+WEEK_MINUTES = 7 * MINUTES_PER_DAY
+
+_INTERVAL_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+_CLOSED = {"", "closed", "выходной", "-"}
+
+# weekday (0 = пн) -> [(начало, конец)] в минутах от полуночи; конец может быть > 1440
+WeeklyIntervals = Dict[int, List[Tuple[int, int]]]
+# отсортированные непересекающиеся интервалы в минутах от начала недели (пн 00:00): (starts, ends)
+WeekIndex = Tuple[List[int], List[int]]
+
+
+def _parse_days(spec: str) -> List[int]:
+    days: List[int] = []
+    for part in spec.lower().split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = (p.strip() for p in part.split("-", 1))
+            a, b = DAYS.index(first), DAYS.index(last)
+            # диапазон может переходить через воскресенье: "fri-mon"
+            days.extend((a + i) % 7 for i in range((b - a) % 7 + 1))
+        else:
+            days.append(DAYS.index(part))
+    return days
+
+
+def _parse_intervals(spec: str) -> List[Tuple[int, int]]:
+    if spec.strip().lower() in _CLOSED:
+        return []
+    intervals = []
+    for part in spec.split(","):
+        m = _INTERVAL_RE.match(part)
+        if not m:
+            raise ValueError(f"bad interval {part!r}")
+        h1, m1, h2, m2 = (int(g) for g in m.groups())
+        start, end = h1 * 60 + m1, h2 * 60 + m2
+        if start > MINUTES_PER_DAY or end > MINUTES_PER_DAY:
+            raise ValueError(f"bad interval {part!r}")
+        if end <= start:
+            end += MINUTES_PER_DAY  # работа после полуночи: "20:00-02:00"
+        intervals.append((start, end))
+    return intervals
+
+
+def parse_open_hours(open_hours: Any) -> WeeklyIntervals:
+    """Разбирает open_hours в интервалы по дням недели.
+
+    Более конкретные ключи перекрывают общие: {"mon-sun": ..., "sun": "closed"}.
+    Бросает ValueError на нераспознанный формат.
+    """
+    if not open_hours:
+        return {}
+    if not isinstance(open_hours, dict):
+        raise ValueError("open_hours must be an object")
+
+    parsed = []
+    for days_spec, hours_spec in open_hours.items():
+        try:
+            days = _parse_days(days_spec)
+        except ValueError:
+            raise ValueError(f"bad day range {days_spec!r}")
+        parsed.append((days, _parse_intervals(str(hours_spec or ""))))
+
+    result: WeeklyIntervals = {}
+    # сначала широкие диапазоны, потом отдельные дни
+    for days, intervals in sorted(parsed, key=lambda p: -len(p[0])):
+        for day in days:
+            result[day] = sorted(intervals)
+    return {day: iv for day, iv in result.items() if iv}
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo по имени, один объект на зону; без имени — UTC."""
+    return ZoneInfo(name or "UTC")
+
+
+def compile_week(intervals: WeeklyIntervals) -> WeekIndex:
+    """Сводит интервалы по дням в список интервалов недели для поиска бинарным поиском.
+
+    Работа после полуночи переносится на следующий день, воскресная ночь — на понедельник.
+    """
+    spans = []
+    for day, day_intervals in intervals.items():
+        for start, end in day_intervals:
+            start, end = day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end
+            if end > WEEK_MINUTES:
+                spans.append((0, end - WEEK_MINUTES))
+                end = WEEK_MINUTES
+            spans.append((start, end))
+    starts: List[int] = []
+    ends: List[int] = []
+    for start, end in sorted(spans):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def minute_of_week(local: datetime) -> int:
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def is_open_at(week: WeekIndex, minute: int) -> bool:
+    starts, ends = week
+    i = bisect_right(starts, minute) - 1
+    return i >= 0 and minute < ends[i]
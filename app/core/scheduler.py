@@ -0,0 +1,139 @@
+# app/core/scheduler.py
+import asyncio
+import heapq
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.logger import logger
+
+
+def _utc_naive(dt: datetime) -> datetime:
+    # в heap всё хранится в naive UTC, как и datetime.utcnow() в остальном коде
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class DeadlineScheduler:
+    """Фоновая asyncio-задача, которая просыпается к ближайшему дедлайну.
+
+    Дедлайны лежат в heap: их добавляет track() (локальные события) и
+    run_due() — колбэк, который обрабатывает всё просроченное и возвращает
+    следующий известный дедлайн из хранилища. Без дедлайнов задача спит
+    idle_interval секунд, чтобы подхватить события других воркеров.
+
+    При exclusive=True работает только один воркер на всю БД: лидер держит
+    session-level advisory lock Postgres на отдельном соединении. Если воркер
+    умирает, соединение закрывается, lock освобождается и его берёт другой.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_due: Callable[[], Awaitable[Optional[datetime]]],
+        lock_key: int,
+        idle_interval: float = 5.0,
+        leader_retry: float = 10.0,
+    ):
+        self.name = name
+        self.run_due = run_due
+        self.lock_key = lock_key
+        self.idle_interval = idle_interval
+        self.leader_retry = leader_retry
+        self.exclusive = True
+        self.is_leader = False
+        self._deadlines: List[datetime] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock_conn = None
+
+    def track(self, deadline: datetime) -> None:
+        """Сообщает о новом дедлайне; будит задачу, если он раньше текущего."""
+        if not self.is_leader:
+            return
+        deadline = _utc_naive(deadline)
+        heapq.heappush(self._deadlines, deadline)
+        if self._deadlines[0] == deadline:
+            self._wakeup.set()
+
+    def start(self, exclusive: bool = True) -> None:
+        if self._task is not None:
+            return
+        self.exclusive = exclusive
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._resign()
+
+    async def _elect(self) -> bool:
+        if not self.exclusive or engine.dialect.name != "postgresql":
+            self.is_leader = True
+            return True
+        if self._lock_conn is not None:
+            # проверяем, что соединение с lock живо
+            await self._lock_conn.execute(text("SELECT 1"))
+            return True
+
+        conn = await engine.connect()
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        got = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key})).scalar()
+        if not got:
+            await conn.close()
+            return False
+        self._lock_conn = conn
+        self.is_leader = True
+        logger.info(f"{self.name}: became leader")
+        return True
+
+    async def _resign(self) -> None:
+        self.is_leader = False
+        self._deadlines.clear()
+        if self._lock_conn is not None:
+            conn, self._lock_conn = self._lock_conn, None
+            try:
+                await conn.close()  # закрытие соединения снимает advisory lock
+            except Exception:
+                logger.exception(f"{self.name}: failed to close lock connection")
+
+    async def _sleep(self, next_deadline: Optional[datetime]) -> None:
+        if next_deadline is not None:
+            heapq.heappush(self._deadlines, _utc_naive(next_deadline))
+        now = datetime.utcnow()
+        while self._deadlines and self._deadlines[0] <= now:
+            heapq.heappop(self._deadlines)
+
+        timeout = self.idle_interval
+        if self._deadlines:
+            timeout = min(timeout, (self._deadlines[0] - now).total_seconds())
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not await self._elect():
+                    await asyncio.sleep(self.leader_retry)
+                    continue
+                next_deadline = await self.run_due()
+                await self._sleep(next_deadline)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"{self.name}: iteration failed")
+                await self._resign()
+                await asyncio.sleep(self.leader_retry)
@@ -0,0 +1,234 @@
+# app/core/segment_log.py
+# Локальный append-only журнал: запись подтверждается после fsync, fsync общий на пачку записей
+import asyncio
+import fcntl
+import os
+import struct
+import time
+import zlib
+from typing import Iterator, List, Optional
+
+from app.logger import logger
+
+SEGMENT_BYTES = 4 * 1024 * 1024
+# активный сегмент закрывается не позже, чем через столько секунд после первой записи
+SEGMENT_ROLL_SECONDS = 0.2
+MAX_SLOTS = 64
+# сегменты, которые потребитель так и не смог обработать; из слотов не читаются
+DEAD_LETTER_DIR = "dead"
+
+# длина и crc32 записи; хвост, оборванный на середине, при чтении отбрасывается
+_FRAME = struct.Struct("<II")
+_SUFFIX = ".seg"
+
+
+def read_segment(path: str) -> Iterator[bytes]:
+    """Записи сегмента по порядку; на оборванной или битой записи чтение заканчивается."""
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + _FRAME.size <= len(data):
+        size, crc = _FRAME.unpack_from(data, pos)
+        start, end = pos + _FRAME.size, pos + _FRAME.size + size
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            logger.warning(f"segment log: {path} is torn at offset {pos}, {len(data) - pos} bytes dropped")
+            return
+        yield data[start:end]
+        pos = end
+    if pos != len(data):
+        logger.warning(f"segment log: {path} is torn at offset {pos}, {len(data) - pos} bytes dropped")
+
+
+def _fsync_dir(path: str) -> None:
+    """Синхронизирует каталог: без этого созданный или переименованный файл может пропасть после сбоя питания."""
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SegmentLog:
+    """Журнал из сегментов-файлов <root>/slot-N/<seq>.seg для одного процесса.
+
+    append() ставит запись в буфер и ждёт, пока её запишет и синхронизирует
+    на диск фоновый сброс; записи, пришедшие во время fsync, уходят следующим
+    одним write + fsync. Закрытые сегменты (sealed) читает потребитель и
+    удаляет их после обработки.
+
+    Каждый воркер берёт свободный слот по flock; сегменты слотов, чьи
+    владельцы не живы, при открытии переносятся к себе и обрабатываются
+    вместе со своими — так после рестарта ничего не теряется.
+    """
+
+    def __init__(self, root: str, segment_bytes: int = SEGMENT_BYTES, roll_seconds: float = SEGMENT_ROLL_SECONDS):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.roll_seconds = roll_seconds
+        self.dir: Optional[str] = None
+        self._lock_fd: Optional[int] = None
+        self._seq = 0
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._sealed: List[str] = []
+        self._buf: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._flushing: Optional[asyncio.Task] = None
+        self._io = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.dir is not None
+
+    def open(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        for n in range(MAX_SLOTS):
+            path = os.path.join(self.root, f"slot-{n}")
+            fd = self._try_lock(path)
+            if fd is not None:
+                self.dir, self._lock_fd = path, fd
+                break
+        else:
+            raise RuntimeError(f"segment log: all {MAX_SLOTS} slots in {self.root} are busy")
+        self._sealed = self._segments(self.dir)
+        self._seq = int(os.path.basename(self._sealed[-1])[:-len(_SUFFIX)]) if self._sealed else 0
+        self._adopt_orphans()
+        if self._sealed:
+            logger.info(f"segment log: {len(self._sealed)} unprocessed segments to replay in {self.dir}")
+
+    @staticmethod
+    def _try_lock(path: str) -> Optional[int]:
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, "lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    @staticmethod
+    def _segments(path: str) -> List[str]:
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(_SUFFIX))
+
+    def _next_path(self) -> str:
+        self._seq += 1
+        return os.path.join(self.dir, f"{self._seq:016d}{_SUFFIX}")
+
+    def _adopt_orphans(self) -> None:
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if path == self.dir or not name.startswith("slot-") or not os.path.isdir(path):
+                continue
+            fd = self._try_lock(path)
+            if fd is None:
+                continue  # слот занят живым воркером
+            try:
+                segments = self._segments(path)
+                for seg in segments:
+                    target = self._next_path()
+                    os.rename(seg, target)
+                    self._sealed.append(target)
+                if segments:
+                    _fsync_dir(self.dir)
+                    _fsync_dir(path)
+            finally:
+                os.close(fd)
+
+    async def append(self, record: bytes) -> None:
+        """Возвращается, когда запись на диске (после fsync)."""
+        if not self.is_open:
+            raise RuntimeError("segment log is not open")
+        self._buf.append(_FRAME.pack(len(record), zlib.crc32(record)) + record)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self._flush())
+        await waiter
+
+    async def _flush(self) -> None:
+        while self._buf:
+            data, waiters = b"".join(self._buf), self._waiters
+            self._buf, self._waiters = [], []
+            try:
+                async with self._io:
+                    await asyncio.to_thread(self._write, data)
+            except Exception as e:
+                for w in waiters:
+                    if not w.done():
+                        w.set_exception(e)
+                continue
+            for w in waiters:
+                if not w.done():
+                    w.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        if self._fd is None:
+            path = self._next_path()
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._size, self._opened_at = 0, time.monotonic()
+            # запись подтверждается только вместе с записью каталога о новом файле
+            _fsync_dir(self.dir)
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+        self._size += len(data)
+        if self._size >= self.segment_bytes:
+            self._seal()
+
+    def _seal(self) -> None:
+        if self._fd is None:
+            return
+        os.close(self._fd)
+        self._fd = None
+        _fsync_dir(self.dir)
+        self._sealed.append(os.path.join(self.dir, f"{self._seq:016d}{_SUFFIX}"))
+
+    async def roll(self, force: bool = False) -> None:
+        """Закрывает активный сегмент, если он старше roll_seconds (или force), чтобы его забрал потребитель."""
+        if self._fd is None or not (force or time.monotonic() - self._opened_at >= self.roll_seconds):
+            return
+        async with self._io:
+            self._seal()
+
+    def sealed(self) -> List[str]:
+        return list(self._sealed)
+
+    def remove(self, path: str) -> None:
+        """Сегмент обработан — удаляется с диска.
+
+        Каталог не синхронизируется: если удаление потеряется при сбое,
+        сегмент просто обработается повторно.
+        """
+        os.unlink(path)
+        self._sealed.remove(path)
+
+    def dead_letter(self, path: str) -> str:
+        """Сегмент не обрабатывается — переносится в <root>/dead и больше не читается; возвращает новый путь.
+
+        Чтобы повторить его, достаточно вернуть файл в любой slot-N до старта воркера.
+        """
+        dead = os.path.join(self.root, DEAD_LETTER_DIR)
+        if not os.path.isdir(dead):
+            os.makedirs(dead)
+            _fsync_dir(self.root)
+        # номера сегментов в слоте начинаются заново после рестарта — добавляем слот и время
+        name = f"{os.path.basename(self.dir)}-{int(time.time())}-{os.path.basename(path)}"
+        target = os.path.join(dead, name)
+        os.rename(path, target)
+        _fsync_dir(dead)
+        _fsync_dir(os.path.dirname(path))
+        self._sealed.remove(path)
+        return target
+
+    async def seal(self) -> None:
+        """Дожидается сброса буфера и закрывает активный сегмент — всё принятое попадает в sealed()."""
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self.roll(force=True)
+
+    async def close(self) -> None:
+        await self.seal()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # снимает flock слота
+        self.dir, self._lock_fd = None, None
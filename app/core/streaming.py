@@ -0,0 +1,93 @@
+# app/core/streaming.py
+# Потоковая выдача больших списков в NDJSON или CSV: строки читаются курсором
+# пачками по STREAM_CHUNK_ROWS и кодируются по мере чтения
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, Optional, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.sql import Select
+
+from app.core.database import AsyncSessionLocal
+
+STREAM_CHUNK_ROWS = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_FORMATS = {"ndjson": NDJSON_MEDIA_TYPE, "csv": "text/csv"}
+# для Query(pattern=...) эндпоинтов со списками
+STREAM_FORMAT_PATTERN = "^(json|ndjson|csv)$"
+
+
+def stream_format(format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """Формат потоковой выдачи ("ndjson" / "csv") или None — обычный JSON-массив.
+
+    ?format важнее заголовка Accept; неизвестный format — ValueError.
+    """
+    if format is not None:
+        if format == "json":
+            return None
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"unknown format {format!r}, expected json, ndjson or csv")
+        return format
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    return None
+
+
+def _csv_cell(value):
+    # вложенные объекты (payload, open_hours, позиции заказа) — JSON в одной ячейке
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value
+
+
+async def stream_rows(
+    stmt: Select,
+    schema: Type[BaseModel],
+    fmt: str,
+    keep: Optional[Callable[[object], bool]] = None,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+) -> AsyncIterator[str]:
+    """Строки запроса stmt через schema, пачка за пачкой; keep — фильтр, которого нет в SQL.
+
+    Открывает свою сессию: генератор живёт дольше запроса, которому отдан.
+    Память ограничена одной пачкой независимо от размера выборки: identity
+    map сессии держит объекты по слабым ссылкам, прочитанные пачки уходят в GC.
+    """
+    out = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=list(schema.model_fields))
+        writer.writeheader()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(stmt.execution_options(yield_per=chunk_rows))
+        async for objs in result.partitions():
+            for obj in objs:
+                if keep is not None and not keep(obj):
+                    continue
+                row = schema.model_validate(obj, from_attributes=True)
+                if writer is None:
+                    out.write(row.model_dump_json())
+                    out.write("\n")
+                else:
+                    writer.writerow({k: _csv_cell(v) for k, v in row.model_dump(mode="json").items()})
+            if out.tell():
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+    if out.tell():
+        yield out.getvalue()
+
+
+def streaming_response(
+    stmt: Select,
+    schema: Type[BaseModel],
+    fmt: str,
+    filename: str,
+    keep: Optional[Callable[[object], bool]] = None,
+) -> StreamingResponse:
+    headers = {}
+    if fmt == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return StreamingResponse(stream_rows(stmt, schema, fmt, keep), media_type=STREAM_FORMATS[fmt], headers=headers)
@@ -0,0 +1,64 @@
+# app/core/webhook.py
+# Общий разбор входящих вебхуков: тело читается один раз, подпись и типизированное
+# событие получаются из одного и того же буфера
+import hashlib
+import hmac
+import json
+from typing import Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: тот же результат через json, только медленнее
+    orjson = None
+
+SIGNATURE_HEADER = "X-Signature"
+MAX_WEBHOOK_BYTES = 256 * 1024
+
+EventT = TypeVar("EventT", bound=BaseModel)
+
+
+def loads(body: bytes):
+    """JSON целиком (для хранения payload); orjson, если установлен."""
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def sign(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str]) -> bool:
+    """HMAC-SHA256 тела в hex (допускается префикс "sha256="), сравнение за постоянное время."""
+    if not signature or not secret:
+        return False
+    if signature.startswith("sha256="):
+        signature = signature[len("sha256="):]
+    return hmac.compare_digest(sign(body, secret), signature.strip().lower())
+
+
+def decode_event(body: bytes, model: Type[EventT]) -> EventT:
+    """Тело сразу в типизированное событие, без промежуточного dict (парсер pydantic-core)."""
+    return model.model_validate_json(body)
+
+
+async def read_webhook(request: Request, secret: Optional[str], model: Type[EventT]) -> Tuple[bytes, EventT]:
+    """(тело, событие): размер, подпись и разбор — или HTTPException 413/401/400/422."""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_WEBHOOK_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    body = await request.body()
+    if len(body) > MAX_WEBHOOK_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER), secret):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    try:
+        event = decode_event(body, model)
+    except ValidationError as e:
+        err = e.errors()[0]
+        if err["type"] == "json_invalid":
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        where = ".".join(str(p) for p in err["loc"])
+        raise HTTPException(status_code=422, detail=f"{where}: {err['msg']}" if where else err["msg"])
+    return body, event
@@ -0,0 +1,202 @@
+# app/crud/availability.py
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.hold_store import get_hold_store
+from app.models.shop import Shop
+from app.models.time_slot import TimeSlot
+
+# Сколько живёт сетка без событий: ограничивает расхождение между воркерами
+# и holds, о сроке истечения которых процесс не знает.
+GRID_TTL_SECONDS = 30
+MAX_GRIDS = 10_000
+# ключ в Session.info: изменения сетки, ждущие commit транзакции
+_PENDING_KEY = "availability_pending"
+
+
+@dataclass
+class SlotCell:
+    slot_id: UUID
+    start: Optional[datetime]
+    end: Optional[datetime]
+    capacity: Optional[int]
+    held: int
+    confirmed: int
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.capacity is None:
+            return None
+        return self.capacity - self.held - self.confirmed
+
+
+@dataclass
+class DayGrid:
+    shop_id: UUID
+    day: date
+    cells: List[SlotCell]
+    stale_at: float  # time.monotonic()
+
+
+class AvailabilityGrid:
+    """Сетка доступности слотов магазина по дням, собранная один раз и обновляемая событиями.
+
+    Чтение сетки не ходит в БД. Захват/освобождение мест правят ячейки на месте
+    после commit транзакции (adjust), а сетка устаревает при истечении самого раннего известного hold
+    или через GRID_TTL_SECONDS — после этого пересобирается одним SELECT по
+    time_slots и одним батчем HoldStore.
+    """
+
+    def __init__(self, ttl: float = GRID_TTL_SECONDS, max_grids: int = MAX_GRIDS):
+        self.ttl = ttl
+        self.max_grids = max_grids
+        self._grids: Dict[Tuple[UUID, date], DayGrid] = {}
+        self._cells: Dict[UUID, Tuple[Tuple[UUID, date], SlotCell]] = {}
+        self._tz: Dict[UUID, ZoneInfo] = {}
+        self._locks: Dict[Tuple[UUID, date], asyncio.Lock] = {}
+
+    def _fresh(self, key) -> Optional[DayGrid]:
+        grid = self._grids.get(key)
+        if grid is not None and grid.stale_at > time.monotonic():
+            return grid
+        return None
+
+    async def _shop_tz(self, db: AsyncSession, shop_id: UUID) -> Optional[ZoneInfo]:
+        tz = self._tz.get(shop_id)
+        if tz is None:
+            res = await db.execute(select(Shop.tz).where(Shop.id == shop_id))
+            row = res.first()
+            if row is None:
+                return None
+            tz = self._tz[shop_id] = ZoneInfo(row.tz or "UTC")
+        return tz
+
+    async def get_day(self, db: AsyncSession, shop_id: UUID, day: Optional[date] = None) -> Optional[DayGrid]:
+        """Сетка на день (по часовому поясу магазина). None — магазин не найден."""
+        tz = await self._shop_tz(db, shop_id)
+        if tz is None:
+            return None
+        if day is None:
+            day = datetime.now(tz).date()
+        key = (shop_id, day)
+
+        grid = self._fresh(key)
+        if grid is not None:
+            return grid
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # пока ждали блокировку, сетку мог собрать другой запрос
+            grid = self._fresh(key) or await self._build(db, shop_id, day, tz)
+        self._locks.pop(key, None)
+        return grid
+
+    async def _build(self, db: AsyncSession, shop_id: UUID, day: date, tz: ZoneInfo) -> DayGrid:
+        day_start = datetime.combine(day, dtime.min, tzinfo=tz).astimezone(timezone.utc)
+        day_end = day_start + timedelta(days=1)
+        res = await db.execute(
+            select(TimeSlot)
+            .where(
+                TimeSlot.shop_id == shop_id,
+                TimeSlot.is_active.isnot(False),
+                TimeSlot.start >= day_start,
+                TimeSlot.start < day_end,
+            )
+            .order_by(TimeSlot.start.asc())
+        )
+        slots = res.scalars().all()
+        held = await get_hold_store().held_counts(db, slots) if slots else {}
+        cells = [
+            SlotCell(
+                slot_id=s.id, start=s.start, end=s.end, capacity=s.capacity,
+                held=held.get(s.id, 0), confirmed=s.confirmed_count,
+            )
+            for s in slots
+        ]
+        grid = DayGrid(shop_id=shop_id, day=day, cells=cells, stale_at=time.monotonic() + self.ttl)
+        self._store(grid)
+        return grid
+
+    def _store(self, grid: DayGrid) -> None:
+        key = (grid.shop_id, grid.day)
+        self._drop(key)
+        if len(self._grids) >= self.max_grids:
+            now = time.monotonic()
+            for k in [k for k, g in self._grids.items() if g.stale_at <= now]:
+                self._drop(k)
+            while len(self._grids) >= self.max_grids:
+                self._drop(next(iter(self._grids)))
+        self._grids[key] = grid
+        for cell in grid.cells:
+            self._cells[cell.slot_id] = (key, cell)
+
+    def _drop(self, key) -> None:
+        grid = self._grids.pop(key, None)
+        if grid is not None:
+            for cell in grid.cells:
+                self._cells.pop(cell.slot_id, None)
+
+    def adjust(
+        self, db: AsyncSession, slot_id: UUID, held: int = 0, confirmed: int = 0,
+        expires_at: Optional[datetime] = None,
+    ) -> None:
+        """Изменение занятости слота в транзакции db.
+
+        В сетку попадает после commit; если транзакция откатилась, сетка
+        со слотом сбрасывается и пересобирается из БД и HoldStore.
+        """
+        db.info.setdefault(_PENDING_KEY, []).append((self, slot_id, held, confirmed, expires_at))
+
+    def _apply(self, slot_id: UUID, held: int, confirmed: int, expires_at: Optional[datetime]) -> None:
+        entry = self._cells.get(slot_id)
+        if entry is None:
+            return
+        key, cell = entry
+        cell.held += held
+        cell.confirmed += confirmed
+        if expires_at is not None:
+            # сетка устаревает, когда истекает этот hold
+            grid = self._grids[key]
+            left = (expires_at - datetime.utcnow()).total_seconds()
+            grid.stale_at = min(grid.stale_at, time.monotonic() + max(left, 0))
+
+    def invalidate(self, slot_id: Optional[UUID] = None) -> None:
+        """Сбрасывает сетку со слотом slot_id (или все сетки)."""
+        if slot_id is None:
+            self._grids.clear()
+            self._cells.clear()
+            return
+        entry = self._cells.get(slot_id)
+        if entry is not None:
+            self._drop(entry[0])
+
+    def invalidate_shop(self, shop_id: UUID) -> None:
+        for key in [k for k in self._grids if k[0] == shop_id]:
+            self._drop(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    for grid, *change in session.info.pop(_PENDING_KEY, ()):
+        grid._apply(*change)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction) -> None:
+    # внешняя транзакция закончилась без commit (rollback, close): ячейки не трогаем,
+    # а сбрасываем — при откате hold в Redis мог остаться, в slot_holds — нет
+    if transaction.parent is not None:
+        return
+    for grid, slot_id, *_ in session.info.pop(_PENDING_KEY, ()):
+        grid.invalidate(slot_id)
+
+
+availability_grid = AvailabilityGrid()
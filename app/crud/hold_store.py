@@ -0,0 +1,449 @@
+# app/crud/hold_store.py
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, event, func, select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.logger import logger
+from app.models.order import Order
+from app.models.slot_hold import SlotHold
+from app.models.time_slot import TimeSlot
+
+HOLD_TTL_SECONDS = 120
+# ключ в Session.info: операции с holds вне Postgres, ждущие конца транзакции
+_PENDING_KEY = "hold_store_pending"
+
+Op = Callable[[], Awaitable]
+# операции после commit/rollback выполняются задачами: слушатели сессии синхронные
+_background: Set[asyncio.Task] = set()
+
+
+class HoldStore:
+    """Хранилище временных holds слотов.
+
+    Hold держит место в слоте HOLD_TTL_SECONDS, пока заказ не оплачен.
+    Подтверждённые места всегда лежат в time_slots.confirmed_count (Postgres).
+    Методы получают сессию вызывающего кода и не делают commit.
+    """
+
+    ttl = HOLD_TTL_SECONDS
+    # состояние общее для всех воркеров (иначе — своё в каждом процессе)
+    shared = True
+    # истёкшие holds исчезают сами, фоновая уборка не нужна
+    expires_natively = False
+
+    async def acquire(self, db: AsyncSession, slot: TimeSlot, order_id: UUID) -> Optional[datetime]:
+        """Занимает место; возвращает время истечения hold или None, если мест нет."""
+        raise NotImplementedError
+
+    async def release(self, db: AsyncSession, order: Order) -> bool:
+        """Снимает активный hold заказа в order.slot_id. True, если hold был."""
+        raise NotImplementedError
+
+    async def confirm(self, db: AsyncSession, order: Order) -> bool:
+        """Превращает активный hold в подтверждённое место. False, если hold уже истёк."""
+        raise NotImplementedError
+
+    async def held_counts(self, db: AsyncSession, slots: Iterable[TimeSlot]) -> Dict[UUID, int]:
+        """Количество активных holds по слотам."""
+        raise NotImplementedError
+
+    async def expire(
+        self, db: AsyncSession, slot_id: Optional[UUID] = None, limit: Optional[int] = None,
+    ) -> Dict[UUID, int]:
+        """Освобождает до limit истёкших holds: {slot_id: сколько снято}.
+
+        Нужно только бэкендам без нативного TTL.
+        """
+        return {}
+
+    async def next_expiry(self, db: AsyncSession) -> Optional[datetime]:
+        """Ближайший срок истечения hold (для планировщика уборки)."""
+        return None
+
+
+async def _decrement_held(db: AsyncSession, per_slot: Counter) -> None:
+    for slot_id, n in per_slot.items():
+        await db.execute(
+            update(TimeSlot)
+            .where(TimeSlot.id == slot_id)
+            .values(held_count=TimeSlot.held_count - n)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class DatabaseHoldStore(HoldStore):
+    """Holds в таблице slot_holds + счётчик time_slots.held_count.
+
+    Место захватывается одним условным UPDATE ... RETURNING: проверка ёмкости
+    и инкремент выполняются под блокировкой строки слота, а hold вставляется
+    в той же транзакции, поэтому параллельные запросы не переполняют слот.
+    """
+
+    async def _claim(self, db: AsyncSession, slot_id: UUID) -> bool:
+        claimed = await db.execute(
+            update(TimeSlot)
+            .where(
+                TimeSlot.id == slot_id,
+                or_(
+                    TimeSlot.capacity.is_(None),
+                    TimeSlot.held_count + TimeSlot.confirmed_count < TimeSlot.capacity,
+                ),
+            )
+            .values(held_count=TimeSlot.held_count + 1)
+            .returning(TimeSlot.id)
+            .execution_options(synchronize_session=False)
+        )
+        return claimed.scalar_one_or_none() is not None
+
+    async def acquire(self, db, slot, order_id):
+        # истёкшие holds снимает фоновый планировщик (crud.slot.hold_expiry),
+        # запрос их не трогает
+        if not await self._claim(db, slot.id):
+            return None
+
+        hold = SlotHold(slot_id=slot.id, order_id=order_id, expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+        db.add(hold)
+        await db.flush()
+        return hold.expires_at
+
+    async def release(self, db, order):
+        res = await db.execute(
+            delete(SlotHold)
+            .where(SlotHold.order_id == order.id, SlotHold.slot_id == order.slot_id)
+            .returning(SlotHold.slot_id)
+        )
+        held = Counter(res.scalars().all())
+        if held:
+            await _decrement_held(db, held)
+        return bool(held)
+
+    async def confirm(self, db, order):
+        res = await db.execute(
+            delete(SlotHold)
+            .where(SlotHold.order_id == order.id, SlotHold.slot_id == order.slot_id)
+            .returning(SlotHold.slot_id)
+        )
+        if res.scalar_one_or_none() is None:
+            return False
+        await db.execute(
+            update(TimeSlot)
+            .where(TimeSlot.id == order.slot_id)
+            .values(
+                held_count=TimeSlot.held_count - 1,
+                confirmed_count=TimeSlot.confirmed_count + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return True
+
+    async def held_counts(self, db, slots):
+        return {s.id: s.held_count for s in slots}
+
+    async def expire(self, db, slot_id=None, limit=None):
+        expired = select(SlotHold.id).where(SlotHold.expires_at <= datetime.utcnow())
+        if slot_id is not None:
+            expired = expired.where(SlotHold.slot_id == slot_id)
+        if limit is not None:
+            expired = expired.order_by(SlotHold.expires_at).limit(limit)
+        # параллельная уборка (смена лидера) не ждёт и не удаляет одно и то же дважды
+        expired = expired.with_for_update(skip_locked=True)
+        res = await db.execute(
+            delete(SlotHold)
+            .where(SlotHold.id.in_(expired.scalar_subquery()))
+            .returning(SlotHold.slot_id, SlotHold.order_id)
+        )
+        rows = res.all()
+        if not rows:
+            return {}
+
+        per_slot = Counter(r.slot_id for r in rows)
+        await _decrement_held(db, per_slot)
+        # заказ без подтверждения теряет слот вместе с hold
+        await db.execute(
+            update(Order)
+            .where(Order.id.in_([r.order_id for r in rows]))
+            .values(slot_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        logger.debug(f"slot: released {len(rows)} expired holds")
+        return dict(per_slot)
+
+    async def next_expiry(self, db):
+        res = await db.execute(select(func.min(SlotHold.expires_at)))
+        return res.scalar()
+
+
+def _defer(db: AsyncSession, on_commit: Optional[Op] = None, on_rollback: Optional[Op] = None) -> None:
+    db.info.setdefault(_PENDING_KEY, []).append((on_commit, on_rollback))
+
+
+def _spawn(ops, index: int) -> None:
+    for op in ops:
+        if op[index] is not None:
+            task = asyncio.get_running_loop().create_task(op[index]())
+            _background.add(task)
+            task.add_done_callback(_finished)
+
+
+def _finished(task: asyncio.Task) -> None:
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.opt(exception=task.exception()).error("hold store: deferred operation failed")
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    _spawn(session.info.pop(_PENDING_KEY, ()), 0)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_on_rollback(session: Session, transaction) -> None:
+    # после commit список уже пуст; здесь — внешняя транзакция, закончившаяся без commit
+    if transaction.parent is not None:
+        return
+    _spawn(session.info.pop(_PENDING_KEY, ()), 1)
+
+
+async def wait_pending() -> None:
+    """Дожидается операций с holds, запущенных после commit/rollback (остановка процесса, тесты)."""
+    while _background:
+        await asyncio.gather(*list(_background), return_exceptions=True)
+
+
+class _EphemeralHoldStore(HoldStore):
+    """Общая часть бэкендов с нативным TTL: в Postgres пишутся только подтверждения.
+
+    Hold, взятый в транзакции, снимается, если она откатилась. При
+    подтверждении hold продлевается и снимается только после commit, когда
+    место уже в confirmed_count; захват же сверяет число holds со свежим
+    confirmed_count после себя. Так место подтверждённого заказа всегда видно
+    хотя бы в одном из счётчиков, и слот не переполняется.
+    """
+
+    async def _acquire(self, slot_id: UUID, order_id: UUID, limit: Optional[int]) -> Optional[Tuple[bool, int]]:
+        """None — мест нет; иначе (hold новый, а не продлённый; holds слота вместе с ним)."""
+        raise NotImplementedError
+
+    async def _release(self, slot_id: UUID, order_id: UUID) -> bool:
+        raise NotImplementedError
+
+    async def _pin(self, slot_id: UUID, order_id: UUID) -> bool:
+        raise NotImplementedError
+
+    async def _counts(self, slot_ids: list) -> Dict[UUID, int]:
+        raise NotImplementedError
+
+    async def acquire(self, db, slot, order_id):
+        limit = None if slot.capacity is None else slot.capacity - slot.confirmed_count
+        claimed = await self._acquire(slot.id, order_id, limit)
+        if claimed is None:
+            return None
+        is_new, holds = claimed
+        if db is not None and slot.capacity is not None:
+            # confirmed_count слота мог вырасти после его чтения, а hold подтверждённого
+            # заказа — уже сняться: перечитываем после захвата
+            confirmed = (await db.execute(
+                select(TimeSlot.confirmed_count).where(TimeSlot.id == slot.id)
+            )).scalar() or 0
+            if holds + confirmed > slot.capacity:
+                if is_new:
+                    await self._release(slot.id, order_id)
+                return None
+        if db is not None and is_new:
+            _defer(db, on_rollback=lambda: self._release(slot.id, order_id))
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    async def release(self, db, order):
+        return await self._release(order.slot_id, order.id)
+
+    async def confirm(self, db, order):
+        slot_id, order_id = order.slot_id, order.id
+        # hold продлевается, чтобы не истёк до commit, и снимается после него
+        if not await self._pin(slot_id, order_id):
+            return False
+        await db.execute(
+            update(TimeSlot)
+            .where(TimeSlot.id == slot_id)
+            .values(confirmed_count=TimeSlot.confirmed_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        _defer(db, on_commit=lambda: self._release(slot_id, order_id))
+        return True
+
+    async def held_counts(self, db, slots):
+        return await self._counts([s.id for s in slots])
+
+
+class MemoryHoldStore(_EphemeralHoldStore):
+    """Holds в памяти процесса. Подходит для одного воркера и тестов.
+
+    Все операции выполняются без await внутри, поэтому атомарны в event loop.
+    """
+
+    shared = False
+
+    def __init__(self, ttl: float = HOLD_TTL_SECONDS):
+        self.ttl = ttl
+        self._holds: Dict[UUID, Dict[UUID, float]] = {}  # slot_id -> {order_id: deadline}
+
+    def _live(self, slot_id: UUID) -> Dict[UUID, float]:
+        holds = self._holds.get(slot_id)
+        if not holds:
+            return {}
+        now = time.monotonic()
+        for order_id in [o for o, deadline in holds.items() if deadline <= now]:
+            del holds[order_id]
+        if not holds:
+            del self._holds[slot_id]
+        return holds
+
+    async def _acquire(self, slot_id, order_id, limit):
+        holds = self._live(slot_id)
+        is_new = order_id not in holds
+        if is_new and limit is not None and len(holds) >= limit:
+            return None
+        self._holds.setdefault(slot_id, holds)[order_id] = time.monotonic() + self.ttl
+        return is_new, len(holds)
+
+    async def _release(self, slot_id, order_id):
+        return self._live(slot_id).pop(order_id, None) is not None
+
+    async def _pin(self, slot_id, order_id):
+        holds = self._live(slot_id)
+        if order_id not in holds:
+            return False
+        holds[order_id] = time.monotonic() + self.ttl
+        return True
+
+    async def _counts(self, slot_ids):
+        return {slot_id: len(self._live(slot_id)) for slot_id in slot_ids}
+
+    async def expire(self, db, slot_id=None, limit=None):
+        # _live вычищает слоты при обращении; здесь — те, к которым больше не обращаются
+        released = {}
+        for sid in [slot_id] if slot_id is not None else list(self._holds):
+            before = len(self._holds.get(sid, ()))
+            left = len(self._live(sid))
+            if before > left:
+                released[sid] = before - left
+        return released
+
+    async def next_expiry(self, db):
+        deadlines = [d for holds in self._holds.values() for d in holds.values()]
+        if not deadlines:
+            return None
+        return datetime.utcnow() + timedelta(seconds=max(min(deadlines) - time.monotonic(), 0))
+
+
+# KEYS[1] — zset holds слота (member = order_id, score = дедлайн в мс)
+# ARGV: now_ms, deadline_ms, limit (-1 = без ограничения), order_id
+# Возвращает {0, holds} — мест нет, {1, holds} — новый hold, {2, holds} — продлён существующий
+_ACQUIRE_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local limit = tonumber(ARGV[3])
+local exists = redis.call('ZSCORE', KEYS[1], ARGV[4])
+if limit >= 0 and not exists and redis.call('ZCARD', KEYS[1]) >= limit then
+    return {0, redis.call('ZCARD', KEYS[1])}
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+redis.call('PEXPIREAT', KEYS[1], ARGV[2])
+return {exists and 2 or 1, redis.call('ZCARD', KEYS[1])}
+"""
+
+# ARGV: now_ms, deadline_ms, order_id
+_PIN_LUA = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[3])
+if not score or tonumber(score) <= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+redis.call('PEXPIREAT', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class RedisHoldStore(_EphemeralHoldStore):
+    """Holds в Redis: zset на слот, проверка ёмкости и добавление — одним Lua-скриптом.
+
+    Ключ слота живёт до последнего дедлайна (PEXPIREAT), истёкшие участники
+    вычищаются при каждом захвате, поэтому фоновая уборка не нужна.
+    """
+
+    prefix = "slot_holds:"
+    expires_natively = True
+
+    def __init__(self, client=None, ttl: float = HOLD_TTL_SECONDS):
+        self.ttl = ttl
+        self._client = client
+        self._acquire_script = None
+        self._pin_script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from app.core.redis import get_redis
+            self._client = get_redis()
+        return self._client
+
+    def _key(self, slot_id: UUID) -> str:
+        return f"{self.prefix}{slot_id}"
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    async def _acquire(self, slot_id, order_id, limit):
+        if self._acquire_script is None:
+            self._acquire_script = self.client.register_script(_ACQUIRE_LUA)
+        now = self._now_ms()
+        status, holds = await self._acquire_script(
+            keys=[self._key(slot_id)],
+            args=[now, now + int(self.ttl * 1000), -1 if limit is None else limit, str(order_id)],
+        )
+        if not int(status):
+            return None
+        return int(status) == 1, int(holds)
+
+    async def _release(self, slot_id, order_id):
+        return bool(await self.client.zrem(self._key(slot_id), str(order_id)))
+
+    async def _pin(self, slot_id, order_id):
+        if self._pin_script is None:
+            self._pin_script = self.client.register_script(_PIN_LUA)
+        now = self._now_ms()
+        ok = await self._pin_script(keys=[self._key(slot_id)], args=[now, now + int(self.ttl * 1000), str(order_id)])
+        return bool(ok)
+
+    async def _counts(self, slot_ids):
+        if not slot_ids:
+            return {}
+        now = self._now_ms()
+        pipe = self.client.pipeline(transaction=False)
+        for slot_id in slot_ids:
+            pipe.zcount(self._key(slot_id), f"({now}", "+inf")
+        counts = await pipe.execute()
+        return dict(zip(slot_ids, (int(c) for c in counts)))
+
+
+_BACKENDS = {
+    "db": DatabaseHoldStore,
+    "memory": MemoryHoldStore,
+    "redis": RedisHoldStore,
+}
+
+
+@lru_cache()
+def get_hold_store() -> HoldStore:
+    try:
+        return _BACKENDS[settings.HOLD_BACKEND]()
+    except KeyError:
+        raise RuntimeError(f"Unknown HOLD_BACKEND: {settings.HOLD_BACKEND}")
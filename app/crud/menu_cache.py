@@ -0,0 +1,242 @@
+# app/crud/menu_cache.py
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import MAX_NOTIFY_BYTES, broker
+from app.crud.pricing import price_index
+from app.models.item_option import ItemOption
+from app.models.item_option_group import ItemOptionGroup
+from app.models.menu_item import MenuItem
+from app.models.shop import Shop
+
+MENU_TOPIC = "menu"
+# страховка от потерянных NOTIFY и записей в обход приложения (сиды, миграции)
+MENU_CACHE_TTL_SECONDS = 300
+MAX_MENUS = 5_000
+
+
+@dataclass
+class CachedMenu:
+    shop_id: UUID
+    version: int
+    tree: dict
+    nodes: Dict[str, dict]  # id позиции или опции -> её узел в tree, для точечных правок
+    body: bytes
+    etag: str
+    stale_at: float  # time.monotonic()
+
+
+def _num(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _sort_key(row) -> tuple:
+    return (row.sort_order is None, row.sort_order or 0)
+
+
+def encode_menu(tree: dict) -> bytes:
+    return json.dumps(tree, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def menu_etag(shop_id: UUID, version: int) -> str:
+    # версия хранится в shops.menu_version, поэтому ETag одинаков на всех воркерах
+    return f'"menu-{shop_id}-{version}"'
+
+
+class MenuCache:
+    """Дерево меню магазина (позиции -> группы опций -> опции), закодированное в JSON заранее.
+
+    Запись сохраняется до события menu.changed с большей версией (своего или
+    чужого воркера) или до MENU_CACHE_TTL_SECONDS. Последняя версия из событий
+    запоминается по магазину: меню, собранное до неё, в кэш не попадает, даже
+    если событие пришло, пока шла сборка.
+    """
+
+    def __init__(self, ttl: float = MENU_CACHE_TTL_SECONDS, max_menus: int = MAX_MENUS):
+        self.ttl = ttl
+        self.max_menus = max_menus
+        self._menus: Dict[UUID, CachedMenu] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = {}
+        self._seen: Dict[UUID, int] = {}  # shop_id -> последняя версия меню из событий
+
+    def peek(self, shop_id: UUID) -> Optional[CachedMenu]:
+        menu = self._menus.get(shop_id)
+        if menu is not None and menu.stale_at > time.monotonic():
+            return menu
+        return None
+
+    async def get(self, db: AsyncSession, shop_id: UUID) -> Optional[CachedMenu]:
+        """Меню магазина; None — магазин не найден."""
+        menu = self.peek(shop_id)
+        if menu is not None:
+            return menu
+        lock = self._locks.setdefault(shop_id, asyncio.Lock())
+        async with lock:
+            menu = self.peek(shop_id) or await self._build(db, shop_id)
+        self._locks.pop(shop_id, None)
+        return menu
+
+    async def _build(self, db: AsyncSession, shop_id: UUID) -> Optional[CachedMenu]:
+        version = (await db.execute(select(Shop.menu_version).where(Shop.id == shop_id))).scalar()
+        if version is None:
+            return None
+        items = (await db.execute(select(MenuItem).where(MenuItem.shop_id == shop_id))).scalars().all()
+        groups = (await db.execute(
+            select(ItemOptionGroup).join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+            .where(MenuItem.shop_id == shop_id)
+        )).scalars().all()
+        options = (await db.execute(
+            select(ItemOption).join(ItemOptionGroup, ItemOption.group_id == ItemOptionGroup.id)
+            .join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+            .where(MenuItem.shop_id == shop_id)
+        )).scalars().all()
+
+        nodes: Dict[str, dict] = {}
+        by_group: Dict[UUID, list] = {}
+        for o in sorted(options, key=_sort_key):
+            node = nodes[str(o.id)] = {
+                "id": str(o.id), "name": o.name, "price_delta": _num(o.price_delta),
+                "is_default": bool(o.is_default), "sort_order": o.sort_order,
+                "is_available": o.is_available is not False,
+            }
+            by_group.setdefault(o.group_id, []).append(node)
+        by_item: Dict[UUID, list] = {}
+        for g in sorted(groups, key=_sort_key):
+            by_item.setdefault(g.menu_item_id, []).append({
+                "id": str(g.id), "name": g.name, "min_select": g.min_select, "max_select": g.max_select,
+                "is_required": bool(g.is_required), "sort_order": g.sort_order,
+                "options": by_group.get(g.id, []),
+            })
+        tree = {
+            "shop_id": str(shop_id),
+            "version": version,
+            "items": [],
+        }
+        for i in sorted(items, key=_sort_key):
+            tree["items"].append(nodes.setdefault(str(i.id), {
+                "id": str(i.id), "name": i.item_name, "description": i.description,
+                "image_url": i.image_url, "base_price": _num(i.base_price),
+                "is_active": i.is_active is not False, "sort_order": i.sort_order,
+                "prep_seconds": i.prep_seconds, "option_groups": by_item.get(i.id, []),
+            }))
+        return self._store(shop_id, version, tree, nodes)
+
+    def _see(self, shop_id: UUID, version: Optional[int]) -> None:
+        if version is None or version <= self._seen.get(shop_id, -1):
+            return
+        self._seen.pop(shop_id, None)
+        self._seen[shop_id] = version
+        while len(self._seen) > self.max_menus:
+            self._seen.pop(next(iter(self._seen)))
+
+    def _store(self, shop_id: UUID, version: int, tree: dict, nodes: Dict[str, dict]) -> CachedMenu:
+        menu = CachedMenu(
+            shop_id=shop_id, version=version, tree=tree, nodes=nodes, body=encode_menu(tree),
+            etag=menu_etag(shop_id, version), stale_at=time.monotonic() + self.ttl,
+        )
+        if version < self._seen.get(shop_id, version):
+            # пока меню собиралось, пришло событие о более новой версии: отдаём, но не кэшируем
+            return menu
+        if shop_id not in self._menus and len(self._menus) >= self.max_menus:
+            self._menus.pop(next(iter(self._menus)))
+        self._menus[shop_id] = menu
+        return menu
+
+    def patch(self, shop_id: UUID, version: int, items: Dict[str, bool], options: Dict[str, bool]) -> None:
+        """Применяет смену доступности к закэшированному меню без перечитывания из БД.
+
+        Патч годится только для меню ровно предыдущей версии; если между ними
+        были другие изменения, меню сбрасывается и соберётся заново.
+        """
+        self._see(shop_id, version)
+        menu = self._menus.get(shop_id)
+        if menu is None or menu.version >= version:
+            return
+        if menu.version != version - 1:
+            del self._menus[shop_id]
+            return
+        for flags, field in ((items, "is_active"), (options, "is_available")):
+            for node_id, value in flags.items():
+                node = menu.nodes.get(node_id)
+                if node is not None:
+                    node[field] = value
+        menu.tree["version"] = menu.version = version
+        menu.body = encode_menu(menu.tree)
+        menu.etag = menu_etag(shop_id, version)
+
+    def invalidate(self, shop_id: Optional[UUID] = None, below_version: Optional[int] = None) -> None:
+        """Сбрасывает меню магазина (или все); с below_version — только если оно старше."""
+        if shop_id is None:
+            self._menus.clear()
+            return
+        self._see(shop_id, below_version)
+        menu = self._menus.get(shop_id)
+        if menu is not None and (below_version is None or menu.version < below_version):
+            del self._menus[shop_id]
+
+
+menu_cache = MenuCache()
+
+
+async def bump_menu_version(db: AsyncSession, shop_id: UUID) -> int:
+    """Увеличивает shops.menu_version в текущей транзакции; вызывать при любой записи в меню."""
+    res = await db.execute(
+        update(Shop).where(Shop.id == shop_id)
+        .values(menu_version=Shop.menu_version + 1)
+        .returning(Shop.menu_version)
+        .execution_options(synchronize_session=False)
+    )
+    return res.scalar() or 0
+
+
+def _drop_local(shop_id: UUID, version: Optional[int] = None) -> None:
+    menu_cache.invalidate(shop_id, below_version=version)
+    price_index.invalidate(shop_id)
+
+
+async def publish_menu_changed(shop_id: UUID, version: int) -> None:
+    """После commit: сбрасывает кэши меню и цен магазина на всех воркерах."""
+    await broker.publish(MENU_TOPIC, {"type": "menu.changed", "shop_id": str(shop_id), "version": version})
+
+
+async def publish_availability_changed(
+    shop_id: UUID, version: int, items: Dict[UUID, bool], options: Dict[UUID, bool],
+) -> None:
+    """После commit: точечная правка доступности в кэшах всех воркеров.
+
+    Если событие не помещается в один NOTIFY, вместо него уходит menu.changed.
+    """
+    event = {
+        "type": "menu.availability", "shop_id": str(shop_id), "version": version,
+        "items": {str(k): v for k, v in items.items()},
+        "options": {str(k): v for k, v in options.items()},
+    }
+    if len(json.dumps(event).encode()) > MAX_NOTIFY_BYTES:
+        await publish_menu_changed(shop_id, version)
+    else:
+        await broker.publish(MENU_TOPIC, event)
+
+
+def _on_event(topic: str, event: dict) -> None:
+    if topic != MENU_TOPIC:
+        return
+    if event.get("type") == "menu.changed":
+        _drop_local(UUID(event["shop_id"]), event.get("version"))
+    elif event.get("type") == "menu.availability":
+        shop_id = UUID(event["shop_id"])
+        menu_cache.patch(shop_id, event["version"], event["items"], event["options"])
+        price_index.patch(
+            shop_id,
+            items={UUID(k): v for k, v in event["items"].items()},
+            options={UUID(k): v for k, v in event["options"].items()},
+        )
+
+
+broker.add_hook(_on_event)
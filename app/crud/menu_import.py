@@ -0,0 +1,350 @@
+# app/crud/menu_import.py
+import csv
+import io
+import json
+import logging
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.jsonstream import iter_json_records, iter_text
+from app.crud.base import dialect_insert
+from app.crud.menu_cache import bump_menu_version
+from app.models.item_option import ItemOption
+from app.models.item_option_group import ItemOptionGroup
+from app.models.menu_item import MenuItem
+from app.schemas.menu_import import MenuImportItem, MenuImportResult, MenuImportRowError
+
+logger = logging.getLogger("crud.menu_import")
+
+# строк одной таблицы в одном INSERT ... ON CONFLICT
+MENU_IMPORT_BATCH = 500
+MAX_REPORTED_ERRORS = 100
+EXPORT_CHUNK = 200
+DEFAULT_ITEM_PREP_SECONDS = 120  # как server_default в menu_items
+
+# плоский CSV: строка на опцию, поля позиции и группы повторяются
+CSV_ITEM_COLUMNS = (
+    ("item_name", "name"), ("description", "description"), ("image_url", "image_url"),
+    ("base_price", "base_price"), ("is_active", "is_active"), ("sort_order", "sort_order"),
+    ("prep_seconds", "prep_seconds"),
+)
+CSV_GROUP_COLUMNS = (
+    ("group_name", "name"), ("min_select", "min_select"), ("max_select", "max_select"),
+    ("is_required", "is_required"), ("group_sort_order", "sort_order"),
+)
+CSV_OPTION_COLUMNS = (
+    ("option_name", "name"), ("price_delta", "price_delta"), ("is_default", "is_default"),
+    ("option_sort_order", "sort_order"), ("is_available", "is_available"),
+)
+CSV_COLUMNS = tuple(c for c, _ in CSV_ITEM_COLUMNS + CSV_GROUP_COLUMNS + CSV_OPTION_COLUMNS)
+
+
+# === Разбор ===
+
+def _complete_rows(buf: str) -> int:
+    """Длина префикса buf, который кончается переводом строки вне кавычек."""
+    end = buf.rfind("\n")
+    while end >= 0 and buf.count('"', 0, end) % 2:
+        end = buf.rfind("\n", 0, end)
+    return end + 1
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, dict]]:
+    """Строки CSV с заголовком как dict, по мере чтения."""
+    header, n, buf = None, 0, ""
+
+    def rows(text: str):
+        nonlocal header, n
+        for row in csv.reader(io.StringIO(text)):
+            if not row:
+                continue
+            if header is None:
+                header = [c.strip() for c in row]
+                unknown = set(header) - set(CSV_COLUMNS)
+                if unknown:
+                    raise ValueError(f"unknown CSV columns: {', '.join(sorted(unknown))}")
+                continue
+            n += 1
+            yield n, dict(zip(header, row))
+
+    async for text in iter_text(chunks):
+        buf += text
+        cut = _complete_rows(buf)
+        if cut:
+            for record in rows(buf[:cut]):
+                yield record
+            buf = buf[cut:]
+    if buf.strip():
+        for record in rows(buf):
+            yield record
+
+
+def _pick(row: dict, columns) -> dict:
+    return {field: row[col] for col, field in columns if row.get(col, "") != ""}
+
+
+def csv_item(row: dict) -> MenuImportItem:
+    item = _pick(row, CSV_ITEM_COLUMNS)
+    group = _pick(row, CSV_GROUP_COLUMNS)
+    option = _pick(row, CSV_OPTION_COLUMNS)
+    if option:
+        group["options"] = [option]
+    if group:
+        item["option_groups"] = [group]
+    return MenuImportItem.model_validate(item)
+
+
+# === Импорт ===
+
+class MenuImporter:
+    """Upsert меню магазина пачками: по одному многострочному INSERT ... ON CONFLICT (id) на таблицу.
+
+    Позиции, группы и опции сопоставляются с существующими по названию
+    (позиция — в магазине, группа — в позиции, опция — в группе), так что
+    повторный импорт того же файла обновляет строки, а не дублирует их.
+    Записи, которых нет в файле, не трогаются. Уникальности названий в БД
+    нет, поэтому запись, название которой совпадает с несколькими строками,
+    не импортируется: check() возвращает ошибку вместо выбора наугад.
+    """
+
+    def __init__(self, db: AsyncSession, shop_id: UUID, batch: int = MENU_IMPORT_BATCH):
+        self.db = db
+        self.shop_id = shop_id
+        self.batch = batch
+        self.item_ids: Dict[str, UUID] = {}
+        self.group_ids: Dict[Tuple[UUID, str], UUID] = {}
+        self.option_ids: Dict[Tuple[UUID, str], UUID] = {}
+        # названия, под которыми в магазине больше одной строки
+        self.duplicates: Dict[type, Set] = {MenuItem: set(), ItemOptionGroup: set(), ItemOption: set()}
+        self.pending: Dict[type, Dict[UUID, dict]] = {MenuItem: {}, ItemOptionGroup: {}, ItemOption: {}}
+        self.seen: Dict[type, Set[UUID]] = {MenuItem: set(), ItemOptionGroup: set(), ItemOption: set()}
+
+    def _index(self, model: type, rows, key) -> dict:
+        ids = {}
+        for row in rows:
+            k = key(row)
+            if k in ids:
+                self.duplicates[model].add(k)
+            ids[k] = row.id
+        return ids
+
+    async def load_keys(self) -> None:
+        res = await self.db.execute(select(MenuItem.id, MenuItem.item_name).where(MenuItem.shop_id == self.shop_id))
+        self.item_ids = self._index(MenuItem, res, lambda row: row.item_name)
+        res = await self.db.execute(
+            select(ItemOptionGroup.id, ItemOptionGroup.menu_item_id, ItemOptionGroup.name)
+            .join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+            .where(MenuItem.shop_id == self.shop_id)
+        )
+        self.group_ids = self._index(ItemOptionGroup, res, lambda row: (row.menu_item_id, row.name))
+        res = await self.db.execute(
+            select(ItemOption.id, ItemOption.group_id, ItemOption.name)
+            .join(ItemOptionGroup, ItemOption.group_id == ItemOptionGroup.id)
+            .join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+            .where(MenuItem.shop_id == self.shop_id)
+        )
+        self.option_ids = self._index(ItemOption, res, lambda row: (row.group_id, row.name))
+
+    def check(self, item: MenuImportItem) -> Optional[str]:
+        """Ошибка, если позиция, группа или опция записи совпадает по названию с несколькими строками."""
+        if not any(self.duplicates.values()):
+            return None
+        if item.name in self.duplicates[MenuItem]:
+            return f"name: {item.name!r} matches several menu items"
+        item_id = self.item_ids.get(item.name)
+        for group in item.option_groups:
+            if (item_id, group.name) in self.duplicates[ItemOptionGroup]:
+                return f"option_groups.name: {group.name!r} matches several groups of {item.name!r}"
+            group_id = self.group_ids.get((item_id, group.name))
+            for option in group.options:
+                if (group_id, option.name) in self.duplicates[ItemOption]:
+                    return f"options.name: {option.name!r} matches several options of {group.name!r}"
+        return None
+
+    def _put(self, model: type, row: dict) -> None:
+        self.pending[model][row["id"]] = row
+        self.seen[model].add(row["id"])
+
+    async def add(self, item: MenuImportItem) -> None:
+        item_id = self.item_ids.setdefault(item.name, uuid.uuid4())
+        self._put(MenuItem, {
+            "id": item_id, "shop_id": self.shop_id, "item_name": item.name,
+            "description": item.description, "image_url": item.image_url, "base_price": item.base_price,
+            "is_active": item.is_active, "sort_order": item.sort_order,
+            "prep_seconds": DEFAULT_ITEM_PREP_SECONDS if item.prep_seconds is None else item.prep_seconds,
+        })
+        for group in item.option_groups:
+            group_id = self.group_ids.setdefault((item_id, group.name), uuid.uuid4())
+            self._put(ItemOptionGroup, {
+                "id": group_id, "menu_item_id": item_id, "name": group.name,
+                "min_select": group.min_select, "max_select": group.max_select,
+                "is_required": group.is_required, "sort_order": group.sort_order,
+            })
+            for option in group.options:
+                option_id = self.option_ids.setdefault((group_id, option.name), uuid.uuid4())
+                self._put(ItemOption, {
+                    "id": option_id, "group_id": group_id, "name": option.name,
+                    "price_delta": float(option.price_delta), "is_default": option.is_default,
+                    "sort_order": option.sort_order, "is_available": option.is_available,
+                })
+        if any(len(rows) >= self.batch for rows in self.pending.values()):
+            await self.flush()
+
+    async def flush(self) -> None:
+        # порядок таблиц — по внешним ключам
+        for model in (MenuItem, ItemOptionGroup, ItemOption):
+            rows = list(self.pending[model].values())
+            self.pending[model].clear()
+            for i in range(0, len(rows), self.batch):
+                await self._upsert(model, rows[i:i + self.batch])
+
+    async def _upsert(self, model: type, rows: List[dict]) -> None:
+        # executemany вместо .values(rows): запрос не перекомпилируется на каждую пачку
+        stmt = dialect_insert(self.db, model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.id],
+            set_={c: stmt.excluded[c] for c in rows[0] if c != "id"},
+        )
+        await self.db.execute(stmt, rows)
+
+
+async def import_menu(db: AsyncSession, shop_id: UUID, chunks: AsyncIterator[bytes], fmt: str) -> MenuImportResult:
+    """Потоковый импорт меню из CSV или JSON; невалидные и неоднозначные записи пропускаются и попадают в errors.
+
+    Commit и publish_menu_changed — на вызывающем. ValueError — файл не разобрать.
+    """
+    if fmt == "csv":
+        records, parse = iter_csv_records(chunks), csv_item
+    elif fmt == "json":
+        records, parse = iter_json_records(chunks), MenuImportItem.model_validate
+    else:
+        raise ValueError(f"unsupported format: {fmt}")
+
+    importer = MenuImporter(db, shop_id)
+    await importer.load_keys()
+    errors: List[MenuImportRowError] = []
+    invalid = 0
+    async for n, raw in records:
+        try:
+            item = parse(raw)
+        except ValidationError as e:
+            err = e.errors()[0]
+            where = ".".join(str(p) for p in err["loc"])
+            error = f"{where}: {err['msg']}" if where else err["msg"]
+        else:
+            error = importer.check(item)
+            if error is None:
+                await importer.add(item)
+                continue
+        invalid += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(MenuImportRowError(row=n, error=error))
+    await importer.flush()
+
+    version = await bump_menu_version(db, shop_id)
+    logger.info(
+        f"menu import shop={shop_id}: {len(importer.seen[MenuItem])} items, "
+        f"{len(importer.seen[ItemOption])} options, {invalid} invalid"
+    )
+    return MenuImportResult(
+        shop_id=shop_id, version=version,
+        items=len(importer.seen[MenuItem]), groups=len(importer.seen[ItemOptionGroup]),
+        options=len(importer.seen[ItemOption]), invalid=invalid, errors=errors,
+    )
+
+
+# === Экспорт ===
+
+def _num(value):
+    return float(value) if value is not None else None
+
+
+def _item_tree(item: MenuItem, groups: List[ItemOptionGroup], options: Dict[UUID, List[ItemOption]]) -> dict:
+    return {
+        "name": item.item_name, "description": item.description, "image_url": item.image_url,
+        "base_price": _num(item.base_price), "is_active": item.is_active is not False,
+        "sort_order": item.sort_order, "prep_seconds": item.prep_seconds,
+        "option_groups": [
+            {
+                "name": g.name, "min_select": g.min_select, "max_select": g.max_select,
+                "is_required": bool(g.is_required), "sort_order": g.sort_order,
+                "options": [
+                    {
+                        "name": o.name, "price_delta": _num(o.price_delta), "is_default": bool(o.is_default),
+                        "sort_order": o.sort_order, "is_available": o.is_available is not False,
+                    }
+                    for o in options.get(g.id, [])
+                ],
+            }
+            for g in groups
+        ],
+    }
+
+
+def _csv_rows(tree: dict):
+    item = {col: tree[field] for col, field in CSV_ITEM_COLUMNS}
+    if not tree["option_groups"]:
+        yield item
+    for g in tree["option_groups"]:
+        group = {**item, **{col: g[field] for col, field in CSV_GROUP_COLUMNS}}
+        if not g["options"]:
+            yield group
+        for o in g["options"]:
+            yield {**group, **{col: o[field] for col, field in CSV_OPTION_COLUMNS}}
+
+
+async def export_menu(shop_id: UUID, fmt: str) -> AsyncIterator[str]:
+    """Меню магазина в формате импорта, пачками по EXPORT_CHUNK позиций.
+
+    Открывает свою сессию: генератор живёт дольше запроса, которому отдан.
+    """
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+    if fmt == "csv":
+        writer.writeheader()
+    else:
+        out.write("[")
+    first = True
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(
+            select(MenuItem).where(MenuItem.shop_id == shop_id)
+            .order_by(MenuItem.sort_order, MenuItem.item_name, MenuItem.id)
+            .execution_options(yield_per=EXPORT_CHUNK)
+        )
+        async for items in result.partitions():
+            ids = [i.id for i in items]
+            groups = (await db.execute(
+                select(ItemOptionGroup).where(ItemOptionGroup.menu_item_id.in_(ids))
+                .order_by(ItemOptionGroup.sort_order, ItemOptionGroup.name)
+            )).scalars().all()
+            options: Dict[UUID, List[ItemOption]] = {}
+            if groups:
+                res = await db.execute(
+                    select(ItemOption).where(ItemOption.group_id.in_([g.id for g in groups]))
+                    .order_by(ItemOption.sort_order, ItemOption.name)
+                )
+                for o in res.scalars():
+                    options.setdefault(o.group_id, []).append(o)
+            by_item: Dict[UUID, List[ItemOptionGroup]] = {}
+            for g in groups:
+                by_item.setdefault(g.menu_item_id, []).append(g)
+
+            for item in items:
+                tree = _item_tree(item, by_item.get(item.id, []), options)
+                if fmt == "csv":
+                    writer.writerows(_csv_rows(tree))
+                else:
+                    out.write(("\n" if first else ",\n") + json.dumps(tree, ensure_ascii=False))
+                first = False
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    if fmt != "csv":
+        out.write("\n]\n")
+    yield out.getvalue()
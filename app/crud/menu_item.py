@@ -1,40 +1,105 @@
-# app/crud/menu_item.py
-import logging
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from app.models.menu_item import MenuItem
-from app.schemas.menu_item import MenuItemCreate, MenuItemUpdate
-from app.crud.base import get_all, get_by_id, create_instance, update_instance, delete_instance
-
-logger = logging.getLogger("crud.menu_item")
-
-async def list_menu_items(db: AsyncSession, shop_id=None):
-    if shop_id:
-        q = await db.execute(select(MenuItem).where(MenuItem.shop_id == shop_id))
-        return q.scalars().all()
-    return await get_all(db, MenuItem)
-
-async def get_menu_item(db: AsyncSession, item_id):
-    return await get_by_id(db, MenuItem, item_id)
-
-async def create_menu_item(db: AsyncSession, item_in: MenuItemCreate):
-    try:
-        obj = MenuItem(**item_in.model_dump())
-        return await create_instance(db, obj)
-    except Exception:
-        logger.exception("create_menu_item failed")
-        raise
-
-async def update_menu_item(db: AsyncSession, item_obj, item_in: MenuItemUpdate):
-    try:
-        return await update_instance(db, item_obj, item_in.model_dump(exclude_none=True))
-    except Exception:
-        logger.exception("update_menu_item failed")
-        raise
-
-async def delete_menu_item(db: AsyncSession, item_obj):
-    try:
-        return await delete_instance(db, item_obj)
-    except Exception:
-        logger.exception("delete_menu_item failed")
-        raise
+# app/crud/menu_item.py
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, update
+from sqlalchemy.future import select
+from typing import Dict, List, Tuple
+from uuid import UUID
+from app.models.menu_item import MenuItem
+from app.models.item_option import ItemOption
+from app.models.item_option_group import ItemOptionGroup
+from app.schemas.menu_item import MenuItemCreate, MenuItemUpdate
+from app.crud.base import get_all, get_by_id
+from app.crud.menu_cache import bump_menu_version, publish_menu_changed
+
+logger = logging.getLogger("crud.menu_item")
+
+async def list_menu_items(db: AsyncSession, shop_id=None):
+    if shop_id:
+        q = await db.execute(select(MenuItem).where(MenuItem.shop_id == shop_id))
+        return q.scalars().all()
+    return await get_all(db, MenuItem)
+
+async def get_menu_item(db: AsyncSession, item_id):
+    return await get_by_id(db, MenuItem, item_id)
+
+def _item_data(item_in, **kwargs) -> dict:
+    # в схеме поле называется name, в модели — item_name
+    data = item_in.model_dump(**kwargs)
+    if "name" in data:
+        data["item_name"] = data.pop("name")
+    return data
+
+async def create_menu_item(db: AsyncSession, item_in: MenuItemCreate):
+    try:
+        obj = MenuItem(**_item_data(item_in, exclude_none=True))
+        db.add(obj)
+        await db.flush()
+        version = await bump_menu_version(db, obj.shop_id)
+        await db.commit()
+        await db.refresh(obj)
+        await publish_menu_changed(obj.shop_id, version)
+        return obj
+    except Exception:
+        logger.exception("create_menu_item failed")
+        raise
+
+async def update_menu_item(db: AsyncSession, item_obj, item_in: MenuItemUpdate):
+    try:
+        old_shop_id = item_obj.shop_id
+        for k, v in _item_data(item_in, exclude_none=True).items():
+            setattr(item_obj, k, v)
+        await db.flush()
+        versions = {shop_id: await bump_menu_version(db, shop_id) for shop_id in {old_shop_id, item_obj.shop_id}}
+        await db.commit()
+        await db.refresh(item_obj)
+        for shop_id, version in versions.items():
+            await publish_menu_changed(shop_id, version)
+        return item_obj
+    except Exception:
+        logger.exception("update_menu_item failed")
+        raise
+
+async def delete_menu_item(db: AsyncSession, item_obj):
+    try:
+        shop_id = item_obj.shop_id
+        await db.delete(item_obj)
+        version = await bump_menu_version(db, shop_id)
+        await db.commit()
+        await publish_menu_changed(shop_id, version)
+        return item_obj
+    except Exception:
+        logger.exception("delete_menu_item failed")
+        raise
+
+async def _toggle(db: AsyncSession, model, column, flags: Dict[UUID, bool], scope) -> List[UUID]:
+    # один UPDATE на таблицу: значение для каждой строки — через CASE по id
+    if not flags:
+        return []
+    res = await db.execute(
+        update(model)
+        .where(model.id.in_(list(flags)), scope)
+        .values({column: case(flags, value=model.id)})
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(res.scalars())
+
+async def set_availability(
+    db: AsyncSession, shop_id: UUID, items: Dict[UUID, bool], options: Dict[UUID, bool],
+) -> Tuple[int, Dict[UUID, bool], Dict[UUID, bool]]:
+    """Включает/выключает позиции (is_active) и опции (is_available) магазина.
+
+    Возвращает новую версию меню и фактически изменённые id; чужие и
+    несуществующие id пропускаются. Commit и publish_availability_changed —
+    на вызывающем.
+    """
+    item_ids = await _toggle(db, MenuItem, "is_active", items, MenuItem.shop_id == shop_id)
+    shop_groups = (
+        select(ItemOptionGroup.id)
+        .join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+        .where(MenuItem.shop_id == shop_id)
+    )
+    option_ids = await _toggle(db, ItemOption, "is_available", options, ItemOption.group_id.in_(shop_groups))
+    version = await bump_menu_version(db, shop_id)
+    return version, {i: items[i] for i in item_ids}, {i: options[i] for i in option_ids}
@@ -0,0 +1,236 @@
+# app/crud/menu_search.py
+import asyncio
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.crud.menu_cache import MENU_TOPIC
+from app.models.menu_item import MenuItem
+from app.models.shop import Shop
+
+SEARCH_LIMIT_MAX = 100
+# доля триграмм запроса, которые должны найтись в названии
+MIN_SCORE = 0.5
+# индекс в памяти перечитывается не реже, чем раз в SEARCH_INDEX_TTL_SECONDS
+SEARCH_INDEX_TTL_SECONDS = 60
+
+_NON_WORD = re.compile(r"[\W_]+")
+# набор на английской раскладке вместо русской: "hfa" -> "раф"
+_LAYOUT = str.maketrans(
+    "qwertyuiop[]asdfghjkl;'zxcvbnm,.`",
+    "йцукенгшщзхъфывапролджэячсмитьбюё",
+)
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё -> е, пунктуация -> пробел."""
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower().replace("ё", "е")).split())
+
+
+def query_variants(q: str) -> List[str]:
+    """Нормализованный запрос и, если он набран латиницей, он же на русской раскладке."""
+    norm = normalize(q)
+    variants = [norm] if norm else []
+    if norm and norm.isascii() and any(c.isalpha() for c in norm):
+        switched = normalize(q.lower().translate(_LAYOUT))
+        if switched and switched != norm:
+            variants.append(switched)
+    return variants
+
+
+def trigrams(norm: str) -> Set[str]:
+    """Триграммы слов как в pg_trgm: слово дополняется двумя пробелами слева и одним справа."""
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass
+class SearchHit:
+    menu_item_id: UUID
+    shop_id: UUID
+    shop_name: str
+    name: str
+    base_price: Optional[float]
+    score: float
+
+
+@dataclass
+class _Doc:
+    menu_item_id: UUID
+    shop_id: UUID
+    shop_name: str
+    name: str
+    norm: str
+    base_price: Optional[float]
+    is_active: bool
+
+
+class MenuSearchIndex:
+    """Триграммный индекс названий позиций в памяти — для SQLite и тестов, где нет pg_trgm.
+
+    Собирается одним SELECT; смена доступности правится на месте, прочие
+    записи в меню помечают индекс устаревшим.
+    """
+
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._docs: List[_Doc] = []
+        self._by_id: Dict[UUID, _Doc] = {}
+        # сети повторяют одно меню во всех точках, поэтому индексируются уникальные названия
+        self._names: List[str] = []
+        self._name_docs: List[List[_Doc]] = []
+        self._postings: Dict[str, List[int]] = {}
+        self.stale_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def ensure(self, db: AsyncSession) -> None:
+        if self.stale_at > time.monotonic():
+            return
+        async with self._lock:
+            if self.stale_at <= time.monotonic():
+                await self._build(db)
+
+    async def _build(self, db: AsyncSession) -> None:
+        res = await db.execute(
+            select(MenuItem.id, MenuItem.shop_id, MenuItem.item_name, MenuItem.base_price, MenuItem.is_active, Shop.shop_name)
+            .join(Shop, Shop.id == MenuItem.shop_id)
+            .where(Shop.is_active.isnot(False))
+        )
+        docs, names, name_docs, postings = [], {}, [], {}
+        for row in res:
+            doc = _Doc(
+                menu_item_id=row.id, shop_id=row.shop_id, shop_name=row.shop_name, name=row.item_name,
+                norm=normalize(row.item_name), base_price=float(row.base_price) if row.base_price is not None else None,
+                is_active=row.is_active is not False,
+            )
+            docs.append(doc)
+            i = names.get(doc.norm)
+            if i is None:
+                i = names[doc.norm] = len(name_docs)
+                name_docs.append([])
+                for gram in trigrams(doc.norm):
+                    postings.setdefault(gram, []).append(i)
+            name_docs[i].append(doc)
+        self._docs, self._names, self._name_docs, self._postings = docs, list(names), name_docs, postings
+        self._by_id = {d.menu_item_id: d for d in docs}
+        self.stale_at = time.monotonic() + self.ttl
+
+    def search(self, norm: str, shop_ids: Optional[Set[UUID]], limit: int) -> List[SearchHit]:
+        grams = trigrams(norm)
+        if not grams:
+            return []
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._postings.get(gram, ()))
+        need = len(grams) * MIN_SCORE
+        matches = sorted(
+            (-matched, self._names[i], i) for i, matched in counts.items()
+            if matched >= need or norm in self._names[i]
+        )
+        hits = []
+        for neg_matched, _, i in matches:
+            score = round(-neg_matched / len(grams), 3)
+            for doc in self._name_docs[i]:
+                if not doc.is_active or (shop_ids is not None and doc.shop_id not in shop_ids):
+                    continue
+                hits.append(SearchHit(
+                    menu_item_id=doc.menu_item_id, shop_id=doc.shop_id, shop_name=doc.shop_name,
+                    name=doc.name, base_price=doc.base_price, score=score,
+                ))
+                if len(hits) >= limit:
+                    return hits
+        return hits
+
+    def patch(self, items: Dict[str, bool]) -> None:
+        for item_id, active in items.items():
+            doc = self._by_id.get(UUID(item_id))
+            if doc is not None:
+                doc.is_active = active
+
+    def invalidate(self) -> None:
+        self.stale_at = 0.0
+
+
+search_index = MenuSearchIndex()
+
+
+def _on_event(topic: str, event: dict) -> None:
+    if topic != MENU_TOPIC:
+        return
+    if event.get("type") == "menu.availability":
+        search_index.patch(event["items"])
+    else:
+        search_index.invalidate()
+
+
+broker.add_hook(_on_event)
+
+
+async def _search_pg(db: AsyncSession, norm: str, shop_ids: Optional[Set[UUID]], limit: int) -> List[SearchHit]:
+    # выражение совпадает с GIN-индексом ix_menu_items_item_name_trgm
+    name = func.replace(func.lower(MenuItem.item_name), "ё", "е")
+    score = func.word_similarity(norm, name)
+    stmt = (
+        select(MenuItem.id, MenuItem.shop_id, MenuItem.item_name, MenuItem.base_price, Shop.shop_name, score.label("score"))
+        .join(Shop, Shop.id == MenuItem.shop_id)
+        .where(
+            Shop.is_active.isnot(False),
+            MenuItem.is_active.isnot(False),
+            or_(literal(norm).op("<%", is_comparison=True)(name), name.like(f"%{norm}%")),
+        )
+        .order_by(score.desc(), MenuItem.item_name)
+        .limit(limit)
+    )
+    if shop_ids is not None:
+        stmt = stmt.where(MenuItem.shop_id.in_(shop_ids))
+    res = await db.execute(stmt)
+    return [
+        SearchHit(
+            menu_item_id=row.id, shop_id=row.shop_id, shop_name=row.shop_name, name=row.item_name,
+            base_price=float(row.base_price) if row.base_price is not None else None, score=round(row.score, 3),
+        )
+        for row in res
+    ]
+
+
+async def search_menu(
+    db: AsyncSession, q: str, shop_ids: Optional[Iterable[UUID]] = None, limit: int = 50,
+) -> List[SearchHit]:
+    """Активные позиции активных магазинов, похожие на q, по убыванию похожести."""
+    shops = set(shop_ids) if shop_ids is not None else None
+    hits: Dict[UUID, SearchHit] = {}
+    for norm in query_variants(q):
+        if db.bind.dialect.name == "postgresql":
+            found = await _search_pg(db, norm, shops, limit)
+        else:
+            await search_index.ensure(db)
+            found = search_index.search(norm, shops, limit)
+        for hit in found:
+            if hit.menu_item_id not in hits or hits[hit.menu_item_id].score < hit.score:
+                hits[hit.menu_item_id] = hit
+        if hits:
+            break  # раскладку пробуем, только если по исходному запросу пусто
+    return sorted(hits.values(), key=lambda h: (-h.score, h.name))[:limit]
+
+
+def group_by_shop(hits: List[SearchHit]) -> List[dict]:
+    """Результаты по магазинам; магазины — по лучшему совпадению."""
+    shops: Dict[UUID, dict] = {}
+    for hit in hits:
+        shop = shops.setdefault(hit.shop_id, {
+            "shop_id": hit.shop_id, "shop_name": hit.shop_name, "score": hit.score, "items": [],
+        })
+        shop["items"].append({
+            "id": hit.menu_item_id, "name": hit.name, "base_price": hit.base_price, "score": hit.score,
+        })
+    return sorted(shops.values(), key=lambda s: -s["score"])
@@ -1,155 +1,412 @@
-# app/crud/order.py
-import logging
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.order import Order
-from app.models.order_item import OrderItem
-from app.models.payment import Payment
-from app.models.item_option import ItemOption
-from app.schemas.order import OrderCreate, OrderUpdate
-from app.schemas.order_item import OrderItemCreate
-from app.schemas.payment import PaymentCreate
-from app.crud.base import get_all, get_by_id, create_instance, update_instance, delete_instance
-from app.models import (
-    Order, OrderItem, OrderItemOption,
-    Payment, TimeSlot, MenuItem, ItemOptionGroup, ItemOption
-)
-from app.schemas import (
-    OrderCreate, OrderItemCreate, OrderItemOptionCreate,
-    PaymentCreate, TimeSlotCreate, MenuItemCreate,
-    ItemOptionGroupCreate, ItemOptionCreate
-)
-from app.crud.base import CRUDBase
-
-
-logger = logging.getLogger("crud.order")
-
-async def list_orders(db: AsyncSession, shop_id=None):
-    if shop_id:
-        q = await db.execute(select(Order).where(Order.shop_id == shop_id))
-        return q.scalars().all()
-    return await get_all(db, Order)
-
-async def get_order(db: AsyncSession, order_id):
-    # load order and relationships if needed (refresh)
-    return await get_by_id(db, Order, order_id)
-
-async def create_order(db: AsyncSession, order_in: OrderCreate):
-
-    try:
-        # create main order
-        order_data = order_in.model_dump(exclude={"order_items", "payments"})
-        order = Order(**order_data)
-        db.add(order)
-        await db.flush()  # assign PK to order
-
-        # create items
-        for item in order_in.order_items:
-            # create main OrderItem
-            item_data = item.model_dump()
-            order_item = OrderItem(
-                order_id=order.id,
-                menu_item_id=item_data["menu_item_id"],
-                name_snapshot=item_data["name_snapshot"],
-                unit_price=item_data["unit_price"],
-                qty=item_data["qty"],
-                line_total=item_data["line_total"],
-            )
-            db.add(order_item)
-            await db.flush()
-            # handle passed option ids: create order_item_options rows
-            option_ids = item_data.get("options") or []
-            # If your model OrderItemOption exists and named OrderItemOption, import and create similarly
-            if option_ids:
-                from app.models.order_item_option import OrderItemOption
-                for opt_id in option_ids:
-                    oio = OrderItemOption(
-                        order_item_id=order_item.id,
-                        option_id=opt_id,
-                        name_snapshot=None,
-                        price_delta=None,
-                    )
-                    db.add(oio)
-
-        # create payments
-        for p in order_in.payments:
-            pdata = p.model_dump()
-            pay = Payment(
-                order_id=order.id,
-                method=pdata["method"],
-                status=pdata.get("status"),
-                amount=pdata["amount"],
-                provider_id=pdata.get("provider_id"),
-                extra=pdata.get("extra"),
-            )
-            db.add(pay)
-
-        await db.commit()
-        await db.refresh(order)
-        return order
-    except Exception:
-        logger.exception("create_order failed")
-        await db.rollback()
-        raise
-
-async def update_order(db: AsyncSession, order_obj, order_in: OrderUpdate):
-    try:
-        return await update_instance(db, order_obj, order_in.model_dump(exclude_none=True))
-    except Exception:
-        logger.exception("update_order failed")
-        raise
-
-async def delete_order(db: AsyncSession, order_obj):
-    try:
-        return await delete_instance(db, order_obj)
-    except Exception:
-        logger.exception("delete_order failed")
-        raise
-
-class CRUDMenuItem(CRUDBase[MenuItem, MenuItemCreate, MenuItemCreate]):
-    async def create(self, db: AsyncSession, obj_in: MenuItemCreate) -> MenuItem:
-        db_item = MenuItem(
-            shop_id=obj_in.shop_id,
-            name=obj_in.name,
-            description=obj_in.description,
-            image_url=obj_in.image_url,
-            base_price=obj_in.base_price,
-            is_active=obj_in.is_active,
-            sort_order=obj_in.sort_order,
-        )
-        db.add(db_item)
-        await db.flush()
-
-        # Каскад: option groups → options
-        for group_in in obj_in.option_groups or []:
-            db_group = ItemOptionGroup(
-                menu_item_id=db_item.id,
-                name=group_in.name,
-                min_select=group_in.min_select,
-                max_select=group_in.max_select,
-                is_required=group_in.is_required,
-                sort_order=group_in.sort_order,
-            )
-            db.add(db_group)
-            await db.flush()
-
-            for opt_in in group_in.options or []:
-                db_opt = ItemOption(
-                    group_id=db_group.id,
-                    name=opt_in.name,
-                    price_delta=opt_in.price_delta,
-                    is_default=opt_in.is_default,
-                    sort_order=opt_in.sort_order,
-                    is_available=opt_in.is_available,
-                )
-                db.add(db_opt)
-
-        await db.flush()
-        return db_item
-
-
-class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotCreate]):
-    pass
-
-menu_item = CRUDMenuItem(MenuItem)
+# app/crud/order.py
+import base64
+import logging
+import uuid
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, tuple_, update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.payment import Payment
+from app.models.item_option import ItemOption
+from app.schemas.order import OrderCreate, OrderUpdate
+from app.schemas.order_item import OrderItemCreate
+from app.schemas.payment import PaymentCreate
+from app.crud.base import get_all, get_by_id, create_instance, update_instance, delete_instance
+from app.models import (
+    Order, OrderItem, OrderItemOption,
+    Payment, TimeSlot, MenuItem, ItemOptionGroup, ItemOption
+)
+from app.schemas import (
+    OrderCreate, OrderItemCreate, OrderItemOptionCreate,
+    PaymentCreate, TimeSlotCreate, MenuItemCreate,
+    ItemOptionGroupCreate, ItemOptionCreate
+)
+from app.crud.base import CRUDBase
+from app.crud.slot import confirm_slot, release_slot
+from app.crud.pricing import ZERO, PricedOrder, PricingError, money, price_order
+from app.crud.prep_scheduler import prep_scheduler
+from app.crud.menu_cache import bump_menu_version, publish_menu_changed
+from app.crud.order_events import (
+    ACTIVE_STATUSES, ALLOWED_FROM, STATUS_TIMESTAMPS, InvalidTransition, can_transition, publish_order_event,
+    transition,
+)
+
+
+logger = logging.getLogger("crud.order")
+
+ORDER_PAGE_MAX = 200
+
+
+def encode_cursor(order: Order) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Разбирает курсор из encode_cursor; ValueError на мусор."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(order_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def _with_children(stmt):
+    # фиксированное число запросов на страницу: позиции, их опции, платежи
+    return stmt.options(
+        selectinload(Order.items).selectinload(OrderItem.options),
+        selectinload(Order.payments),
+    )
+
+
+def orders_query(
+    shop_id=None,
+    status: Optional[List[str]] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+):
+    """SELECT заказов по фильтрам, новые первыми — по индексам ix_orders_*_created_at_id."""
+    stmt = select(Order)
+    if shop_id:
+        stmt = stmt.where(Order.shop_id == shop_id)
+    if status:
+        stmt = stmt.where(Order.status.in_(status))
+    if created_from:
+        stmt = stmt.where(Order.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Order.created_at < created_to)
+    if cursor:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < decode_cursor(cursor))
+    return _with_children(stmt.order_by(Order.created_at.desc(), Order.id.desc()))
+
+
+async def list_orders(
+    db: AsyncSession,
+    shop_id=None,
+    status: Optional[List[str]] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Order], Optional[str]]:
+    """Страница заказов, новые первыми, с keyset-пагинацией по (created_at, id).
+
+    Возвращает (заказы, курсор следующей страницы или None).
+    """
+    limit = max(1, min(limit, ORDER_PAGE_MAX))
+    stmt = orders_query(shop_id, status, created_from, created_to, cursor).limit(limit + 1)
+    orders = (await db.execute(stmt)).scalars().all()
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+async def list_active_orders(db: AsyncSession, shop_id) -> List[Order]:
+    """Заказы магазина, которые ещё не выданы и не отменены, в порядке поступления."""
+    q = await db.execute(
+        select(Order)
+        .where(Order.shop_id == shop_id, Order.status.in_(ACTIVE_STATUSES))
+        .order_by(Order.created_at.asc(), Order.id.asc())
+    )
+    return q.scalars().all()
+
+async def get_order(db: AsyncSession, order_id):
+    q = await db.execute(_with_children(select(Order).where(Order.id == order_id)))
+    return q.scalar_one_or_none()
+
+
+def build_order_rows(order_in: OrderCreate, priced: PricedOrder) -> Tuple[dict, List[dict], List[dict], List[dict]]:
+    """Строки для orders / order_items / order_item_options / payments с UUID, выданными на клиенте.
+
+    Цены и снимки названий берутся из priced, а не из запроса. PricingError,
+    если сумма платежей не совпадает с ценой заказа.
+    """
+    order_id = uuid.uuid4()
+    order_row = order_in.model_dump(exclude={"order_items", "payments", "note"})
+    order_row.update(
+        id=order_id,
+        status="new",
+        note_text=order_in.note,
+        created_at=datetime.now(timezone.utc),
+        subtotal=priced.subtotal,
+        discount=priced.discount,
+        # orders.total_amount — целое число рублей
+        total_amount=int(priced.total_amount.to_integral_value(ROUND_HALF_UP)),
+    )
+
+    item_rows, option_rows = [], []
+    for line in priced.lines:
+        item_id = uuid.uuid4()
+        item_rows.append({
+            "id": item_id,
+            "order_id": order_id,
+            "menu_item_id": line.menu_item_id,
+            "name_snapshot": line.name_snapshot,
+            "unit_price": line.unit_price,
+            "qty": line.qty,
+            "line_total": line.line_total,
+        })
+        option_rows.extend(
+            {
+                "id": uuid.uuid4(),
+                "order_item_id": item_id,
+                "option_id": opt.option_id,
+                "name_snapshot": opt.name,
+                "price_delta": opt.price_delta,
+            }
+            for opt in line.options
+        )
+
+    # сумма и статус платежей тоже не от клиента: оплата должна покрывать цену по меню,
+    # а "paid" ставит только webhook платёжной системы
+    paid_total = sum((money(p.amount) for p in order_in.payments), ZERO)
+    if order_in.payments and paid_total != priced.total_amount:
+        raise PricingError(f"payments total {paid_total} does not match order total {priced.total_amount}")
+    payment_rows = []
+    for p in order_in.payments:
+        pdata = p.model_dump()
+        payment_rows.append({
+            "id": uuid.uuid4(),
+            "order_id": order_id,
+            "user_id": order_in.user_id,
+            "method": pdata["method"],
+            "status": "pending",
+            "amount": pdata["amount"],
+            "provider_id": pdata.get("provider_id"),
+            "extra": pdata.get("extra"),
+        })
+    return order_row, item_rows, option_rows, payment_rows
+
+
+async def _bulk_insert(db: AsyncSession, model, rows: List[dict]) -> list:
+    # один многострочный INSERT ... RETURNING на таблицу; объекты попадают в сессию
+    if not rows:
+        return []
+    res = await db.scalars(insert(model).returning(model, sort_by_parameter_order=True), rows)
+    return res.all()
+
+
+async def create_order(db: AsyncSession, order_in: OrderCreate):
+    """Создаёт заказ с позициями, опциями и платежами.
+
+    Цены считает price_order по индексу меню. PK генерируются на клиенте,
+    поэтому flush после каждой строки не нужен: на каждую таблицу уходит один
+    батч INSERT, всё в одной транзакции.
+    """
+    try:
+        priced = await price_order(db, order_in)
+        order_row, item_rows, option_rows, payment_rows = build_order_rows(order_in, priced)
+        order_row["preparation_due_at"] = await prep_scheduler.add(
+            db, order_in.shop_id, order_row["id"],
+            work_seconds=sum(line.prep_seconds * line.qty for line in priced.lines),
+            created_at=order_row["created_at"],
+        )
+
+        order = (await _bulk_insert(db, Order, [order_row]))[0]
+        items = await _bulk_insert(db, OrderItem, item_rows)
+        options = await _bulk_insert(db, OrderItemOption, option_rows)
+        payments = await _bulk_insert(db, Payment, payment_rows)
+
+        # связи собираем в памяти, чтобы ответ не делал ленивых загрузок
+        by_item = {item.id: [] for item in items}
+        for opt in options:
+            by_item[opt.order_item_id].append(opt)
+        for item in items:
+            set_committed_value(item, "options", by_item[item.id])
+        set_committed_value(order, "items", items)
+        set_committed_value(order, "payments", payments)
+
+        await db.commit()
+        await publish_order_event(order, "order.created")
+        return order
+    except Exception:
+        logger.exception("create_order failed")
+        await db.rollback()
+        # в очереди мог остаться заказ, которого нет в БД
+        prep_scheduler.invalidate(order_in.shop_id)
+        raise
+
+async def set_order_status(db: AsyncSession, order_id, status: str) -> Optional[Order]:
+    """Статус из внешней системы (webhook). Без commit; событие публикует вызывающий.
+
+    None — заказа нет или переход недопустим (опоздавшее или повторное событие).
+    """
+    order = await get_by_id(db, Order, order_id)
+    if order is None:
+        return None
+    if not can_transition(order.status, status):
+        logger.warning(f"set_order_status: order {order_id} cannot move from {order.status!r} to {status!r}, skipped")
+        return None
+    if status == "cancelled":
+        await release_slot(db, order)
+    elif status == "paid":
+        # как в mark_order_paid: hold становится подтверждённым местом до paid_at
+        await confirm_slot(db, order)
+    await prep_scheduler.on_status(db, order.shop_id, [(order.id, status)])
+    transition(order, status)
+    return order
+
+_EVENT_COLUMNS = (
+    Order.id, Order.shop_id, Order.status, Order.version, Order.slot_id,
+    Order.total_amount, Order.preparation_due_at, Order.created_at,
+)
+
+
+async def apply_transitions(db: AsyncSession, shop_id, transitions: List[Tuple[uuid.UUID, str]]):
+    """Переводит заказы магазина в новые статусы: один UPDATE ... RETURNING на целевой статус.
+
+    Пакетный вариант order_events.transition: переход применяется, только если
+    текущий статус входит в ALLOWED_FROM целевого;
+    заодно ставится отметка времени и растёт version. Без commit.
+    Возвращает (применённые строки, [(order_id, причина)]).
+    """
+    by_status: Dict[str, List[uuid.UUID]] = {}
+    for order_id, to_status in transitions:
+        by_status.setdefault(to_status, []).append(order_id)
+
+    now = datetime.now(timezone.utc)
+    applied, rejected = [], []
+    for to_status, ids in by_status.items():
+        if to_status not in ALLOWED_FROM:
+            rejected.extend((order_id, f"unknown status {to_status!r}") for order_id in ids)
+            continue
+        if to_status == "paid":
+            # до UPDATE, пока paid_at пуст: hold становится подтверждённым местом,
+            # а заказ с истёкшим hold теряет слот (см. confirm_slot)
+            due = await db.execute(
+                select(Order)
+                .where(Order.shop_id == shop_id, Order.id.in_(ids), Order.status.in_(ALLOWED_FROM[to_status]))
+                .with_for_update()
+            )
+            for order in due.scalars():
+                await confirm_slot(db, order)
+            await db.flush()
+        values = {"status": to_status, "version": Order.version + 1}
+        if to_status in STATUS_TIMESTAMPS:
+            values[STATUS_TIMESTAMPS[to_status]] = now
+        res = await db.execute(
+            update(Order)
+            .where(Order.shop_id == shop_id, Order.id.in_(ids), Order.status.in_(ALLOWED_FROM[to_status]))
+            .values(**values)
+            .returning(*_EVENT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        rows = res.all()
+        applied.extend(rows)
+        await prep_scheduler.on_status(db, shop_id, [(r.id, to_status) for r in rows])
+        if to_status == "cancelled" and rows:
+            # отменённые заказы освобождают места в слотах
+            cancelled = await db.execute(select(Order).where(Order.id.in_([r.id for r in rows])))
+            for order in cancelled.scalars():
+                await release_slot(db, order)
+
+        done = {r.id for r in rows}
+        missed = [order_id for order_id in ids if order_id not in done]
+        if missed:
+            # причины отказа нужны только для непрошедших, отдельным запросом
+            current = dict((await db.execute(
+                select(Order.id, Order.status).where(Order.shop_id == shop_id, Order.id.in_(missed))
+            )).all())
+            for order_id in missed:
+                if order_id not in current:
+                    rejected.append((order_id, "order not found"))
+                else:
+                    rejected.append((order_id, f"cannot move from {current[order_id]!r} to {to_status!r}"))
+    return applied, rejected
+
+async def update_order(db: AsyncSession, order_obj, order_in: OrderUpdate):
+    try:
+        data = order_in.model_dump(exclude_none=True)
+        status_before = order_obj.status
+        status = data.pop("status", None)
+        # "new" в OrderUpdate — значение по умолчанию: статус меняется, только если его прислали явно
+        to_status = status if "status" in order_in.model_fields_set else None
+        if to_status is not None and to_status != status_before:
+            if not can_transition(status_before, to_status):
+                raise InvalidTransition(f"cannot move from {status_before!r} to {to_status!r}")
+            if to_status == "cancelled":
+                # отменённый заказ освобождает место в слоте
+                await release_slot(db, order_obj)
+                data.pop("slot_id", None)
+            elif to_status == "paid":
+                await confirm_slot(db, order_obj)
+                data.pop("slot_id", None)
+            await prep_scheduler.on_status(db, order_obj.shop_id, [(order_obj.id, to_status)])
+            transition(order_obj, to_status)
+        order = await update_instance(db, order_obj, data)
+        if order.status != status_before:
+            await publish_order_event(order, "order.status")
+        return order
+    except Exception:
+        logger.exception("update_order failed")
+        raise
+
+async def delete_order(db: AsyncSession, order_obj):
+    try:
+        await release_slot(db, order_obj)
+        order = await delete_instance(db, order_obj)
+        await publish_order_event(order, "order.deleted")
+        return order
+    except Exception:
+        logger.exception("delete_order failed")
+        raise
+
+class CRUDMenuItem(CRUDBase[MenuItem, MenuItemCreate, MenuItemCreate]):
+    async def create(self, db: AsyncSession, obj_in: MenuItemCreate) -> MenuItem:
+        db_item = MenuItem(
+            shop_id=obj_in.shop_id,
+            item_name=obj_in.name,
+            description=obj_in.description,
+            image_url=obj_in.image_url,
+            base_price=obj_in.base_price,
+            is_active=obj_in.is_active,
+            sort_order=obj_in.sort_order,
+            prep_seconds=obj_in.prep_seconds,
+        )
+        db.add(db_item)
+        await db.flush()
+
+        # Каскад: option groups → options (в MenuItemCreate групп может и не быть)
+        for group_in in getattr(obj_in, "option_groups", None) or []:
+            db_group = ItemOptionGroup(
+                menu_item_id=db_item.id,
+                name=group_in.name,
+                min_select=group_in.min_select,
+                max_select=group_in.max_select,
+                is_required=group_in.is_required,
+                sort_order=group_in.sort_order,
+            )
+            db.add(db_group)
+            await db.flush()
+
+            for opt_in in group_in.options or []:
+                db_opt = ItemOption(
+                    group_id=db_group.id,
+                    name=opt_in.name,
+                    price_delta=opt_in.price_delta,
+                    is_default=opt_in.is_default,
+                    sort_order=opt_in.sort_order,
+                    is_available=opt_in.is_available,
+                )
+                db.add(db_opt)
+
+        await db.flush()
+        # как crud.menu_item: кэши меню и цен сбрасываются на всех воркерах событием после commit
+        version = await bump_menu_version(db, db_item.shop_id)
+        await db.commit()
+        await db.refresh(db_item)
+        await publish_menu_changed(db_item.shop_id, version)
+        return db_item
+
+
+class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotCreate]):
+    pass
+
+menu_item = CRUDMenuItem(MenuItem)
 time_slot = CRUDTimeSlot(TimeSlot)
\ No newline at end of file
@@ -0,0 +1,176 @@
+# app/crud/order_events.py
+# События заказов для подписчиков (очередь магазина, ожидание статуса); публикуются после commit
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.models.order import Order
+
+# заказы, которые ещё видны на кухне
+ACTIVE_STATUSES = ("new", "paid", "accepted", "preparing", "ready")
+
+# Допустимые переходы статуса: целевой статус -> из каких статусов в него можно попасть
+ALLOWED_FROM: Dict[str, Tuple[str, ...]] = {
+    "paid": ("new",),
+    "accepted": ("new", "paid"),
+    "preparing": ("accepted",),
+    "ready": ("preparing",),
+    "completed": ("ready",),
+    "cancelled": ("new", "paid", "accepted"),
+}
+# отметка времени, которую ставит переход в статус
+STATUS_TIMESTAMPS = {
+    "paid": "paid_at",
+    "accepted": "accepted_at",
+    "preparing": "started_at",
+    "ready": "ready_at",
+    "completed": "completed_at",
+}
+
+# Сколько помним последний статус заказа без событий: страховка от потерянных NOTIFY
+STATUS_CACHE_TTL_SECONDS = 60
+STATUS_CACHE_SIZE = 50_000
+
+
+def shop_topic(shop_id) -> str:
+    return f"shop:{shop_id}"
+
+
+class InvalidTransition(ValueError):
+    """Переход статуса заказа не разрешён ALLOWED_FROM."""
+
+
+def set_status(order: Order, status: str) -> None:
+    """Меняет статус заказа и версию, по которой клиенты ждут изменений (без проверок)."""
+    if order.status != status:
+        order.status = status
+        order.version = (order.version or 0) + 1
+
+
+def can_transition(current: Optional[str], target: str) -> bool:
+    return current in ALLOWED_FROM.get(target, ())
+
+
+def transition(order: Order, status: str, now: Optional[datetime] = None) -> bool:
+    """Смена статуса одного заказа: проверка ALLOWED_FROM, отметка времени, version.
+
+    Все записи статуса идут через неё (пачки — через apply_transitions с той же
+    таблицей). False — переход недопустим, заказ не меняется.
+    """
+    if not can_transition(order.status, status):
+        return False
+    set_status(order, status)
+    column = STATUS_TIMESTAMPS.get(status)
+    if column is not None:
+        setattr(order, column, now or datetime.now(timezone.utc))
+    return True
+
+
+def order_event(order: Order, kind: str) -> dict:
+    return {
+        "type": kind,
+        "order_id": str(order.id),
+        "shop_id": str(order.shop_id),
+        "status": order.status,
+        "version": order.version or 0,
+        "slot_id": str(order.slot_id) if order.slot_id else None,
+        "total_amount": order.total_amount,
+        "preparation_due_at": order.preparation_due_at.isoformat() if order.preparation_due_at else None,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+    }
+
+
+async def publish_order_event(order: Optional[Order], kind: str) -> None:
+    if order is None:
+        return
+    await broker.publish(shop_topic(order.shop_id), order_event(order, kind))
+
+
+async def publish_order_events(shop_id, orders: Iterable, kind: str) -> None:
+    """Пачка событий одного магазина; orders — Order или строки с теми же полями."""
+    await broker.publish_many(shop_topic(shop_id), [order_event(o, kind) for o in orders])
+
+
+class OrderWaiters:
+    """Реестр клиентов, ждущих смены версии заказа (long-poll).
+
+    Последние известные (version, status) заказов лежат в LRU и обновляются
+    событиями брокера — своими и других воркеров, — поэтому повторный запрос
+    ожидания обычно не ходит в БД. Ожидающий запрос — это Future в памяти,
+    без соединения с БД.
+    """
+
+    def __init__(self, ttl: float = STATUS_CACHE_TTL_SECONDS, size: int = STATUS_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._latest: "OrderedDict[str, tuple]" = OrderedDict()  # order_id -> (state, stale_at)
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+
+    def _remember(self, order_id: str, state: dict) -> None:
+        known = self._latest.get(order_id)
+        if known is not None and known[0]["version"] > state["version"]:
+            return  # событие пришло позже более нового
+        self._latest[order_id] = (state, time.monotonic() + self.ttl)
+        self._latest.move_to_end(order_id)
+        while len(self._latest) > self.size:
+            self._latest.popitem(last=False)
+
+    def on_event(self, topic: str, event: dict) -> None:
+        order_id = event.get("order_id")
+        if order_id is None or "version" not in event:
+            return
+        state = {"order_id": order_id, "status": event["status"], "version": event["version"]}
+        self._remember(order_id, state)
+        for fut in self._waiters.pop(order_id, ()):
+            if not fut.done():
+                fut.set_result(state)
+
+    async def current(self, db: AsyncSession, order_id) -> Optional[dict]:
+        key = str(order_id)
+        known = self._latest.get(key)
+        if known is not None and known[1] > time.monotonic():
+            return known[0]
+        row = (await db.execute(select(Order.status, Order.version).where(Order.id == order_id))).first()
+        if row is None:
+            return None
+        state = {"order_id": key, "status": row.status, "version": row.version or 0}
+        self._remember(key, state)
+        return self._latest[key][0]
+
+    async def wait(self, order_id, since_version: int, timeout: float) -> Optional[dict]:
+        """Ждёт события с версией больше since_version; None по таймауту."""
+        key = str(order_id)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, set()).add(fut)
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                # событие могло прийти до регистрации fut: между current() и wait()
+                # или пока обрабатывалось предыдущее, устаревшее
+                known = self._latest.get(key)
+                if known is not None and known[0]["version"] > since_version:
+                    return known[0]
+                state = await asyncio.wait_for(asyncio.shield(fut), max(deadline - time.monotonic(), 0))
+                if state["version"] > since_version:
+                    return state
+                # устаревшее событие — ждём дальше
+                fut = asyncio.get_running_loop().create_future()
+                self._waiters.setdefault(key, set()).add(fut)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(fut)
+                if not waiters:
+                    del self._waiters[key]
+
+
+order_waiters = OrderWaiters()
+broker.add_hook(order_waiters.on_event)
@@ -1,29 +1,86 @@
-# app/crud/payment.py
-import logging
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.payment import Payment
-from app.schemas.payment import PaymentCreate
-from app.crud.base import get_all, get_by_id, create_instance, update_instance, delete_instance
-
-logger = logging.getLogger("crud.payment")
-
-async def list_payments(db: AsyncSession, order_id=None):
-    if order_id:
-        q = await db.execute(select(Payment).where(Payment.order_id == order_id))
-        return q.scalars().all()
-    return await get_all(db, Payment)
-
-async def get_payment(db: AsyncSession, payment_id):
-    return await get_by_id(db, Payment, payment_id)
-
-async def create_payment(db: AsyncSession, payment_in: PaymentCreate, order_id=None):
-    try:
-        data = payment_in.model_dump()
-        if order_id:
-            data["order_id"] = order_id
-        obj = Payment(**data)
-        return await create_instance(db, obj)
-    except Exception:
-        logger.exception("create_payment failed")
-        raise
+# app/crud/payment.py
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.order import Order
+from app.models.payment import Payment
+from app.schemas.payment import PaymentCreate
+from app.crud.base import get_all, get_by_id, create_instance, update_instance, delete_instance
+from app.crud.slot import confirm_slot, release_slot
+from app.crud.order_events import can_transition, publish_order_event, transition
+
+logger = logging.getLogger("crud.payment")
+
+async def list_payments(db: AsyncSession, order_id=None):
+    if order_id:
+        q = await db.execute(select(Payment).where(Payment.order_id == order_id))
+        return q.scalars().all()
+    return await get_all(db, Payment)
+
+async def get_payment(db: AsyncSession, payment_id):
+    return await get_by_id(db, Payment, payment_id)
+
+async def create_payment(db: AsyncSession, payment_in: PaymentCreate, order_id=None):
+    try:
+        data = payment_in.model_dump()
+        if order_id:
+            data["order_id"] = order_id
+        obj = Payment(**data)
+        return await create_instance(db, obj)
+    except Exception:
+        logger.exception("create_payment failed")
+        raise
+
+async def mark_order_paid(db: AsyncSession, payment_id):
+    """Платёж прошёл: заказ оплачен, hold слота становится подтверждённым местом."""
+    try:
+        payment = await get_by_id(db, Payment, payment_id)
+        if not payment:
+            logger.warning(f"mark_order_paid: payment {payment_id} not found")
+            return None
+        order = await get_by_id(db, Order, payment.order_id)
+        if payment.status == "paid":
+            # повторная доставка webhook: место уже подтверждено, второй confirm не нужен
+            logger.info(f"mark_order_paid: payment {payment_id} is already paid")
+            return order
+        now = datetime.utcnow()
+        payment.status = "paid"
+        payment.paid_at = now
+        changed = order is not None and can_transition(order.status, "paid")
+        if changed:
+            # confirm до paid_at: при истёкшем hold неоплаченный заказ теряет слот
+            await confirm_slot(db, order)
+            transition(order, "paid", now)
+        elif order is not None and order.paid_at is not None:
+            # заказ уже оплачен (персонал, webhook статуса): место подтвердили тогда же
+            logger.info(f"mark_order_paid: order {order.id} is already paid, payment {payment_id} recorded")
+        elif order is not None:
+            # деньги пришли за отменённый или уже выданный заказ — статус не трогаем
+            logger.warning(f"mark_order_paid: order {order.id} is {order.status!r}, payment {payment_id} not applied")
+        await db.commit()
+        if changed:
+            await publish_order_event(order, "order.status")
+        return order
+    except Exception:
+        logger.exception("mark_order_paid failed")
+        await db.rollback()
+        raise
+
+async def mark_order_failed(db: AsyncSession, payment_id):
+    """Платёж не прошёл: место в слоте освобождается сразу, не дожидаясь истечения hold."""
+    try:
+        payment = await get_by_id(db, Payment, payment_id)
+        if not payment:
+            logger.warning(f"mark_order_failed: payment {payment_id} not found")
+            return None
+        payment.status = "failed"
+        order = await get_by_id(db, Order, payment.order_id)
+        if order:
+            await release_slot(db, order)
+        await db.commit()
+        return order
+    except Exception:
+        logger.exception("mark_order_failed failed")
+        await db.rollback()
+        raise
@@ -0,0 +1,223 @@
+# app/crud/prep_scheduler.py
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.crud.order_events import ACTIVE_STATUSES
+from app.models.menu_item import MenuItem
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.shop import Shop
+from app.models.time_slot import TimeSlot
+
+# заказ без позиций (или с неизвестными) всё равно занимает баристу
+DEFAULT_ORDER_PREP_SECONDS = 120
+# очередь перечитывается из БД не чаще, чем раз в QUEUE_TTL_SECONDS, или по событию чужого воркера
+QUEUE_TTL_SECONDS = 300
+# сдвиги preparation_due_at меньше этого не пишем в БД
+DUE_WRITE_THRESHOLD = timedelta(seconds=30)
+# статусы, после которых заказ больше не занимает баристу
+DONE_STATUSES = ("ready", "completed", "cancelled")
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+@dataclass
+class QueuedOrder:
+    order_id: UUID
+    work: float  # секунды работы баристы
+    target: datetime  # к какому моменту заказ должен быть готов (начало слота или сразу)
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    due: Optional[datetime] = None  # последнее записанное в БД preparation_due_at
+
+    def key(self) -> Tuple[datetime, datetime, str]:
+        return (self.target, self.created_at, str(self.order_id))
+
+
+class ShopQueue:
+    """Активная очередь магазина: heap заказов по приоритету и capacity параллельных бармен-мест."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.orders: Dict[UUID, QueuedOrder] = {}
+        self._heap: List[Tuple[Tuple[datetime, datetime, str], UUID]] = []
+        self.stale_at = time.monotonic() + QUEUE_TTL_SECONDS
+
+    def push(self, order: QueuedOrder) -> None:
+        self.orders[order.order_id] = order
+        heapq.heappush(self._heap, (order.key(), order.order_id))
+
+    def discard(self, order_id: UUID) -> None:
+        # из heap удаляется лениво, в plan()
+        self.orders.pop(order_id, None)
+
+    def plan(self, now: datetime) -> Dict[UUID, datetime]:
+        """Время готовности каждого заказа при списочном расписании на capacity бариста."""
+        free = [now] * self.capacity
+        running = sorted(
+            (o for o in self.orders.values() if o.started_at is not None),
+            key=lambda o: o.started_at,
+        )[:self.capacity]
+        plan: Dict[UUID, datetime] = {}
+        for i, o in enumerate(running):
+            free[i] = max(o.started_at + timedelta(seconds=o.work), now)
+            plan[o.order_id] = free[i]
+        heapq.heapify(free)
+
+        # перестраиваем heap без удалённых и устаревших записей, заодно получая порядок
+        live = []
+        for key, order_id in self._heap:
+            o = self.orders.get(order_id)
+            if o is not None and o.key() == key:
+                live.append((key, order_id))
+        heapq.heapify(live)
+        self._heap = list(live)
+
+        while live:
+            _, order_id = heapq.heappop(live)
+            if order_id in plan:
+                continue
+            o = self.orders[order_id]
+            start = max(heapq.heappop(free), o.target - timedelta(seconds=o.work))
+            due = start + timedelta(seconds=o.work)
+            heapq.heappush(free, due)
+            plan[order_id] = due
+        return plan
+
+
+class PrepScheduler:
+    """Назначает preparation_due_at с учётом загрузки магазина.
+
+    Очередь магазина читается из БД один раз и дальше меняется в памяти:
+    приход заказа, смена слота, начало приготовления и выдача пересчитывают
+    расписание, а в БД пишутся только заметно сдвинувшиеся сроки. События
+    других воркеров помечают очередь устаревшей, и она перечитывается.
+    """
+
+    def __init__(self):
+        self._queues: Dict[UUID, ShopQueue] = {}
+
+    async def _queue(self, db: AsyncSession, shop_id: UUID) -> ShopQueue:
+        queue = self._queues.get(shop_id)
+        if queue is not None and queue.stale_at > time.monotonic():
+            return queue
+
+        capacity = (await db.execute(select(Shop.barista_capacity).where(Shop.id == shop_id))).scalar()
+        queue = ShopQueue(capacity or 1)
+        work = func.coalesce(func.sum(OrderItem.qty * MenuItem.prep_seconds), 0)
+        res = await db.execute(
+            select(Order.id, Order.created_at, Order.started_at, Order.status, Order.preparation_due_at,
+                   TimeSlot.start, work.label("work"))
+            .outerjoin(TimeSlot, TimeSlot.id == Order.slot_id)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(Order.shop_id == shop_id, Order.status.in_(ACTIVE_STATUSES), Order.status.notin_(DONE_STATUSES))
+            .group_by(Order.id, Order.created_at, Order.started_at, Order.status, Order.preparation_due_at, TimeSlot.start)
+        )
+        for row in res:
+            created_at = _utc(row.created_at)
+            queue.push(QueuedOrder(
+                order_id=row.id,
+                work=float(row.work or DEFAULT_ORDER_PREP_SECONDS),
+                target=_utc(row.start) or created_at,
+                created_at=created_at,
+                started_at=_utc(row.started_at) if row.status == "preparing" else None,
+                due=_utc(row.preparation_due_at),
+            ))
+        self._queues[shop_id] = queue
+        return queue
+
+    async def _apply(self, db: AsyncSession, queue: ShopQueue, skip: Optional[UUID] = None) -> Dict[UUID, datetime]:
+        plan = queue.plan(datetime.now(timezone.utc))
+        changed = []
+        for order_id, due in plan.items():
+            o = queue.orders[order_id]
+            if o.due is None or abs(o.due - due) >= DUE_WRITE_THRESHOLD:
+                o.due = due
+                if order_id != skip:
+                    changed.append({"id": order_id, "preparation_due_at": due})
+        if changed:
+            # один executemany по первичному ключу
+            await db.execute(update(Order), changed)
+        return plan
+
+    async def add(
+        self, db: AsyncSession, shop_id: UUID, order_id: UUID, work_seconds: float,
+        created_at: datetime, target: Optional[datetime] = None,
+    ) -> datetime:
+        """Ставит новый заказ в очередь; возвращает его preparation_due_at (сам заказ не пишется)."""
+        queue = await self._queue(db, shop_id)
+        created_at = _utc(created_at)
+        queue.push(QueuedOrder(
+            order_id=order_id, work=float(work_seconds or DEFAULT_ORDER_PREP_SECONDS),
+            target=_utc(target) or created_at, created_at=created_at,
+        ))
+        plan = await self._apply(db, queue, skip=order_id)
+        return plan[order_id]
+
+    async def retarget(self, db: AsyncSession, order: Order, target: Optional[datetime]) -> Optional[datetime]:
+        """Заказ получил слот: пересчитывает очередь; возвращает новый preparation_due_at заказа."""
+        queue = await self._queue(db, order.shop_id)
+        queued = queue.orders.get(order.id)
+        if queued is None:
+            return None
+        queued.target = _utc(target) or queued.created_at
+        queue.push(queued)  # старая запись в heap отбросится по несовпадению ключа
+        plan = await self._apply(db, queue, skip=order.id)
+        return plan[order.id]
+
+    async def on_status(self, db: AsyncSession, shop_id: UUID, changes: Iterable[Tuple[UUID, str]]) -> None:
+        """Начало приготовления и выдача/отмена освобождают или занимают баристу."""
+        queue = self._queues.get(shop_id)
+        if queue is None:
+            return  # очередь не загружена — прочитается свежей при следующем заказе
+        now = datetime.now(timezone.utc)
+        touched = False
+        for order_id, status in changes:
+            o = queue.orders.get(order_id)
+            if o is None:
+                continue
+            if status in DONE_STATUSES:
+                queue.discard(order_id)
+                touched = True
+            elif status == "preparing" and o.started_at is None:
+                o.started_at = now
+                touched = True
+        if touched:
+            await self._apply(db, queue)
+
+    def on_event(self, topic: str, event: dict) -> None:
+        """Хук брокера: заказ, которого нет в памяти, значит очередь изменил другой воркер."""
+        if not event.get("shop_id") or not event.get("order_id"):
+            return
+        queue = self._queues.get(UUID(event["shop_id"]))
+        if queue is None:
+            return
+        order_id = UUID(event["order_id"])
+        o = queue.orders.get(order_id)
+        if event.get("status") in DONE_STATUSES or event.get("type") == "order.deleted":
+            queue.discard(order_id)
+        elif o is None or (event.get("status") == "preparing" and o.started_at is None):
+            queue.stale_at = 0
+
+    def invalidate(self, shop_id: Optional[UUID] = None) -> None:
+        if shop_id is None:
+            self._queues.clear()
+        else:
+            self._queues.pop(shop_id, None)
+
+
+prep_scheduler = PrepScheduler()
+broker.add_hook(prep_scheduler.on_event)
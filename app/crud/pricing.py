@@ -0,0 +1,205 @@
+# app/crud/pricing.py
+import asyncio
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.item_option import ItemOption
+from app.models.item_option_group import ItemOptionGroup
+from app.models.menu_item import MenuItem
+from app.schemas.order import OrderCreate
+
+# Сколько живёт индекс без инвалидаций: ограничивает расхождение между воркерами
+PRICE_INDEX_TTL_SECONDS = 60
+MAX_SHOPS = 5_000
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+
+class PricingError(ValueError):
+    """Заказ ссылается на позицию или опцию, которую нельзя продать, или оплата не сходится с ценой."""
+
+
+@dataclass
+class PricedOption:
+    option_id: UUID
+    name: Optional[str]
+    price_delta: Decimal
+    menu_item_id: Optional[UUID] = None
+    is_available: bool = True
+
+
+@dataclass
+class PricedItem:
+    menu_item_id: UUID
+    name: str
+    base_price: Optional[Decimal]  # None — цена в меню не задана, позицию продать нельзя
+    is_active: bool
+    prep_seconds: int = 0
+    options: Dict[UUID, PricedOption] = field(default_factory=dict)
+
+
+@dataclass
+class ShopPrices:
+    shop_id: UUID
+    items: Dict[UUID, PricedItem]
+    stale_at: float  # time.monotonic()
+    options: Dict[UUID, PricedOption] = field(default_factory=dict)
+
+
+@dataclass
+class PricedLine:
+    menu_item_id: UUID
+    name_snapshot: str
+    unit_price: Decimal
+    qty: int
+    line_total: Decimal
+    options: List[PricedOption]
+    prep_seconds: int = 0  # на одну единицу
+
+
+@dataclass
+class PricedOrder:
+    lines: List[PricedLine]
+    subtotal: Decimal
+    discount: Decimal
+    total_amount: Decimal
+
+
+def money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENTS, ROUND_HALF_UP)
+
+
+class MenuPriceIndex:
+    """Цены меню магазина в памяти: MenuItem.base_price и ItemOption.price_delta.
+
+    Индекс магазина собирается двумя SELECT при первом заказе и живёт до записи
+    в меню (invalidate) или PRICE_INDEX_TTL_SECONDS — так изменения, сделанные
+    другим воркером, доходят не позже TTL.
+    """
+
+    def __init__(self, ttl: float = PRICE_INDEX_TTL_SECONDS, max_shops: int = MAX_SHOPS):
+        self.ttl = ttl
+        self.max_shops = max_shops
+        self._shops: Dict[UUID, ShopPrices] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = {}
+
+    def _fresh(self, shop_id: UUID) -> Optional[ShopPrices]:
+        prices = self._shops.get(shop_id)
+        if prices is not None and prices.stale_at > time.monotonic():
+            return prices
+        return None
+
+    async def get(self, db: AsyncSession, shop_id: UUID) -> ShopPrices:
+        prices = self._fresh(shop_id)
+        if prices is not None:
+            return prices
+        lock = self._locks.setdefault(shop_id, asyncio.Lock())
+        async with lock:
+            prices = self._fresh(shop_id) or await self._build(db, shop_id)
+        self._locks.pop(shop_id, None)
+        return prices
+
+    async def _build(self, db: AsyncSession, shop_id: UUID) -> ShopPrices:
+        res = await db.execute(
+            select(MenuItem.id, MenuItem.item_name, MenuItem.base_price, MenuItem.is_active, MenuItem.prep_seconds)
+            .where(MenuItem.shop_id == shop_id)
+        )
+        items = {
+            row.id: PricedItem(
+                menu_item_id=row.id, name=row.item_name,
+                base_price=None if row.base_price is None else money(row.base_price),
+                is_active=row.is_active is not False, prep_seconds=row.prep_seconds or 0,
+            )
+            for row in res
+        }
+        res = await db.execute(
+            select(
+                ItemOption.id, ItemOption.name, ItemOption.price_delta, ItemOption.is_available,
+                ItemOptionGroup.menu_item_id,
+            )
+            .join(ItemOptionGroup, ItemOption.group_id == ItemOptionGroup.id)
+            .join(MenuItem, ItemOptionGroup.menu_item_id == MenuItem.id)
+            .where(MenuItem.shop_id == shop_id)
+        )
+        options = {}
+        for row in res:
+            options[row.id] = items[row.menu_item_id].options[row.id] = PricedOption(
+                option_id=row.id, name=row.name, price_delta=money(row.price_delta),
+                menu_item_id=row.menu_item_id, is_available=row.is_available is not False,
+            )
+
+        prices = ShopPrices(shop_id=shop_id, items=items, options=options, stale_at=time.monotonic() + self.ttl)
+        if len(self._shops) >= self.max_shops:
+            self._shops.pop(next(iter(self._shops)))
+        self._shops[shop_id] = prices
+        return prices
+
+    def patch(self, shop_id: UUID, items: Dict[UUID, bool], options: Dict[UUID, bool]) -> None:
+        """Меняет доступность позиций и опций в индексе на месте; цены не трогает."""
+        prices = self._shops.get(shop_id)
+        if prices is None:
+            return
+        for item_id, active in items.items():
+            if item_id in prices.items:
+                prices.items[item_id].is_active = active
+        for option_id, available in options.items():
+            if option_id in prices.options:
+                prices.options[option_id].is_available = available
+
+    def invalidate(self, shop_id: Optional[UUID] = None) -> None:
+        """Сбрасывает индекс магазина (или все) после записи в меню."""
+        if shop_id is None:
+            self._shops.clear()
+        else:
+            self._shops.pop(shop_id, None)
+
+
+price_index = MenuPriceIndex()
+
+
+async def price_order(db: AsyncSession, order_in: OrderCreate) -> PricedOrder:
+    """Считает позиции, subtotal и total_amount по ценам меню, игнорируя цены клиента.
+
+    Все позиции и опции разрешаются по индексу магазина за один проход, без
+    запросов в БД на каждую позицию. Бросает PricingError на чужие, скрытые
+    или несуществующие позиции и опции.
+    """
+    prices = await price_index.get(db, order_in.shop_id)
+    lines: List[PricedLine] = []
+    subtotal = ZERO
+    for item_in in order_in.order_items:
+        item = prices.items.get(item_in.menu_item_id)
+        if item is None:
+            raise PricingError(f"menu item {item_in.menu_item_id} not found in shop {order_in.shop_id}")
+        if not item.is_active:
+            raise PricingError(f"menu item {item.menu_item_id} is not available")
+        if item.base_price is None:
+            raise PricingError(f"menu item {item.menu_item_id} has no price")
+        if item_in.qty < 1:
+            raise PricingError(f"qty for menu item {item.menu_item_id} must be positive")
+
+        options = []
+        for opt_in in item_in.options:
+            opt = item.options.get(opt_in.option_id)
+            if opt is None:
+                raise PricingError(f"option {opt_in.option_id} does not belong to menu item {item.menu_item_id}")
+            if not opt.is_available:
+                raise PricingError(f"option {opt.option_id} is not available")
+            options.append(opt)
+
+        unit_price = item.base_price + sum((o.price_delta for o in options), ZERO)
+        line_total = unit_price * item_in.qty
+        subtotal += line_total
+        lines.append(PricedLine(
+            menu_item_id=item.menu_item_id, name_snapshot=item.name, unit_price=unit_price,
+            qty=item_in.qty, line_total=line_total, options=options, prep_seconds=item.prep_seconds,
+        ))
+
+    # скидок на сервере пока нет, клиентскую не принимаем
+    return PricedOrder(lines=lines, subtotal=subtotal, discount=ZERO, total_amount=subtotal)
@@ -0,0 +1,203 @@
+# app/crud/shop_geo.py
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.models.shop import Shop
+
+SHOPS_TOPIC = "shops"
+EARTH_RADIUS_M = 6_371_000.0
+# сторона ячейки сетки в градусах: ~2.2 км по широте, ~1.2 км по долготе на широте Москвы
+CELL_DEG = 0.02
+LNG_CELLS = int(round(360 / CELL_DEG))
+NEARBY_RADIUS_MAX_M = 50_000
+# полная перезагрузка — страховка от потерянных NOTIFY и записей в обход приложения
+GEO_INDEX_TTL_SECONDS = 600
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEG), math.floor((lng + 180) / CELL_DEG) % LNG_CELLS
+
+
+@dataclass
+class GeoPoint:
+    shop_id: UUID
+    lat: float
+    lng: float
+    cell: Tuple[int, int]
+
+
+class ShopGeoIndex:
+    """Сетка lat/lng -> активные магазины с координатами, в памяти процесса.
+
+    Запрос перебирает ячейки вокруг точки и считает точное расстояние
+    (haversine) лишь для магазинов в них. Создание,
+    изменение и удаление магазина правят сетку точечно (upsert/remove), в том
+    числе на других воркерах через событие shop.changed.
+    """
+
+    def __init__(self, ttl: float = GEO_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._points: Dict[UUID, GeoPoint] = {}
+        self._cells: Dict[Tuple[int, int], Set[UUID]] = {}
+        self.stale_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def ensure(self, db: AsyncSession) -> None:
+        if self.stale_at > time.monotonic():
+            return
+        async with self._lock:
+            if self.stale_at > time.monotonic():
+                return
+            res = await db.execute(
+                select(Shop.id, Shop.lat, Shop.lng)
+                .where(Shop.is_active.isnot(False), Shop.lat.isnot(None), Shop.lng.isnot(None))
+            )
+            self._points.clear()
+            self._cells.clear()
+            for row in res:
+                self.upsert(row.id, row.lat, row.lng, True)
+            self.stale_at = time.monotonic() + self.ttl
+
+    def upsert(self, shop_id: UUID, lat: Optional[float], lng: Optional[float], is_active: Optional[bool]) -> None:
+        self.remove(shop_id)
+        if is_active is False or lat is None or lng is None:
+            return
+        point = GeoPoint(shop_id=shop_id, lat=lat, lng=lng, cell=_cell(lat, lng))
+        self._points[shop_id] = point
+        self._cells.setdefault(point.cell, set()).add(shop_id)
+
+    def remove(self, shop_id: UUID) -> None:
+        point = self._points.pop(shop_id, None)
+        if point is None:
+            return
+        ids = self._cells.get(point.cell)
+        if ids is not None:
+            ids.discard(shop_id)
+            if not ids:
+                del self._cells[point.cell]
+
+    def nearby(self, lat: float, lng: float, radius_m: float, limit: int) -> List[Tuple[UUID, float]]:
+        """(shop_id, расстояние в метрах) ближайших магазинов в радиусе, по возрастанию расстояния.
+
+        Ячейки обходятся кольцами от ячейки точки; обход прекращается, как
+        только limit найденных магазинов ближе, чем может оказаться любой
+        магазин из следующего кольца. У полюса, где круг захватывает четверть
+        долгот и больше, магазины полосы широт перебираются целиком.
+        """
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        lat_max = abs(lat) + dlat
+        ci, cj = _cell(lat, lng)
+        lat_lo, _ = _cell(max(lat - dlat, -90.0), 0)
+        lat_hi, _ = _cell(min(lat + dlat, 90.0), 0)
+        cos_lat = math.cos(math.radians(lat_max)) if lat_max < 90.0 else 0.0
+        dlng = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)) if cos_lat > 0 else 360.0
+        if dlng >= 90.0:
+            return self._scan_band(lat, lng, radius_m, limit, lat_lo, lat_hi)
+        # ширина кольца в метрах снизу: меньшая из сторон ячейки в пределах радиуса
+        ring_m = math.radians(CELL_DEG) * EARTH_RADIUS_M * cos_lat
+        lng_rings = math.ceil(dlng / CELL_DEG) + 1
+        max_ring = max(ci - lat_lo, lat_hi - ci, lng_rings)
+
+        found: List[Tuple[float, UUID]] = []
+        for k in range(max_ring + 1):
+            for i, j in self._ring(ci, cj, k, lng_rings):
+                if i < lat_lo or i > lat_hi:
+                    continue
+                for shop_id in self._cells.get((i, j % LNG_CELLS), ()):
+                    p = self._points[shop_id]
+                    d = haversine_m(lat, lng, p.lat, p.lng)
+                    if d <= radius_m:
+                        found.append((d, shop_id))
+            # всё, что дальше кольца k, не ближе k * ring_m
+            if k * ring_m > radius_m:
+                break
+            if len(found) >= limit:
+                found.sort(key=lambda x: x[0])
+                del found[limit:]
+                if found[-1][0] <= k * ring_m:
+                    break
+        found.sort(key=lambda x: x[0])
+        return [(shop_id, d) for d, shop_id in found[:limit]]
+
+    def _scan_band(
+        self, lat: float, lng: float, radius_m: float, limit: int, lat_lo: int, lat_hi: int,
+    ) -> List[Tuple[UUID, float]]:
+        # через полюс близкими оказываются ячейки на противоположных долготах,
+        # оценка расстояния по номеру кольца не работает
+        found = []
+        for p in self._points.values():
+            if lat_lo <= p.cell[0] <= lat_hi:
+                d = haversine_m(lat, lng, p.lat, p.lng)
+                if d <= radius_m:
+                    found.append((d, p.shop_id))
+        found.sort(key=lambda x: x[0])
+        return [(shop_id, d) for d, shop_id in found[:limit]]
+
+    @staticmethod
+    def _ring(ci: int, cj: int, k: int, max_dj: int):
+        if k == 0:
+            yield ci, cj
+            return
+        for dj in range(-k, k + 1):
+            if abs(dj) <= max_dj:
+                yield ci - k, cj + dj
+                yield ci + k, cj + dj
+        if k <= max_dj:
+            for di in range(-k + 1, k):
+                yield ci + di, cj - k
+                yield ci + di, cj + k
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+
+geo_index = ShopGeoIndex()
+
+
+def shop_event(shop: Shop, deleted: bool = False) -> dict:
+    return {
+        "type": "shop.deleted" if deleted else "shop.changed",
+        "shop_id": str(shop.id), "lat": shop.lat, "lng": shop.lng, "is_active": shop.is_active,
+        "tz": shop.tz, "open_hours": shop.open_hours,
+    }
+
+
+async def publish_shop_changed(shop: Shop, deleted: bool = False) -> None:
+    """После commit: обновляет индексы магазинов на всех воркерах."""
+    await broker.publish(SHOPS_TOPIC, shop_event(shop, deleted))
+
+
+async def publish_shops_reloaded() -> None:
+    """После массового импорта: индексы магазинов на всех воркерах перечитываются целиком."""
+    await broker.publish(SHOPS_TOPIC, {"type": "shops.reloaded"})
+
+
+def _on_event(topic: str, event: dict) -> None:
+    if topic != SHOPS_TOPIC:
+        return
+    if event["type"] == "shops.reloaded":
+        geo_index.stale_at = 0.0
+        return
+    shop_id = UUID(event["shop_id"])
+    if event["type"] == "shop.deleted":
+        geo_index.remove(shop_id)
+    else:
+        geo_index.upsert(shop_id, event.get("lat"), event.get("lng"), event.get("is_active"))
+
+
+broker.add_hook(_on_event)
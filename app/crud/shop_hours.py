@@ -0,0 +1,109 @@
+# app/crud/shop_hours.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+from uuid import UUID
+from zoneinfo import ZoneInfoNotFoundError
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.core.schedule import WeekIndex, compile_week, get_zone, is_open_at, minute_of_week, parse_open_hours
+from app.crud.shop_geo import SHOPS_TOPIC
+from app.models.shop import Shop
+
+logger = logging.getLogger("crud.shop_hours")
+
+# полная перезагрузка — страховка от потерянных NOTIFY и записей в обход приложения
+HOURS_INDEX_TTL_SECONDS = 600
+
+
+class OpenHoursIndex:
+    """Часы работы всех магазинов, скомпилированные в интервалы недели в их часовом поясе.
+
+    open_hours разбирается один раз при загрузке или изменении магазина;
+    запрос «открыт ли сейчас» — перевод времени в зону (раз на зону) и
+    бинарный поиск по интервалам. Магазины без часов или с нераспознанными
+    часами считаются закрытыми.
+    """
+
+    def __init__(self, ttl: float = HOURS_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        # зона -> shop_id -> интервалы недели
+        self._by_zone: Dict[str, Dict[UUID, WeekIndex]] = {}
+        self._zone_of: Dict[UUID, str] = {}
+        self.stale_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def ensure(self, db: AsyncSession) -> None:
+        if self.stale_at > time.monotonic():
+            return
+        async with self._lock:
+            if self.stale_at > time.monotonic():
+                return
+            res = await db.execute(select(Shop.id, Shop.tz, Shop.open_hours))
+            self._by_zone.clear()
+            self._zone_of.clear()
+            for row in res:
+                self.upsert(row.id, row.tz, row.open_hours)
+            self.stale_at = time.monotonic() + self.ttl
+
+    def upsert(self, shop_id: UUID, tz: Optional[str], open_hours) -> None:
+        self.remove(shop_id)
+        try:
+            zone = get_zone(tz).key
+            week = compile_week(parse_open_hours(open_hours))
+        except (ValueError, ZoneInfoNotFoundError) as e:
+            logger.warning(f"shop {shop_id}: cannot compile open_hours ({e})")
+            return
+        if week[0]:
+            self._by_zone.setdefault(zone, {})[shop_id] = week
+            self._zone_of[shop_id] = zone
+
+    def remove(self, shop_id: UUID) -> None:
+        zone = self._zone_of.pop(shop_id, None)
+        if zone is not None:
+            self._by_zone[zone].pop(shop_id, None)
+
+    def open_at(self, at: Optional[datetime] = None) -> Set[UUID]:
+        """id магазинов, открытых в момент at (по умолчанию — сейчас); наивное время — UTC."""
+        at = at or datetime.now(timezone.utc)
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        result: Set[UUID] = set()
+        for zone, shops in self._by_zone.items():
+            minute = minute_of_week(at.astimezone(get_zone(zone)))
+            result.update(shop_id for shop_id, week in shops.items() if is_open_at(week, minute))
+        return result
+
+    def is_open(self, shop_id: UUID, at: Optional[datetime] = None) -> bool:
+        """Открыт ли один магазин — без обхода всех зон, для коротких списков."""
+        zone = self._zone_of.get(shop_id)
+        if zone is None:
+            return False
+        at = at or datetime.now(timezone.utc)
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return is_open_at(self._by_zone[zone][shop_id], minute_of_week(at.astimezone(get_zone(zone))))
+
+
+open_hours_index = OpenHoursIndex()
+
+
+def _on_event(topic: str, event: dict) -> None:
+    if topic != SHOPS_TOPIC:
+        return
+    if event["type"] == "shops.reloaded":
+        open_hours_index.stale_at = 0.0
+        return
+    shop_id = UUID(event["shop_id"])
+    if event["type"] == "shop.deleted":
+        open_hours_index.remove(shop_id)
+    else:
+        open_hours_index.upsert(shop_id, event.get("tz"), event.get("open_hours"))
+
+
+broker.add_hook(_on_event)
@@ -0,0 +1,100 @@
+# app/crud/shop_import.py
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import dialect_insert
+from app.models.shop import Shop
+from app.schemas.shop import ShopFeedRow
+
+logger = logging.getLogger("crud.shop_import")
+
+# строк в одной пачке (одна транзакция)
+SHOP_IMPORT_BATCH = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ShopImportStats:
+    upserted: int = 0
+    invalid: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.upserted + self.invalid) / self.elapsed if self.elapsed else 0.0
+
+
+def _error_text(e: ValidationError) -> str:
+    err = e.errors()[0]
+    where = ".".join(str(p) for p in err["loc"])
+    return f"{where}: {err['msg']}" if where else err["msg"]
+
+
+async def _upsert(db: AsyncSession, rows: List[dict]) -> None:
+    # строки — параметрами executemany: скомпилированный запрос один на все пачки
+    # и берётся из кэша, а многострочный VALUES драйвер соберёт сам
+    stmt = dialect_insert(db, Shop)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Shop.id],
+        set_={
+            "shop_name": excluded.shop_name, "address": excluded.address,
+            "lat": excluded.lat, "lng": excluded.lng, "tz": excluded.tz,
+            "open_hours": excluded.open_hours, "is_active": excluded.is_active,
+            # фид часто без created_at — не затираем уже известную дату
+            "created_at": func.coalesce(excluded.created_at, Shop.created_at),
+        },
+    )
+    await db.execute(stmt, rows)
+
+
+async def import_shops(
+    db: AsyncSession, records: AsyncIterator[Tuple[int, Any]], batch: int = SHOP_IMPORT_BATCH,
+) -> ShopImportStats:
+    """Upsert магазинов из потока записей пачками; commit после каждой пачки.
+
+    Невалидные записи пропускаются и попадают в stats.errors (первые
+    MAX_REPORTED_ERRORS). ValueError из потока (битый JSON) прерывает импорт,
+    уже записанные пачки остаются.
+    """
+    stats = ShopImportStats()
+    started = time.perf_counter()
+    pending: Dict[Any, dict] = {}
+
+    async def flush():
+        if pending:
+            await _upsert(db, list(pending.values()))
+            await db.commit()
+            stats.upserted += len(pending)
+            stats.batches += 1
+            pending.clear()
+
+    try:
+        async for n, raw in records:
+            try:
+                row = ShopFeedRow.model_validate(raw)
+            except ValidationError as e:
+                stats.invalid += 1
+                if len(stats.errors) < MAX_REPORTED_ERRORS:
+                    stats.errors.append((n, _error_text(e)))
+                continue
+            # повтор id в одной пачке ON CONFLICT не переварит — берём последнюю версию
+            pending[row.id] = row.model_dump()
+            if len(pending) >= batch:
+                await flush()
+        await flush()
+    finally:
+        stats.elapsed = time.perf_counter() - started
+    logger.info(
+        f"shop import: {stats.upserted} upserted, {stats.invalid} invalid, "
+        f"{stats.rows_per_second:.0f} rows/s"
+    )
+    return stats
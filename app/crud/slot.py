@@ -1,62 +1,144 @@
 # app/crud/slot.py
-from datetime import datetime, timedelta
-from typing import List, Tuple
-from sqlalchemy import select, func, delete, and_
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, and_
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.shop import Shop
 from app.models.time_slot import TimeSlot
-from app.models.slot_hold import SlotHold
 from app.models.order import Order
-from app.logger import logger
+from app.core.database import AsyncSessionLocal
+from app.core.schedule import get_zone, parse_open_hours
+from app.core.scheduler import DeadlineScheduler
+from app.crud.base import dialect_insert
+from app.crud.hold_store import get_hold_store, HOLD_TTL_SECONDS
+from app.crud.availability import availability_grid
 from uuid import UUID
 
-HOLD_TTL_SECONDS = 120
+# строк в одном INSERT: 8 колонок * 2000 < 32767 bind-параметров Postgres
+SLOT_INSERT_BATCH = 2000
+# сколько holds снимается одной транзакцией фоновой уборки
+HOLD_EXPIRY_BATCH = 500
+HOLD_EXPIRY_LOCK_KEY = 7_310_412_001
 
-async def cleanup_expired_holds(db: AsyncSession):
-    now = datetime.utcnow()
-    q = delete(SlotHold).where(SlotHold.expires_at <= now)
-    res = await db.execute(q)
-    await db.commit()
-    logger.debug("slot: cleaned expired holds")
-
-async def count_active_holds(db: AsyncSession, slot_id: UUID) -> int:
-    now = datetime.utcnow()
-    q = select(func.count()).select_from(SlotHold).where(
-        and_(SlotHold.slot_id == slot_id, SlotHold.expires_at > now)
-    )
-    result = await db.execute(q)
-    return int(result.scalar() or 0)
+# Занятость слота = активные holds (HoldStore) + time_slots.confirmed_count.
+# Инвариант: у оплаченного заказа order.slot_id заполнен <=> место подтверждено;
+# у неоплаченного — hold мог быть, но мог уже и истечь.
+# Ни одна функция ниже не делает commit — транзакцией управляет вызывающий код.
+
+
+async def cleanup_expired_holds(db: AsyncSession, slot_id: Optional[UUID] = None, limit: Optional[int] = None) -> int:
+    """Освобождает истёкшие holds (no-op для бэкендов с нативным TTL). Возвращает их число."""
+    released = await get_hold_store().expire(db, slot_id, limit)
+    # сбрасываются только сетки затронутых слотов, а не все магазины разом
+    for sid in released:
+        availability_grid.invalidate(sid)
+    return sum(released.values())
+
+
+async def _expire_due_holds() -> Optional[datetime]:
+    # пачками по HOLD_EXPIRY_BATCH, каждая — своя короткая транзакция
+    async with AsyncSessionLocal() as db:
+        while True:
+            released = await cleanup_expired_holds(db, limit=HOLD_EXPIRY_BATCH)
+            await db.commit()
+            if released < HOLD_EXPIRY_BATCH:
+                break
+        return await get_hold_store().next_expiry(db)
+
+
+# Фоновая уборка истёкших holds; запускается в app.main для бэкендов без нативного TTL
+hold_expiry = DeadlineScheduler("hold-expiry", _expire_due_holds, lock_key=HOLD_EXPIRY_LOCK_KEY)
 
-async def count_confirmed_orders(db: AsyncSession, slot_id: UUID) -> int:
-    # считать за «занятые» все заказы, у которых slot_id совпадает и статус != cancelled
-    q = select(func.count()).select_from(Order).where(
-        and_(Order.slot_id == slot_id, Order.status != "cancelled")
-    )
-    result = await db.execute(q)
-    return int(result.scalar() or 0)
 
 async def get_slot(db: AsyncSession, slot_id: UUID) -> TimeSlot | None:
     q = select(TimeSlot).where(TimeSlot.id == slot_id)
     result = await db.execute(q)
     return result.scalar_one_or_none()
 
-async def create_hold(db: AsyncSession, slot_id: UUID, order_id: UUID) -> SlotHold:
-    now = datetime.utcnow()
-    hold = SlotHold(slot_id=slot_id, order_id=order_id, expires_at=now + timedelta(seconds=HOLD_TTL_SECONDS))
-    db.add(hold)
-    await db.flush()
-    # do not commit here necessarily (caller may commit); but we will commit in endpoint
-    return hold
+
+async def release_slot(db: AsyncSession, order: Order) -> None:
+    """Освобождает место заказа: активный hold или подтверждённое место."""
+    if order.slot_id is None:
+        return
+    if await get_hold_store().release(db, order):
+        availability_grid.adjust(db, order.slot_id, held=-1)
+    if order.paid_at is not None:
+        await db.execute(
+            update(TimeSlot)
+            .where(TimeSlot.id == order.slot_id, TimeSlot.confirmed_count > 0)
+            .values(confirmed_count=TimeSlot.confirmed_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        availability_grid.adjust(db, order.slot_id, confirmed=-1)
+    order.slot_id = None
+
+
+async def confirm_slot(db: AsyncSession, order: Order) -> bool:
+    """Оплаченный заказ: hold становится подтверждённым местом.
+
+    Вызывается до того, как у заказа проставлен paid_at. Если hold уже
+    истёк, неоплаченный заказ теряет слот; у оплаченного место уже
+    подтверждено, и slot_id не трогается.
+    """
+    if order.slot_id is None:
+        return False
+    if await get_hold_store().confirm(db, order):
+        availability_grid.adjust(db, order.slot_id, held=-1, confirmed=1)
+        return True
+    if order.paid_at is None:
+        order.slot_id = None
+    return False
+
+
+async def assign_slot(db: AsyncSession, order: Order, slot: TimeSlot) -> Optional[datetime]:
+    """Ставит заказ в слот. Возвращает время истечения hold или None, если слот заполнен.
+
+    Прежнее место снимается только после захвата нового, поэтому при
+    переполнении откат транзакции оставляет заказ в старом слоте.
+    """
+    store = get_hold_store()
+    if order.slot_id == slot.id:
+        await release_slot(db, order)
+    expires_at = await store.acquire(db, slot, order.id)
+    if expires_at is None:
+        return None
+    availability_grid.adjust(db, slot.id, held=1, expires_at=expires_at)
+    hold_expiry.track(expires_at)
+    await release_slot(db, order)
+    order.slot_id = slot.id
+    if order.paid_at is not None:
+        await confirm_slot(db, order)
+    return expires_at
+
+
+async def remaining_capacities(db: AsyncSession, slots: Iterable[TimeSlot]) -> Dict[UUID, Optional[int]]:
+    """Остаток мест для набора слотов: один вызов HoldStore на весь набор.
+
+    None — слот без ограничения ёмкости.
+    """
+    slots = list(slots)
+    limited = [s for s in slots if s.capacity is not None]
+    held = await get_hold_store().held_counts(db, limited) if limited else {}
+    return {
+        s.id: None if s.capacity is None else s.capacity - held[s.id] - s.confirmed_count
+        for s in slots
+    }
+
 
 async def remaining_capacity(db: AsyncSession, slot: TimeSlot) -> int | None:
     # returns None for unlimited
-    if slot.capacity is None:
-        return None
-    await cleanup_expired_holds(db)
-    holds = await count_active_holds(db, slot.id)
-    orders = await count_confirmed_orders(db, slot.id)
-    used = holds + orders
-    rem = slot.capacity - used
-    return rem
+    return (await remaining_capacities(db, [slot]))[slot.id]
+
+
+async def get_availability(db: AsyncSession, slot_ids: Iterable[UUID]) -> Dict[UUID, Optional[int]]:
+    """Остаток мест по списку id слотов одним запросом к time_slots."""
+    ids = list(slot_ids)
+    if not ids:
+        return {}
+    res = await db.execute(select(TimeSlot).where(TimeSlot.id.in_(ids)))
+    return await remaining_capacities(db, res.scalars().all())
+
 
 async def find_alternative_slots(db: AsyncSession, shop_id, now_dt: datetime, limit: int = 10) -> List[TimeSlot]:
     # ближайшие слоты в будущем по shop_id
@@ -65,3 +147,71 @@ async def find_alternative_slots(db: AsyncSession, shop_id, now_dt: datetime, li
     ).order_by(TimeSlot.start.asc()).limit(limit)
     res = await db.execute(q)
     return res.scalars().all()
+
+
+async def find_available_slots(
+    db: AsyncSession, shop_id, now_dt: datetime, limit: int = 3, scan: int = 10
+) -> List[Tuple[TimeSlot, Optional[int]]]:
+    """Ближайшие слоты со свободными местами: один SELECT + один батч по holds."""
+    candidates = await find_alternative_slots(db, shop_id, now_dt, limit=scan)
+    remaining = await remaining_capacities(db, candidates)
+    free = [(c, remaining[c.id]) for c in candidates if remaining[c.id] is None or remaining[c.id] > 0]
+    return free[:limit]
+
+
+def build_slot_rows(
+    shop: Shop, start_date: date, days: int, granularity_minutes: int, capacity: Optional[int],
+    not_before: Optional[datetime] = None,
+) -> List[dict]:
+    """Строки time_slots по open_hours магазина на days дней вперёд (время в UTC)."""
+    hours = parse_open_hours(shop.open_hours)
+    tz = get_zone(shop.tz)
+    rows = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        midnight = datetime.combine(day, time.min, tzinfo=tz)
+        for start_min, end_min in hours.get(day.weekday(), []):
+            for t in range(start_min, end_min - granularity_minutes + 1, granularity_minutes):
+                # арифметика в часовом поясе магазина: 08:00 остаётся 08:00 и при переходе на летнее время
+                start = (midnight + timedelta(minutes=t)).astimezone(timezone.utc)
+                if not_before is not None and start < not_before:
+                    continue
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "shop_id": shop.id,
+                    "start": start,
+                    "end": (midnight + timedelta(minutes=t + granularity_minutes)).astimezone(timezone.utc),
+                    "capacity": capacity,
+                    "is_active": True,
+                    "held_count": 0,
+                    "confirmed_count": 0,
+                })
+    return rows
+
+
+async def generate_slots(
+    db: AsyncSession, shop: Shop, days: int = 14, granularity_minutes: int = 15,
+    capacity: Optional[int] = 5, start_date: Optional[date] = None,
+) -> int:
+    """Создаёт слоты магазина по open_hours многострочными INSERT.
+
+    Уже существующие слоты (shop_id, start) пропускаются. Возвращает число созданных.
+    """
+    now = datetime.now(timezone.utc)
+    if start_date is None:
+        start_date = now.astimezone(get_zone(shop.tz)).date()
+    rows = build_slot_rows(shop, start_date, days, granularity_minutes, capacity, not_before=now)
+
+    created = 0
+    for i in range(0, len(rows), SLOT_INSERT_BATCH):
+        stmt = (
+            dialect_insert(db, TimeSlot)
+            .values(rows[i:i + SLOT_INSERT_BATCH])
+            .on_conflict_do_nothing(index_elements=["shop_id", "start"])
+            .returning(TimeSlot.id)
+        )
+        res = await db.execute(stmt)
+        created += len(res.all())
+    if created:
+        availability_grid.invalidate_shop(shop.id)
+    return created
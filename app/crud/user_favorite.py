@@ -0,0 +1,200 @@
+# app/crud/user_favorite.py
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pubsub import broker
+from app.crud.base import dialect_insert
+from app.crud.shop_geo import SHOPS_TOPIC
+from app.models.shop import Shop
+from app.models.user_favorite import UserFavorite
+
+FAVORITES_TOPIC = "favorites"
+# страховка от потерянных NOTIFY; правки избранного и магазинов сбрасывают запись сразу
+FAVORITES_CACHE_TTL_SECONDS = 300
+MAX_CACHED_USERS = 20_000
+FAVORITE_STATUS_MAX_IDS = 200
+
+
+@dataclass(frozen=True)
+class FavoriteShop:
+    shop_id: UUID
+    name: str
+    address: Optional[str]
+    lat: Optional[float]
+    lng: Optional[float]
+    is_active: bool
+    added_at: Optional[datetime]
+
+
+@dataclass
+class _CachedFavorites:
+    shops: List[FavoriteShop]
+    ids: Set[UUID]
+    stale_at: float  # time.monotonic()
+
+
+class FavoritesCache:
+    """Избранные магазины пользователя (уже соединённые с shops), в памяти процесса.
+
+    Запись пользователя сбрасывается при добавлении или удалении избранного
+    и при изменении любого магазина из его списка — на всех воркерах через
+    события favorites.changed и shop.changed. Список, загруженный из БД, пока
+    пришло такое событие, отдаётся, но в кэш не попадает.
+    """
+
+    def __init__(self, ttl: float = FAVORITES_CACHE_TTL_SECONDS, max_users: int = MAX_CACHED_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._users: Dict[UUID, _CachedFavorites] = {}
+        # shop_id -> пользователи, у которых магазин в закэшированном списке
+        self._holders: Dict[UUID, Set[UUID]] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = {}
+        # поколения сбросов: user_id -> номер последнего сброса; отдельно — для событий магазинов
+        self._generations: Dict[UUID, int] = {}
+        self._shops_generation = 0
+        self._counter = 0
+
+    def peek(self, user_id: UUID) -> Optional[_CachedFavorites]:
+        entry = self._users.get(user_id)
+        if entry is not None and entry.stale_at > time.monotonic():
+            return entry
+        return None
+
+    async def get(self, db: AsyncSession, user_id: UUID) -> _CachedFavorites:
+        entry = self.peek(user_id)
+        if entry is not None:
+            return entry
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            entry = self.peek(user_id)
+            if entry is None:
+                generation = self._generation(user_id)
+                entry = self._store(user_id, await _load(db, user_id), generation)
+        self._locks.pop(user_id, None)
+        return entry
+
+    def _generation(self, user_id: UUID) -> Tuple[int, int]:
+        return self._generations.get(user_id, 0), self._shops_generation
+
+    def _store(self, user_id: UUID, shops: List[FavoriteShop], generation: Tuple[int, int]) -> _CachedFavorites:
+        entry = _CachedFavorites(shops=shops, ids={s.shop_id for s in shops}, stale_at=time.monotonic() + self.ttl)
+        if generation != self._generation(user_id):
+            # пока шла загрузка, список или магазин изменились: отдаём, но не кэшируем
+            return entry
+        self._drop(user_id)
+        if len(self._users) >= self.max_users:
+            self._drop(next(iter(self._users)))
+        self._users[user_id] = entry
+        for shop_id in entry.ids:
+            self._holders.setdefault(shop_id, set()).add(user_id)
+        return entry
+
+    def invalidate(self, user_id: UUID) -> None:
+        self._counter += 1
+        self._generations.pop(user_id, None)
+        self._generations[user_id] = self._counter
+        while len(self._generations) > self.max_users:
+            self._generations.pop(next(iter(self._generations)))
+        self._drop(user_id)
+
+    def _drop(self, user_id: UUID) -> None:
+        entry = self._users.pop(user_id, None)
+        if entry is None:
+            return
+        for shop_id in entry.ids:
+            holders = self._holders.get(shop_id)
+            if holders is not None:
+                holders.discard(user_id)
+                if not holders:
+                    del self._holders[shop_id]
+
+    def invalidate_shop(self, shop_id: UUID) -> None:
+        # загружаемые сейчас списки ещё не в _holders — сбрасываем их все
+        self._shops_generation += 1
+        for user_id in list(self._holders.get(shop_id, ())):
+            self.invalidate(user_id)
+
+    def clear(self) -> None:
+        self._shops_generation += 1
+        self._users.clear()
+        self._holders.clear()
+
+
+favorites_cache = FavoritesCache()
+
+
+async def _load(db: AsyncSession, user_id: UUID) -> List[FavoriteShop]:
+    # поиск по user_id идёт по uq_user_shop_favorite (user_id, shop_id)
+    res = await db.execute(
+        select(
+            Shop.id, Shop.shop_name, Shop.address, Shop.lat, Shop.lng, Shop.is_active,
+            UserFavorite.created_at,
+        )
+        .join(Shop, Shop.id == UserFavorite.shop_id)
+        .where(UserFavorite.user_id == user_id)
+        .order_by(UserFavorite.created_at.desc(), Shop.id)
+    )
+    return [
+        FavoriteShop(
+            shop_id=row.id, name=row.shop_name, address=row.address, lat=row.lat, lng=row.lng,
+            is_active=row.is_active is not False, added_at=row.created_at,
+        )
+        for row in res
+    ]
+
+
+async def list_favorites(db: AsyncSession, user_id: UUID) -> List[FavoriteShop]:
+    """Избранные магазины пользователя, новые первыми; один запрос при промахе кэша."""
+    return (await favorites_cache.get(db, user_id)).shops
+
+
+async def favorite_ids(db: AsyncSession, user_id: UUID, shop_ids: Iterable[UUID]) -> Set[UUID]:
+    """Какие из shop_ids в избранном у пользователя."""
+    ids = (await favorites_cache.get(db, user_id)).ids
+    return {shop_id for shop_id in shop_ids if shop_id in ids}
+
+
+async def add_favorite(db: AsyncSession, user_id: UUID, shop_id: UUID) -> UserFavorite:
+    """Добавляет магазин в избранное (повтор не ошибка); commit и publish — на вызывающем."""
+    await db.execute(
+        dialect_insert(db, UserFavorite)
+        .values(user_id=user_id, shop_id=shop_id)
+        .on_conflict_do_nothing(index_elements=[UserFavorite.user_id, UserFavorite.shop_id])
+    )
+    res = await db.execute(
+        select(UserFavorite).where(UserFavorite.user_id == user_id, UserFavorite.shop_id == shop_id)
+    )
+    return res.scalar_one()
+
+
+async def remove_favorite(db: AsyncSession, user_id: UUID, shop_id: UUID) -> bool:
+    """False — магазина не было в избранном; commit и publish — на вызывающем."""
+    res = await db.execute(
+        delete(UserFavorite).where(UserFavorite.user_id == user_id, UserFavorite.shop_id == shop_id)
+    )
+    return res.rowcount > 0
+
+
+async def publish_favorites_changed(user_id: UUID) -> None:
+    """После commit: сбрасывает избранное пользователя в кэшах всех воркеров."""
+    await broker.publish(FAVORITES_TOPIC, {"type": "favorites.changed", "user_id": str(user_id)})
+
+
+def _on_event(topic: str, event: dict) -> None:
+    if topic == FAVORITES_TOPIC:
+        favorites_cache.invalidate(UUID(event["user_id"]))
+    elif topic == SHOPS_TOPIC:
+        if event["type"] == "shops.reloaded":
+            favorites_cache.clear()
+        else:
+            favorites_cache.invalidate_shop(UUID(event["shop_id"]))
+
+
+broker.add_hook(_on_event)
@@ -0,0 +1,178 @@
+# app/crud/webhook_ingest.py
+import asyncio
+import struct
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.segment_log import SegmentLog, read_segment
+from app.core.webhook import loads
+from app.crud.base import dialect_insert
+from app.crud.order import set_order_status
+from app.crud.order_events import publish_order_event
+from app.logger import logger
+from app.models.webhook_event import WebhookEvent
+from app.schemas.webhook_event import OrderStatusWebhook
+
+# строк webhook_events в одном INSERT (executemany + ON CONFLICT DO NOTHING)
+WEBHOOK_WRITE_BATCH = 500
+DRAIN_INTERVAL_SECONDS = 0.2
+RETRY_SECONDS = 2.0
+RETRY_MAX_SECONDS = 60.0
+# столько неудачных попыток подряд — и сегмент уходит в dead letter (~4 минуты с паузами)
+SEGMENT_MAX_ATTEMPTS = 8
+STOP_DRAIN_SECONDS = 5.0
+
+# id события (16 байт) и время приёма (unix-время, double), затем тело запроса как есть
+_HEADER = struct.Struct("<16sd")
+
+Record = Tuple[uuid.UUID, datetime, bytes]
+
+
+def encode_record(event_id: uuid.UUID, received_at: datetime, body: bytes) -> bytes:
+    return _HEADER.pack(event_id.bytes, received_at.timestamp()) + body
+
+
+def decode_record(data: bytes) -> Record:
+    raw_id, ts = _HEADER.unpack_from(data)
+    return uuid.UUID(bytes=raw_id), datetime.fromtimestamp(ts, timezone.utc), data[_HEADER.size:]
+
+
+class WebhookIngest:
+    """Приём вебхуков без ожидания БД: событие пишется в локальный журнал и сразу подтверждается.
+
+    Фоновая задача переносит закрытые сегменты журнала в webhook_events
+    пачками и применяет статусы заказов. id события выдаётся при приёме,
+    поэтому повтор сегмента после падения (между commit и удалением файла)
+    не создаёт дублей и не меняет статус второй раз. Сегмент, который не
+    записывается SEGMENT_MAX_ATTEMPTS раз подряд, откладывается в dead letter,
+    чтобы не задерживать следующие.
+    """
+
+    def __init__(self, root: str):
+        self.log = SegmentLog(root)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._attempts: Dict[str, int] = {}  # путь сегмента -> неудачных попыток подряд
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if not self.log.is_open:
+            self.log.open()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="webhook-ingest")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # последний сегмент стараемся записать сразу; не вышло — повторится при старте.
+        # Журнал закрывается только после: close() отпускает слот, и сегменты уже не читаются
+        try:
+            await self.log.seal()
+            await asyncio.wait_for(self._drain_sealed(), STOP_DRAIN_SECONDS)
+        except Exception:
+            logger.exception("webhook ingest: final drain failed, segments will be replayed on start")
+        finally:
+            await self.log.close()
+
+    async def submit(self, body: bytes) -> uuid.UUID:
+        """Сохраняет тело вебхука на диск (fsync) и возвращает id будущей строки webhook_events."""
+        self.start()
+        event_id = uuid.uuid4()
+        await self.log.append(encode_record(event_id, datetime.now(timezone.utc), body))
+        return event_id
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                await self.log.roll()
+                await self._drain_sealed()
+                failures, delay = 0, DRAIN_INTERVAL_SECONDS
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # сегмент остаётся на диске и будет записан на следующей итерации
+                logger.exception("webhook ingest: drain failed")
+                failures += 1
+                delay = min(RETRY_SECONDS * 2 ** (failures - 1), RETRY_MAX_SECONDS)
+            await asyncio.sleep(delay)
+
+    async def _drain_sealed(self) -> None:
+        if not self.log.dir:
+            return
+        for path in self.log.sealed():
+            try:
+                records = [decode_record(r) for r in read_segment(path)]
+                for i in range(0, len(records), WEBHOOK_WRITE_BATCH):
+                    await write_events(records[i:i + WEBHOOK_WRITE_BATCH])
+            except Exception:
+                attempts = self._attempts.get(path, 0) + 1
+                if attempts < SEGMENT_MAX_ATTEMPTS:
+                    self._attempts[path] = attempts
+                    raise
+                self._attempts.pop(path, None)
+                target = self.log.dead_letter(path)
+                logger.exception(f"webhook ingest: segment failed {attempts} times, moved to {target}")
+                continue
+            self._attempts.pop(path, None)
+            self.log.remove(path)
+
+
+def _event_row(event_id: uuid.UUID, received_at: datetime, body: bytes) -> Tuple[dict, Optional[OrderStatusWebhook]]:
+    # тело уже проверено при приёме; один разбор даёт и payload, и типизированные поля.
+    # Сегменты, принятые до ужесточения схемы, могут не пройти проверку — такое
+    # событие сохраняется как есть, но статус заказа не трогает
+    payload = loads(body)
+    try:
+        event = OrderStatusWebhook.model_validate(payload)
+        event_type = event.event
+    except ValidationError as e:
+        logger.warning(f"[WEBHOOK] event {event_id}: cannot decode, status not applied ({e.error_count()} errors)")
+        event = None
+        event_type = payload.get("event") if isinstance(payload, dict) else None
+    row = {
+        "id": event_id, "received_at": received_at,
+        "event_type": event_type if isinstance(event_type, str) and event_type else "unknown",
+        "payload": payload,
+    }
+    return row, event
+
+
+async def write_events(records: List[Record]) -> None:
+    """Одна транзакция на пачку: INSERT событий и статусы заказов только для новых строк."""
+    decoded = [_event_row(*r) for r in records]
+    rows = [row for row, _ in decoded]
+    orders = []
+    async with AsyncSessionLocal() as db:
+        stmt = (
+            dialect_insert(db, WebhookEvent)
+            .on_conflict_do_nothing(index_elements=[WebhookEvent.id])
+            .returning(WebhookEvent.id)
+        )
+        inserted = set((await db.execute(stmt, rows)).scalars())
+        for row, event in decoded:
+            if row["id"] not in inserted or event is None or not (event.order_id and event.status):
+                continue
+            order = await set_order_status(db, event.order_id, event.status)
+            if order is not None:
+                orders.append(order)
+        await db.commit()
+    # будим клиентов, ждущих статус заказа, и очередь магазина
+    for order in orders:
+        await publish_order_event(order, "order.status")
+    logger.info(f"[WEBHOOK] {len(inserted)} events saved ({len(rows) - len(inserted)} replayed duplicates)")
+
+
+webhook_ingest = WebhookIngest(settings.WEBHOOK_QUEUE_DIR)
@@ -1,16 +1,16 @@
-from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Boolean, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-import uuid
-from app.core.database import Base
-class DeviceToken(Base):
-    __tablename__ = "device_tokens"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("app_users.id", ondelete="CASCADE"), nullable=False)
-    token = Column(String, unique=True, nullable=False)
-    platform = Column(String, nullable=True)  # Например, "iOS", "Android"
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-
+from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Boolean, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+from app.core.database import Base
+class DeviceToken(Base):
+    __tablename__ = "device_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("app_users.id", ondelete="CASCADE"), nullable=False)
+    token = Column(String, unique=True, nullable=False)
+    platform = Column(String, nullable=True)  # Например, "iOS", "Android"
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
     user = relationship("User", back_populates="device_tokens")
\ No newline at end of file
@@ -1,21 +1,28 @@
-import sqlalchemy as sa
-from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Boolean, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-import uuid
-
-from app.core.database import Base
-
-class TimeSlot(Base):
-    __tablename__ = "time_slots"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    shop_id = Column(UUID(as_uuid=True), ForeignKey("shops.id", ondelete="CASCADE"), nullable=False)
-    start = Column(DateTime(timezone=True))
-    end = Column(DateTime(timezone=True))
-    capacity = Column(Integer)
-    is_active = Column(Boolean, default=True)
-
-    shop = relationship("Shop", back_populates="time_slots")
-    slot_holds = relationship("SlotHold", back_populates="slot", cascade="all, delete-orphan")
-    orders = relationship("Order", back_populates="slot", cascade="all, delete-orphan")
+import sqlalchemy as sa
+from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Boolean, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+
+from app.core.database import Base
+from sqlalchemy import UniqueConstraint
+
+class TimeSlot(Base):
+    __tablename__ = "time_slots"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    shop_id = Column(UUID(as_uuid=True), ForeignKey("shops.id", ondelete="CASCADE"), nullable=False)
+    start = Column(DateTime(timezone=True))
+    end = Column(DateTime(timezone=True))
+    capacity = Column(Integer)
+    is_active = Column(Boolean, default=True)
+    # Счётчики занятости слота, поддерживаются атомарно в crud/slot.py
+    held_count = Column(Integer, nullable=False, default=0, server_default="0")
+    confirmed_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # генератор слотов пропускает уже существующие (ON CONFLICT DO NOTHING)
+    __table_args__ = (UniqueConstraint("shop_id", "start", name="uq_time_slot_shop_start"),)
+
+    shop = relationship("Shop", back_populates="time_slots")
+    slot_holds = relationship("SlotHold", back_populates="slot", cascade="all, delete-orphan")
+    orders = relationship("Order", back_populates="slot", cascade="all, delete-orphan")
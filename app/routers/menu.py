@@ -0,0 +1,23 @@
+# app/routers/menu.py
+import logging
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import List, Optional
+from app.core.database import get_db
+from app.crud.menu_search import SEARCH_LIMIT_MAX, group_by_shop, search_menu
+from app import schemas
+
+logger = logging.getLogger("routers.menu")
+router = APIRouter(prefix="/menu", tags=["menu"])
+
+@router.get("/search", response_model=List[schemas.MenuSearchShop])
+async def route_search_menu(
+    q: str = Query(..., min_length=2, max_length=100),
+    shop_id: Optional[List[UUID]] = Query(None),
+    limit: int = Query(50, ge=1, le=SEARCH_LIMIT_MAX),
+    db: AsyncSession = Depends(get_db),
+):
+    """Поиск позиций по названию во всех (или в перечисленных shop_id) магазинах, по магазинам."""
+    hits = await search_menu(db, q, shop_ids=shop_id, limit=limit)
+    return group_by_shop(hits)
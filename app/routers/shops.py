@@ -1,79 +1,282 @@
-# app/routers/shop.py
-import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import UUID
-from typing import Optional, List
-from app.schemas.shop import ShopCreate, ShopRead, ShopUpdate
-from app.crud.shop import list_shops, get_shop, create_shop, update_shop, delete_shop
-from app.core.database import get_db
-from typing import List
-from app import crud, schemas
-
-logger = logging.getLogger("routers.shop")
-router = APIRouter(prefix="/shops", tags=["shops"])
-
-@router.get("/", response_model=List[ShopRead])
-async def route_list_shops(active: Optional[bool] = Query(None), db: AsyncSession = Depends(get_db)):
-    if active is True:
-        shops = await list_shops(db, active_only=True)
-    else:
-        shops = await list_shops(db)
-    return shops
-
-@router.get("/{shop_id}", response_model=ShopRead)
-async def route_get_shop(shop_id: UUID, db: AsyncSession = Depends(get_db)):
-    shop = await get_shop(db, shop_id)
-    if not shop:
-        raise HTTPException(404, "Shop not found")
-    return shop
-
-@router.post("/", response_model=ShopRead, status_code=201)
-async def route_create_shop(payload: ShopCreate, db: AsyncSession = Depends(get_db)):
-    obj = await create_shop(db, payload)
-    return obj
-
-@router.put("/{shop_id}", response_model=ShopRead)
-async def route_update_shop(shop_id: UUID, payload: ShopUpdate, db: AsyncSession = Depends(get_db)):
-    shop = await get_shop(db, shop_id)
-    if not shop:
-        raise HTTPException(404, "Shop not found")
-    updated = await update_shop(db, shop, payload)
-    return updated
-
-@router.delete("/{shop_id}", response_model=ShopRead)
-async def route_delete_shop(shop_id: UUID, db: AsyncSession = Depends(get_db)):
-    shop = await get_shop(db, shop_id)
-    if not shop:
-        raise HTTPException(404, "Shop not found")
-    deleted = await delete_shop(db, shop)
-    return deleted
-
-# === OWNER ACCOUNTS ===
-@router.post("/owners", response_model=schemas.OwnerAccount)
-async def create_owner(owner_in: schemas.OwnerAccountCreate, db: AsyncSession = Depends(get_db)):
-    logger.info(f"Creating owner account: {owner_in.email}")
-    return await crud.owner_account.create(db, owner_in)
-
-
-@router.post("/owners/{owner_id}/shops", response_model=schemas.OwnerShop)
-async def link_owner_shop(owner_id: str, link_in: schemas.OwnerShopCreate, db: AsyncSession = Depends(get_db)):
-    link_in.owner_id = owner_id
-    logger.info(f"Linking owner {owner_id} to shop {link_in.shop_id}")
-    return await crud.owner_shop.create(db, link_in)
-
-
-# === SHOP ACCOUNTS ===
-@router.post("/{shop_id}/accounts", response_model=schemas.ShopAccount)
-async def create_shop_account(shop_id: str, acc_in: schemas.ShopAccountCreate, db: AsyncSession = Depends(get_db)):
-    acc_in.shop_id = shop_id
-    logger.info(f"Creating shop account for shop={shop_id}")
-    return await crud.shop_account.create(db, acc_in)
-
-
-# === SHOP DEVICE TOKENS ===
-@router.post("/accounts/{acc_id}/tokens", response_model=schemas.ShopDeviceToken)
-async def register_shop_token(acc_id: str, token_in: schemas.ShopDeviceTokenCreate, db: AsyncSession = Depends(get_db)):
-    token_in.shop_account_id = acc_id
-    logger.info(f"Registering shop device token for account={acc_id}")
+# app/routers/shop.py
+import json
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import Optional, List
+from datetime import date, datetime
+from app.schemas.shop import ShopCreate, ShopNearby, ShopRead, ShopUpdate
+from app.crud.shop import list_shops, shops_query, get_shop, get_shops, create_shop, update_shop, delete_shop
+from app.crud.shop_geo import NEARBY_RADIUS_MAX_M, geo_index
+from app.crud.shop_hours import open_hours_index
+from app.crud.availability import availability_grid
+from app.crud.slot import generate_slots
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.pubsub import broker
+from app.core.streaming import STREAM_FORMAT_PATTERN, stream_format, streaming_response
+from app.crud.order import apply_transitions, list_active_orders
+from app.crud.menu_cache import menu_cache, publish_availability_changed, publish_menu_changed
+from app.crud.menu_item import set_availability
+from app.crud.menu_import import export_menu, import_menu
+from app.crud.order_events import order_event, publish_order_events, shop_topic
+from app import crud, schemas
+
+logger = logging.getLogger("routers.shop")
+router = APIRouter(prefix="/shops", tags=["shops"])
+
+QUEUE_HEARTBEAT_SECONDS = 15.0
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _queue_events(shop_id: UUID):
+    # подписываемся до снимка, чтобы не потерять события между ними;
+    # соединение с БД нужно только на время снимка
+    with broker.subscribe(shop_topic(shop_id)) as sub:
+        async with AsyncSessionLocal() as db:
+            orders = await list_active_orders(db, shop_id)
+        yield _sse({"type": "snapshot", "orders": [order_event(o, "order") for o in orders]})
+        while True:
+            event = await sub.get(timeout=QUEUE_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ": ping\n\n"
+            elif event["type"] == "resync":
+                # подписчик отстал: отдаём свежий снимок вместо потерянных событий
+                async with AsyncSessionLocal() as db:
+                    orders = await list_active_orders(db, shop_id)
+                yield _sse({"type": "snapshot", "orders": [order_event(o, "order") for o in orders]})
+            else:
+                yield _sse(event)
+
+@router.get("/", response_model=List[ShopRead])
+async def route_list_shops(
+    active: Optional[bool] = Query(None),
+    open_now: Optional[bool] = Query(None),
+    open_at: Optional[datetime] = Query(None, description="ISO-время; без зоны — UTC"),
+    format: Optional[str] = Query(None, pattern=STREAM_FORMAT_PATTERN),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Магазины; ?format=ndjson|csv или Accept: application/x-ndjson — потоком."""
+    keep = None
+    if open_now is not None or open_at is not None:
+        # по скомпилированным часам работы, без разбора open_hours на каждый запрос
+        await open_hours_index.ensure(db)
+        open_ids = open_hours_index.open_at(open_at)
+        want_open = open_now is not False
+        keep = lambda s: (s.id in open_ids) == want_open
+    fmt = stream_format(format, accept)
+    if fmt:
+        return streaming_response(shops_query(active_only=active is True), ShopRead, fmt, "shops", keep)
+    shops = await list_shops(db, active_only=active is True)
+    return [s for s in shops if keep is None or keep(s)]
+
+# объявлен до /{shop_id}, иначе "nearby" разбирается как id
+@router.get("/nearby", response_model=List[ShopNearby])
+async def route_nearby_shops(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(3000, gt=0, le=NEARBY_RADIUS_MAX_M, description="метры"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Активные магазины в радиусе от точки, ближайшие первыми."""
+    await geo_index.ensure(db)
+    found = geo_index.nearby(lat, lng, radius, limit)
+    distances = dict(found)
+    shops = await get_shops(db, [shop_id for shop_id, _ in found])
+    return [
+        ShopNearby(**ShopRead.model_validate(shop, from_attributes=True).model_dump(), distance_m=round(distances[shop.id], 1))
+        for shop in shops
+    ]
+
+@router.get("/{shop_id}", response_model=ShopRead)
+async def route_get_shop(shop_id: UUID, db: AsyncSession = Depends(get_db)):
+    shop = await get_shop(db, shop_id)
+    if not shop:
+        raise HTTPException(404, "Shop not found")
+    return shop
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+@router.get("/{shop_id}/menu")
+async def route_shop_menu(
+    shop_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Меню магазина деревом позиции -> группы опций -> опции; готовые байты из кэша, ETag по версии меню."""
+    menu = menu_cache.peek(shop_id)
+    if menu is None:
+        menu = await menu_cache.get(db, shop_id)
+        if menu is None:
+            raise HTTPException(404, "Shop not found")
+    headers = {"ETag": menu.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, menu.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=menu.body, media_type="application/json", headers=headers)
+
+@router.patch("/{shop_id}/menu/availability", response_model=schemas.MenuAvailabilityResult)
+async def route_menu_availability(shop_id: UUID, payload: schemas.MenuAvailabilityUpdate, db: AsyncSession = Depends(get_db)):
+    """Пакетно включает/выключает позиции и опции меню («закончилось овсяное молоко»)."""
+    items = {t.id: t.available for t in payload.items}
+    options = {t.id: t.available for t in payload.options}
+    if not await get_shop(db, shop_id):
+        raise HTTPException(404, "Shop not found")
+    version, changed_items, changed_options = await set_availability(db, shop_id, items, options)
+    await db.commit()
+    await publish_availability_changed(shop_id, version, changed_items, changed_options)
+    not_found = [i for i in items if i not in changed_items] + [i for i in options if i not in changed_options]
+    return schemas.MenuAvailabilityResult(
+        version=version, items=list(changed_items), options=list(changed_options), not_found=not_found,
+    )
+
+@router.post("/{shop_id}/menu/import", response_model=schemas.MenuImportResult)
+async def route_import_menu(
+    shop_id: UUID,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|json)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Потоковый импорт меню (CSV или JSON/NDJSON) с upsert по названиям; формат — из ?format или Content-Type."""
+    if not await get_shop(db, shop_id):
+        raise HTTPException(404, "Shop not found")
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "json")
+    try:
+        result = await import_menu(db, shop_id, request.stream(), fmt)
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(422, str(e))
+    await db.commit()
+    await publish_menu_changed(shop_id, result.version)
+    return result
+
+@router.get("/{shop_id}/menu/export")
+async def route_export_menu(shop_id: UUID, format: str = Query("json", pattern="^(csv|json)$")):
+    """Потоковая выгрузка меню в формате импорта."""
+    async with AsyncSessionLocal() as db:
+        if not await get_shop(db, shop_id):
+            raise HTTPException(404, "Shop not found")
+    return StreamingResponse(
+        export_menu(shop_id, format),
+        media_type="text/csv" if format == "csv" else "application/json",
+        headers={"Content-Disposition": f'attachment; filename="menu-{shop_id}.{format}"'},
+    )
+
+@router.get("/{shop_id}/queue/stream")
+async def route_shop_queue_stream(shop_id: UUID):
+    """SSE-поток очереди магазина: снимок активных заказов, затем события создания и смены статуса."""
+    async with AsyncSessionLocal() as db:
+        if not await get_shop(db, shop_id):
+            raise HTTPException(404, "Shop not found")
+    return StreamingResponse(
+        _queue_events(shop_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/{shop_id}/orders/transitions", response_model=schemas.OrderTransitionResult)
+async def route_order_transitions(shop_id: UUID, payload: schemas.OrderTransitionRequest, db: AsyncSession = Depends(get_db)):
+    """Пакетная смена статусов заказов магазина; недопустимые переходы возвращаются в rejected."""
+    ids = [t.order_id for t in payload.transitions]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(422, "Each order may appear only once")
+    applied, rejected = await apply_transitions(db, shop_id, [(t.order_id, t.to_status) for t in payload.transitions])
+    await db.commit()
+    await publish_order_events(shop_id, applied, "order.status")
+    logger.info(f"Transitions for shop={shop_id}: applied={len(applied)} rejected={len(rejected)}")
+    return schemas.OrderTransitionResult(
+        applied=[schemas.OrderStatusRead(order_id=r.id, status=r.status, version=r.version) for r in applied],
+        rejected=[schemas.OrderTransitionRejected(order_id=order_id, reason=reason) for order_id, reason in rejected],
+    )
+
+@router.get("/{shop_id}/availability", response_model=schemas.ShopAvailability)
+async def route_shop_availability(shop_id: UUID, date: Optional[date] = Query(None), db: AsyncSession = Depends(get_db)):
+    grid = await availability_grid.get_day(db, shop_id, date)
+    if grid is None:
+        raise HTTPException(404, "Shop not found")
+    return schemas.ShopAvailability(
+        shop_id=shop_id,
+        date=grid.day,
+        slots=[
+            schemas.SlotAvailabilityCell(
+                slot_id=c.slot_id, start=c.start, end=c.end,
+                capacity=c.capacity, remaining_capacity=c.remaining,
+            )
+            for c in grid.cells
+        ],
+    )
+
+@router.post("/{shop_id}/slots/generate", response_model=schemas.SlotGenerateResult)
+async def route_generate_slots(shop_id: UUID, payload: schemas.SlotGenerateRequest, db: AsyncSession = Depends(get_db)):
+    shop = await get_shop(db, shop_id)
+    if not shop:
+        raise HTTPException(404, "Shop not found")
+    try:
+        created = await generate_slots(
+            db, shop, days=payload.days,
+            granularity_minutes=payload.granularity_minutes, capacity=payload.capacity,
+        )
+    except ValueError as e:
+        raise HTTPException(422, f"Invalid open_hours: {e}")
+    await db.commit()
+    logger.info(f"Generated {created} slots for shop={shop_id}")
+    return schemas.SlotGenerateResult(shop_id=shop_id, created=created)
+
+@router.post("/", response_model=ShopRead, status_code=201)
+async def route_create_shop(payload: ShopCreate, db: AsyncSession = Depends(get_db)):
+    obj = await create_shop(db, payload)
+    return obj
+
+@router.put("/{shop_id}", response_model=ShopRead)
+async def route_update_shop(shop_id: UUID, payload: ShopUpdate, db: AsyncSession = Depends(get_db)):
+    shop = await get_shop(db, shop_id)
+    if not shop:
+        raise HTTPException(404, "Shop not found")
+    updated = await update_shop(db, shop, payload)
+    return updated
+
+@router.delete("/{shop_id}", response_model=ShopRead)
+async def route_delete_shop(shop_id: UUID, db: AsyncSession = Depends(get_db)):
+    shop = await get_shop(db, shop_id)
+    if not shop:
+        raise HTTPException(404, "Shop not found")
+    deleted = await delete_shop(db, shop)
+    return deleted
+
+# === OWNER ACCOUNTS ===
+@router.post("/owners", response_model=schemas.OwnerAccount)
+async def create_owner(owner_in: schemas.OwnerAccountCreate, db: AsyncSession = Depends(get_db)):
+    logger.info(f"Creating owner account: {owner_in.email}")
+    return await crud.owner_account.create(db, owner_in)
+
+
+@router.post("/owners/{owner_id}/shops", response_model=schemas.OwnerShop)
+async def link_owner_shop(owner_id: str, link_in: schemas.OwnerShopCreate, db: AsyncSession = Depends(get_db)):
+    link_in.owner_id = owner_id
+    logger.info(f"Linking owner {owner_id} to shop {link_in.shop_id}")
+    return await crud.owner_shop.create(db, link_in)
+
+
+# === SHOP ACCOUNTS ===
+@router.post("/{shop_id}/accounts", response_model=schemas.ShopAccount)
+async def create_shop_account(shop_id: str, acc_in: schemas.ShopAccountCreate, db: AsyncSession = Depends(get_db)):
+    acc_in.shop_id = shop_id
+    logger.info(f"Creating shop account for shop={shop_id}")
+    return await crud.shop_account.create(db, acc_in)
+
+
+# === SHOP DEVICE TOKENS ===
+@router.post("/accounts/{acc_id}/tokens", response_model=schemas.ShopDeviceToken)
+async def register_shop_token(acc_id: str, token_in: schemas.ShopDeviceTokenCreate, db: AsyncSession = Depends(get_db)):
+    token_in.shop_account_id = acc_id
+    logger.info(f"Registering shop device token for account={acc_id}")
     return await crud.shop_device_token.create(db, token_in)
\ No newline at end of file
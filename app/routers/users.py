@@ -1,98 +1,156 @@
-# app/routers/user.py
-import logging
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import UUID
-from app.schemas.user import UserCreate, UserRead, UserUpdate
-from app.crud.user import list_users, get_user, create_user, update_user, delete_user
-from app.core.database import get_db
-from typing import List
-from app.models import User as UserModel
-from app.core.database import get_db
-from app import crud, schemas
-
-logger = logging.getLogger("routers.user")
-router = APIRouter(prefix="/users", tags=["users"])
-
-@router.get("/", response_model=list[UserRead])
-async def route_list_users(db: AsyncSession = Depends(get_db)):
-    logger.info("GET /users")
-    users = await list_users(db)
-    return users
-
-@router.get("/{user_id}", response_model=UserRead)
-async def route_get_user(user_id: UUID, db: AsyncSession = Depends(get_db)):
-    user = await get_user(db, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-@router.post("/", response_model=UserRead, status_code=201)
-async def route_create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
-    obj = await create_user(db, payload)
-    return obj
-
-@router.put("/{user_id}", response_model=UserRead)
-async def route_update_user(user_id: UUID, payload: UserUpdate, db: AsyncSession = Depends(get_db)):
-    user = await get_user(db, user_id)
-    if not user:
-        raise HTTPException(404, "User not found")
-    updated = await update_user(db, user, payload)
-    return updated
-
-@router.delete("/{user_id}", response_model=UserRead)
-async def route_delete_user(user_id: UUID, db: AsyncSession = Depends(get_db)):
-    user = await get_user(db, user_id)
-    if not user:
-        raise HTTPException(404, "User not found")
-    deleted = await delete_user(db, user)
-    return deleted
-
-@router.patch("/{user_id}/city", response_model=UserRead)
-async def update_city(
-    user_id: UUID,
-    data: UserUpdate,
-    db: AsyncSession = Depends(get_db),
-):
-    user = await get_user(db, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if data.city is None:
-        raise HTTPException(status_code=400, detail="City is required")
-
-    user.city = data.city
-    await db.commit()
-    await db.refresh(user)
-
-    return user
-
-# === SESSIONS ===
-@router.post("/{user_id}/sessions", response_model=schemas.Session)
-async def create_session(user_id: str, sess_in: schemas.SessionCreate, db: AsyncSession = Depends(get_db)):
-    logger.info(f"Creating session for user={user_id}")
-    sess_in.user_id = user_id
-    return await crud.session.create(db, sess_in)
-
-
-# === DEVICE TOKENS ===
-@router.post("/{user_id}/tokens", response_model=schemas.DeviceToken)
-async def register_device_token(user_id: str, token_in: schemas.DeviceTokenCreate, db: AsyncSession = Depends(get_db)):
-    token_in.user_id = user_id
-    logger.info(f"Registering device token for user={user_id}")
-    return await crud.device_token.create(db, token_in)
-
-
-# === FAVORITES ===
-@router.post("/{user_id}/favorites", response_model=schemas.UserFavorite)
-async def add_favorite(user_id: str, fav_in: schemas.UserFavoriteCreate, db: AsyncSession = Depends(get_db)):
-    fav_in.user_id = user_id
-    logger.info(f"Adding favorite shop={fav_in.shop_id} for user={user_id}")
-    return await crud.user_favorite.create(db, fav_in)
-
-
-@router.get("/{user_id}/favorites", response_model=List[schemas.UserFavorite])
-async def list_favorites(user_id: str, db: AsyncSession = Depends(get_db)):
-    logger.info(f"Listing favorites for user={user_id}")
-    result = await crud.user_favorite.get_multi(db)
-    return [f for f in result if str(f.user_id) == user_id]
\ No newline at end of file
+# app/routers/user.py
+import logging
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from app.schemas.user import UserCreate, UserRead, UserUpdate
+from app.crud.user import list_users, get_user, create_user, update_user, delete_user
+from app.core.database import get_db
+from app.core.streaming import STREAM_FORMAT_PATTERN, stream_format, streaming_response
+from typing import List, Optional
+from app.models import User as UserModel
+from app import crud, schemas
+from app.crud import user_favorite as favorites
+from app.crud.shop import get_shop
+from app.crud.shop_geo import haversine_m
+from app.crud.shop_hours import open_hours_index
+
+logger = logging.getLogger("routers.user")
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.get("/", response_model=list[UserRead])
+async def route_list_users(
+    format: Optional[str] = Query(None, pattern=STREAM_FORMAT_PATTERN),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Все пользователи; ?format=ndjson|csv или Accept: application/x-ndjson — потоком."""
+    logger.info("GET /users")
+    fmt = stream_format(format, accept)
+    if fmt:
+        return streaming_response(select(UserModel), UserRead, fmt, "users")
+    users = await list_users(db)
+    return users
+
+@router.get("/{user_id}", response_model=UserRead)
+async def route_get_user(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    user = await get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.post("/", response_model=UserRead, status_code=201)
+async def route_create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    obj = await create_user(db, payload)
+    return obj
+
+@router.put("/{user_id}", response_model=UserRead)
+async def route_update_user(user_id: UUID, payload: UserUpdate, db: AsyncSession = Depends(get_db)):
+    user = await get_user(db, user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    updated = await update_user(db, user, payload)
+    return updated
+
+@router.delete("/{user_id}", response_model=UserRead)
+async def route_delete_user(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    user = await get_user(db, user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    deleted = await delete_user(db, user)
+    return deleted
+
+@router.patch("/{user_id}/city", response_model=UserRead)
+async def update_city(
+    user_id: UUID,
+    data: UserUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    user = await get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if data.city is None:
+        raise HTTPException(status_code=400, detail="City is required")
+
+    user.city = data.city
+    await db.commit()
+    await db.refresh(user)
+
+    return user
+
+# === SESSIONS ===
+@router.post("/{user_id}/sessions", response_model=schemas.Session)
+async def create_session(user_id: str, sess_in: schemas.SessionCreate, db: AsyncSession = Depends(get_db)):
+    logger.info(f"Creating session for user={user_id}")
+    sess_in.user_id = user_id
+    return await crud.session.create(db, sess_in)
+
+
+# === DEVICE TOKENS ===
+@router.post("/{user_id}/tokens", response_model=schemas.DeviceToken)
+async def register_device_token(user_id: str, token_in: schemas.DeviceTokenCreate, db: AsyncSession = Depends(get_db)):
+    token_in.user_id = user_id
+    logger.info(f"Registering device token for user={user_id}")
+    return await crud.device_token.create(db, token_in)
+
+
+# === FAVORITES ===
+@router.post("/{user_id}/favorites", response_model=schemas.UserFavorite, status_code=201)
+async def add_favorite(user_id: UUID, fav_in: schemas.UserFavoriteCreate, db: AsyncSession = Depends(get_db)):
+    logger.info(f"Adding favorite shop={fav_in.shop_id} for user={user_id}")
+    if not await get_user(db, user_id):
+        raise HTTPException(404, "User not found")
+    if not await get_shop(db, fav_in.shop_id):
+        raise HTTPException(404, "Shop not found")
+    fav = await favorites.add_favorite(db, user_id, fav_in.shop_id)
+    await db.commit()
+    await favorites.publish_favorites_changed(user_id)
+    return fav
+
+
+@router.delete("/{user_id}/favorites/{shop_id}", status_code=204)
+async def remove_favorite(user_id: UUID, shop_id: UUID, db: AsyncSession = Depends(get_db)):
+    logger.info(f"Removing favorite shop={shop_id} for user={user_id}")
+    if not await favorites.remove_favorite(db, user_id, shop_id):
+        raise HTTPException(404, "Favorite not found")
+    await db.commit()
+    await favorites.publish_favorites_changed(user_id)
+    return Response(status_code=204)
+
+
+@router.get("/{user_id}/favorites", response_model=List[schemas.FavoriteShopRead])
+async def list_favorites(
+    user_id: UUID,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    db: AsyncSession = Depends(get_db),
+):
+    """Избранные магазины со сводкой: открыт ли сейчас и, если переданы lat/lng, расстояние."""
+    shops = await favorites.list_favorites(db, user_id)
+    await open_hours_index.ensure(db)
+    now = datetime.now(timezone.utc)
+    with_distance = lat is not None and lng is not None
+    return [
+        schemas.FavoriteShopRead(
+            shop_id=s.shop_id, name=s.name, address=s.address, lat=s.lat, lng=s.lng,
+            is_active=s.is_active, is_open=open_hours_index.is_open(s.shop_id, now),
+            distance_m=round(haversine_m(lat, lng, s.lat, s.lng), 1)
+            if with_distance and s.lat is not None and s.lng is not None else None,
+            added_at=s.added_at,
+        )
+        for s in shops
+    ]
+
+
+@router.get("/{user_id}/favorites/status", response_model=List[schemas.FavoriteStatus])
+async def favorites_status(
+    user_id: UUID,
+    shop_id: List[UUID] = Query(..., max_length=favorites.FAVORITE_STATUS_MAX_IDS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Пакетная проверка «в избранном ли» для списка магазинов (карточки в выдаче, карта)."""
+    found = await favorites.favorite_ids(db, user_id, shop_id)
+    return [schemas.FavoriteStatus(shop_id=sid, is_favorite=sid in found) for sid in shop_id]
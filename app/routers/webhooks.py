@@ -1,64 +1,54 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi import APIRouter, Request, Depends, Header, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.core.database import get_db
-from app.core.config import get_settings, Settings
+from app.core.streaming import STREAM_FORMAT_PATTERN, stream_format, streaming_response
+from app.core.config import get_settings, settings, Settings
+from app.core.webhook import read_webhook
 from app.models.webhook_event import WebhookEvent
+from app.schemas.webhook_event import OrderStatusWebhook, PaymentWebhook, WebhookEventRead
+from app.crud.payment import mark_order_paid, mark_order_failed
+from app.crud.webhook_ingest import webhook_ingest
 from app.logger import logger
 from datetime import datetime
-import os
-import hmac
-import hashlib
-
-# 🔐 Секрет, который будет использоваться для проверки подписи
-# (Ты можешь взять его из .env)
-SECRET_TOKEN = os.getenv("WEBHOOK_SECRET")
-
-
-def verify_signature(body: bytes, signature: str, secret: str) -> bool:
-    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(expected, signature)
 
 router = APIRouter(prefix="/webhook", tags=["Webhook"])
 
 @router.post("/order-status")
-async def receive_order_status(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-):
-    try:
-        start = datetime.utcnow()
-
-        # ✅ Проверяем подпись
-        signature = request.headers.get("X-Signature")
-        if signature != SECRET_TOKEN:
-            logger.warning(f"[WEBHOOK] Invalid signature: {signature}")
-            raise HTTPException(status_code=401, detail="Invalid signature")
-
-        # ✅ Читаем тело запроса
-        payload = await request.json()
-        event_type = payload.get("event") or "unknown"
-
-        logger.info(f"[WEBHOOK] Received: {event_type}, payload={payload}")
+async def receive_order_status(request: Request):
+    """Событие пишется в локальный журнал (fsync) и подтверждается сразу;
+    в webhook_events и статус заказа оно попадает фоновой записью пачками."""
+    start = datetime.utcnow()
 
-        # ✅ Сохраняем в базу данных
-        webhook_event = WebhookEvent(event_type=event_type, payload=payload)
-        db.add(webhook_event)
-        await db.commit()
+    # ✅ Тело читается один раз: подпись (HMAC-SHA256) и разбор — по одному буферу
+    body, event = await read_webhook(request, settings.WEBHOOK_SECRET, OrderStatusWebhook)
 
-        duration_ms = (datetime.utcnow() - start).total_seconds() * 1000
-        logger.info(f"[WEBHOOK] saved to DB in {duration_ms:.2f} ms")
-
-        return {"status": "ok"}  # MUST reply <1 sec
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"[WEBHOOK] Error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Webhook processing failed")
-
-@router.get("/events")
-async def list_events(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(WebhookEvent).order_by(WebhookEvent.received_at.desc()))
+    try:
+        event_id = await webhook_ingest.submit(body)
+    except OSError as e:
+        logger.error(f"[WEBHOOK] Cannot persist event: {e}")
+        raise HTTPException(status_code=503, detail="Webhook queue unavailable")
+
+    duration_ms = (datetime.utcnow() - start).total_seconds() * 1000
+    logger.info(
+        f"[WEBHOOK] Accepted {event.event or 'unknown'} order={event.order_id} status={event.status} "
+        f"as {event_id} in {duration_ms:.2f} ms"
+    )
+    return {"status": "ok", "event_id": str(event_id)}  # MUST reply <1 sec
+
+@router.get("/events", response_model=List[WebhookEventRead])
+async def list_events(
+    format: Optional[str] = Query(None, pattern=STREAM_FORMAT_PATTERN),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """События вебхуков, новые первыми; ?format=ndjson|csv или Accept: application/x-ndjson — потоком."""
+    stmt = select(WebhookEvent).order_by(WebhookEvent.received_at.desc())
+    fmt = stream_format(format, accept)
+    if fmt:
+        return streaming_response(stmt, WebhookEventRead, fmt, "webhook-events")
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 @router.post("/payments", status_code=200)
@@ -67,21 +57,15 @@ async def payment_webhook(
     db: AsyncSession = Depends(get_db),
     settings: Settings = Depends(get_settings),
 ):
-    body = await request.body()
-    signature = request.headers.get("X-Signature")
-
-    if not verify_signature(body, signature, settings.PAYMENT_WEBHOOK_SECRET):
-        raise HTTPException(status_code=401, detail="Invalid signature")
-
-    payload = await request.json()
+    _, event = await read_webhook(request, settings.PAYMENT_WEBHOOK_SECRET, PaymentWebhook)
+    logger.info(f"[WEBHOOK] Payment {event.payment_id} status={event.status}")
 
     # обработка логики success/failed
-    payment_id = payload.get("payment_id")
-    status = payload.get("status")
-
-    if status == "paid":
-        await mark_order_paid(db, payment_id)
-    elif status == "failed":
-        await mark_order_failed(db, payment_id)
+    if event.payment_id is None:
+        return {"status": "OK"}
+    if event.status == "paid":
+        await mark_order_paid(db, event.payment_id)
+    elif event.status == "failed":
+        await mark_order_failed(db, event.payment_id)
 
     return {"status": "OK"}
@@ -1,18 +1,19 @@
-from .user import *
-from .device_token import *
-from .session import *
-from .user_favorite import *
-from .shop import *
-from .owner_account import *
-from .shop_account import *
-from .shop_device_token import *
-from .menu_item import *
-from .item_option_group import *
-from .item_option import *
-from .time_slot import *
-from .slot_hold import *
-from .order import *
-from .order_item import *
-from .order_item_option import *
-from .payment import *
-from .owner_shop import *
+from .user import *
+from .device_token import *
+from .session import *
+from .user_favorite import *
+from .shop import *
+from .owner_account import *
+from .shop_account import *
+from .shop_device_token import *
+from .menu_item import *
+from .item_option_group import *
+from .item_option import *
+from .time_slot import *
+from .slot_hold import *
+from .order import *
+from .order_item import *
+from .order_item_option import *
+from .payment import *
+from .owner_shop import *
+from .menu_import import *
@@ -0,0 +1,43 @@
+# app/schemas/menu_import.py
+from pydantic import AliasChoices, BaseModel, Field, condecimal
+from typing import List, Optional
+from uuid import UUID
+
+class MenuImportOption(BaseModel):
+    name: str = Field(min_length=1)
+    price_delta: condecimal(ge=0) = 0
+    is_default: bool = False
+    sort_order: Optional[int] = 0
+    is_available: bool = True
+
+class MenuImportGroup(BaseModel):
+    name: str = Field(min_length=1)
+    min_select: int = Field(0, ge=0)
+    max_select: int = Field(1, ge=0)
+    is_required: bool = False
+    sort_order: Optional[int] = 0
+    options: List[MenuImportOption] = []
+
+class MenuImportItem(BaseModel):
+    """Позиция меню в файле импорта; ключ — название внутри магазина."""
+    name: str = Field(min_length=1, validation_alias=AliasChoices("name", "item_name"))
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    base_price: Optional[condecimal(gt=0)] = None
+    is_active: bool = True
+    sort_order: Optional[int] = 0
+    prep_seconds: Optional[int] = Field(None, ge=0)
+    option_groups: List[MenuImportGroup] = []
+
+class MenuImportRowError(BaseModel):
+    row: int
+    error: str
+
+class MenuImportResult(BaseModel):
+    shop_id: UUID
+    version: int
+    items: int
+    groups: int
+    options: int
+    invalid: int
+    errors: List[MenuImportRowError] = []
@@ -1,25 +1,52 @@
-# app/schemas/menu_item.py
-from pydantic import BaseModel, condecimal
-from typing import Optional
-from uuid import UUID
-
-class MenuItemBase(BaseModel):
-    shop_id: Optional[UUID]
-    name: str
-    description: Optional[str] = None
-    image_url: Optional[str] = None
-    base_price: Optional[condecimal(gt=0)] = None
-    is_active: Optional[bool] = True
-    sort_order: Optional[int] = None
-
-class MenuItemCreate(MenuItemBase):
-    pass
-
-class MenuItemUpdate(MenuItemBase):
-    pass
-
-class MenuItemRead(MenuItemBase):
-    id: UUID
-
-    class Config:
-        orm_mode = True
+# app/schemas/menu_item.py
+from pydantic import BaseModel, Field, condecimal
+from typing import List, Optional
+from uuid import UUID
+
+class MenuItemBase(BaseModel):
+    shop_id: Optional[UUID]
+    name: str
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    base_price: Optional[condecimal(gt=0)] = None
+    is_active: Optional[bool] = True
+    sort_order: Optional[int] = None
+    prep_seconds: Optional[int] = Field(None, ge=0)
+
+class MenuItemCreate(MenuItemBase):
+    pass
+
+class MenuItemUpdate(MenuItemBase):
+    pass
+
+class MenuItemRead(MenuItemBase):
+    id: UUID
+
+    class Config:
+        orm_mode = True
+
+class MenuAvailabilityToggle(BaseModel):
+    id: UUID
+    available: bool
+
+class MenuAvailabilityUpdate(BaseModel):
+    items: List[MenuAvailabilityToggle] = Field(default_factory=list, max_length=1000)
+    options: List[MenuAvailabilityToggle] = Field(default_factory=list, max_length=1000)
+
+class MenuAvailabilityResult(BaseModel):
+    version: int
+    items: List[UUID]
+    options: List[UUID]
+    not_found: List[UUID] = []
+
+class MenuSearchItem(BaseModel):
+    id: UUID
+    name: str
+    base_price: Optional[float] = None
+    score: float
+
+class MenuSearchShop(BaseModel):
+    shop_id: UUID
+    shop_name: str
+    score: float
+    items: List[MenuSearchItem]
@@ -1,27 +1,27 @@
-# app/schemas/order_item.py
-from pydantic import BaseModel, condecimal
-from typing import List, Optional
-from uuid import UUID
-from app.schemas.order_item_option import OrderItemOptionCreate, OrderItemOption
-
-class OrderItemCreate(BaseModel):
-    menu_item_id: UUID
-    menu_item_id: str | None = None
-    name_snapshot: str
-    unit_price: condecimal(gt=0)
-    qty: int
-    line_total: condecimal(gt=0)
-
-class OrderItemCreate(OrderItemCreate):
-    options: List[OrderItemOptionCreate] = []
-class OrderItemRead(BaseModel):
-    id: UUID
-    menu_item_id: UUID
-    name_snapshot: str
-    unit_price: float
-    qty: int
-    line_total: float
-    options: List[OrderItemOption] = []
-
-    class Config:
-        orm_mode = True
+# app/schemas/order_item.py
+from pydantic import BaseModel, condecimal
+from typing import List, Optional
+from uuid import UUID
+from app.schemas.order_item_option import OrderItemOptionCreate, OrderItemOption
+
+class OrderItemCreate(BaseModel):
+    menu_item_id: UUID
+    qty: int = 1
+    # цены и название считает сервер по меню; значения клиента игнорируются
+    name_snapshot: Optional[str] = None
+    unit_price: Optional[condecimal(gt=0)] = None
+    line_total: Optional[condecimal(gt=0)] = None
+
+class OrderItemCreate(OrderItemCreate):
+    options: List[OrderItemOptionCreate] = []
+class OrderItemRead(BaseModel):
+    id: UUID
+    menu_item_id: Optional[UUID]
+    name_snapshot: str
+    unit_price: float
+    qty: int
+    line_total: float
+    options: List[OrderItemOption] = []
+
+    class Config:
+        orm_mode = True
@@ -1,16 +1,25 @@
-from pydantic import BaseModel, condecimal
-
-class OrderItemOptionBase(BaseModel):
-    order_item_id: str
-    option_id: str | None = None
-    name_snapshot: str
-    price_delta: condecimal(ge=0)
-
-class OrderItemOptionCreate(OrderItemOptionBase):
-    option_id: int
-
-class OrderItemOption(OrderItemOptionBase):
-    id: str
-
-    class Config:
-        orm_mode = True
+from pydantic import BaseModel, condecimal
+from typing import Optional
+from uuid import UUID
+
+class OrderItemOptionBase(BaseModel):
+    order_item_id: str
+    option_id: str | None = None
+    name_snapshot: str
+    price_delta: condecimal(ge=0)
+
+class OrderItemOptionCreate(BaseModel):
+    # order_item_id, название и цену опции проставляет сервер при создании заказа
+    option_id: UUID
+    name_snapshot: Optional[str] = None
+    price_delta: Optional[condecimal(ge=0)] = None
+
+class OrderItemOption(BaseModel):
+    id: UUID
+    order_item_id: UUID
+    option_id: Optional[UUID] = None
+    name_snapshot: Optional[str] = None
+    price_delta: Optional[float] = None
+
+    class Config:
+        orm_mode = True
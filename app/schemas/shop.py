@@ -1,27 +1,66 @@
-# app/schemas/shop.py
-from pydantic import BaseModel, Field, constr
-from typing import Optional, Any, Dict
-from uuid import UUID
-from datetime import datetime
-
-class Shop(BaseModel):
-    name: Optional[str] = None
-    address: Optional[str] = None
-    lat: Optional[float] = None
-    lng: Optional[float] = None
-    tz: Optional[str] = None
-    open_hours: Optional[Any] = None  # JSON structure
-    is_active: Optional[bool] = True
-
-class ShopCreate(Shop):
-    name: str
-
-class ShopUpdate(Shop):
-    pass
-
-class ShopRead(Shop):
-    id: UUID
-    created_at: Optional[datetime]
-
-    class Config:
-        orm_mode = True
+# app/schemas/shop.py
+from pydantic import AliasChoices, BaseModel, Field, constr, field_validator
+from typing import Optional, Any, Dict
+from uuid import UUID
+from datetime import datetime
+from zoneinfo import ZoneInfoNotFoundError
+from app.core.schedule import get_zone, parse_open_hours
+
+class Shop(BaseModel):
+    name: Optional[str] = Field(None, validation_alias=AliasChoices("name", "shop_name"))
+    address: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    tz: Optional[str] = None
+    open_hours: Optional[Any] = None  # JSON structure
+    is_active: Optional[bool] = True
+    barista_capacity: Optional[int] = Field(None, ge=1)
+
+class ShopCreate(Shop):
+    name: str = Field(validation_alias=AliasChoices("name", "shop_name"))
+
+class ShopUpdate(Shop):
+    pass
+
+class ShopRead(Shop):
+    id: UUID
+    created_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+class ShopNearby(ShopRead):
+    distance_m: float
+
+class ShopFeedRow(BaseModel):
+    """Строка фида магазинов партнёра (shops.json / NDJSON); id обязателен — по нему upsert."""
+    id: UUID
+    shop_name: str = Field(min_length=1, validation_alias=AliasChoices("shop_name", "name"))
+    address: Optional[str] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    tz: Optional[str] = None
+    open_hours: Optional[Dict[str, Any]] = None
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+
+    @field_validator("lat", "lng", "tz", "address", mode="before")
+    @classmethod
+    def _empty_to_none(cls, v):
+        return None if v == "" else v
+
+    @field_validator("tz")
+    @classmethod
+    def _known_tz(cls, v):
+        if v is not None:
+            try:
+                get_zone(v)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"unknown time zone {v!r}")
+        return v
+
+    @field_validator("open_hours")
+    @classmethod
+    def _parsable_hours(cls, v):
+        parse_open_hours(v)
+        return v
@@ -1,19 +1,43 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
-
-class TimeSlotBase(BaseModel):
-    shop_id: str
-    start: datetime
-    end: datetime
-    capacity: int
-    is_active: Optional[bool] = True
-
-class TimeSlotCreate(TimeSlotBase):
-    pass
-
-class TimeSlot(TimeSlotBase):
-    id: str
-
-    class Config:
-        orm_mode = True
+from pydantic import BaseModel, Field
+from datetime import datetime, date
+from typing import List, Optional
+from uuid import UUID
+
+class TimeSlotBase(BaseModel):
+    shop_id: str
+    start: datetime
+    end: datetime
+    capacity: int
+    is_active: Optional[bool] = True
+
+class TimeSlotCreate(TimeSlotBase):
+    pass
+
+class TimeSlot(TimeSlotBase):
+    id: str
+
+    class Config:
+        orm_mode = True
+
+class SlotAvailability(BaseModel):
+    slot_id: UUID
+    remaining_capacity: Optional[int]  # None -> unlimited
+
+class SlotAvailabilityCell(SlotAvailability):
+    start: Optional[datetime]
+    end: Optional[datetime]
+    capacity: Optional[int]
+
+class ShopAvailability(BaseModel):
+    shop_id: UUID
+    date: date
+    slots: List[SlotAvailabilityCell] = []
+
+class SlotGenerateRequest(BaseModel):
+    days: int = Field(14, ge=1, le=90)
+    granularity_minutes: int = Field(15, ge=5, le=240)
+    capacity: Optional[int] = Field(5, ge=1)  # None -> unlimited
+
+class SlotGenerateResult(BaseModel):
+    shop_id: UUID
+    created: int
@@ -1,16 +1,34 @@
-from pydantic import BaseModel
-from datetime import datetime
-
-class UserFavoriteBase(BaseModel):
-    user_id: str
-    shop_id: str
-
-class UserFavoriteCreate(UserFavoriteBase):
-    pass
-
-class UserFavorite(UserFavoriteBase):
-    id: str
-    added_at: datetime
-
-    class Config:
-        orm_mode = True
+from pydantic import AliasChoices, BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+class UserFavoriteBase(BaseModel):
+    user_id: Optional[UUID] = None  # берётся из пути
+    shop_id: UUID
+
+class UserFavoriteCreate(UserFavoriteBase):
+    pass
+
+class UserFavorite(UserFavoriteBase):
+    id: UUID
+    added_at: Optional[datetime] = Field(None, validation_alias=AliasChoices("added_at", "created_at"))
+
+    class Config:
+        orm_mode = True
+
+class FavoriteShopRead(BaseModel):
+    """Избранный магазин с краткой сводкой для списка."""
+    shop_id: UUID
+    name: str
+    address: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    is_active: bool
+    is_open: bool
+    distance_m: Optional[float] = None  # только если переданы lat/lng
+    added_at: Optional[datetime] = None
+
+class FavoriteStatus(BaseModel):
+    shop_id: UUID
+    is_favorite: bool
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -14,3 +14,22 @@ class WebhookEventRead(WebhookEventBase):
     model_config = {
         "from_attributes": True  # pydantic v2
     }
+
+# Тела входящих вебхуков. Остальные поля игнорируются при разборе
+# (в webhook_events payload сохраняется целиком из исходного тела).
+
+# статусы, в которые заказ можно перевести вебхуком (цели ALLOWED_FROM в app.crud.order_events)
+WebhookOrderStatus = Literal["paid", "accepted", "preparing", "ready", "completed", "cancelled"]
+
+class OrderStatusWebhook(BaseModel):
+    event: Optional[str] = None
+    order_id: Optional[UUID] = None
+    status: Optional[WebhookOrderStatus] = None
+
+    model_config = {"extra": "ignore"}
+
+class PaymentWebhook(BaseModel):
+    payment_id: Optional[UUID] = None
+    status: Optional[str] = None
+
+    model_config = {"extra": "ignore"}
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.crud.slot import generate_slots
+from app.models import Shop
+
+
+async def generate_all(days: int, granularity: int, capacity: int | None):
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(select(Shop).where(Shop.is_active == True))
+        shops = res.scalars().all()
+
+        started = time.perf_counter()
+        total = 0
+        for shop in shops:
+            try:
+                created = await generate_slots(db, shop, days=days, granularity_minutes=granularity, capacity=capacity)
+            except ValueError as e:
+                print(f"⚠️  {shop.id} {shop.shop_name}: invalid open_hours ({e}), skipped")
+                continue
+            await db.commit()
+            total += created
+        elapsed = time.perf_counter() - started
+
+    print(f"✅ {total} slots created for {len(shops)} shops in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация тайм-слотов по open_hours кофеен")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--step", type=int, default=15, help="длительность слота, минут")
+    parser.add_argument("--capacity", type=int, default=5, help="0 — без ограничения")
+    args = parser.parse_args()
+    asyncio.run(generate_all(args.days, args.step, args.capacity or None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from app.core.database import AsyncSessionLocal
+from app.core.jsonstream import file_chunks
+from app.crud.menu_cache import publish_menu_changed
+from app.crud.menu_import import export_menu, import_menu
+from app.crud.shop import get_shop
+
+
+async def import_file(path: str, fmt: str, shop_ids: list[uuid.UUID]):
+    for shop_id in shop_ids:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            if not await get_shop(db, shop_id):
+                print(f"⚠️  {shop_id}: shop not found, skipped")
+                continue
+            try:
+                result = await import_menu(db, shop_id, file_chunks(path), fmt)
+            except ValueError as e:
+                print(f"❌ {shop_id}: {e}")
+                continue
+            await db.commit()
+        await publish_menu_changed(shop_id, result.version)
+        elapsed = time.perf_counter() - started
+        print(
+            f"✅ {shop_id}: {result.items} items, {result.groups} groups, {result.options} options "
+            f"in {elapsed:.1f}s, {result.invalid} invalid"
+        )
+        for err in result.errors:
+            print(f"   row {err.row}: {err.error}")
+
+
+async def export_file(path: str, fmt: str, shop_id: uuid.UUID):
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    try:
+        async for chunk in export_menu(shop_id, fmt):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт и выгрузка меню кофеен (CSV / JSON)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="загрузить меню из файла в один или несколько магазинов")
+    imp.add_argument("path")
+    imp.add_argument("--shop", type=uuid.UUID, action="append", required=True, help="можно указать несколько раз")
+    imp.add_argument("--format", choices=("csv", "json"), help="по умолчанию — по расширению файла")
+    exp = sub.add_parser("export", help="выгрузить меню магазина")
+    exp.add_argument("--shop", type=uuid.UUID, required=True)
+    exp.add_argument("--format", choices=("csv", "json"), default="json")
+    exp.add_argument("-o", "--output", default="-")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "json")
+        asyncio.run(import_file(args.path, fmt, args.shop))
+    else:
+        asyncio.run(export_file(args.output, args.format, args.shop))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,43 @@
-import json
+import argparse
+import asyncio
 import os
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from app.core.database import AsyncSessionLocal
+from app.core.jsonstream import file_chunks, iter_json_records
+from app.crud.shop_geo import publish_shops_reloaded
+from app.crud.shop_import import SHOP_IMPORT_BATCH, import_shops
 
-from app.core.config import settings
-from app.models.shop import Shop  # убедись, что путь верный
-from app.core.database import Base
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# ✅ Используем синхронный URL, который уже есть в config
-engine = create_engine(settings.DATABASE_URL_SYNC)
 
-SessionLocal = sessionmaker(bind=engine)
+async def seed_shops(path: str, batch: int):
+    async with AsyncSessionLocal() as db:
+        try:
+            stats = await import_shops(db, iter_json_records(file_chunks(path)), batch=batch)
+        except ValueError as e:
+            # уже записанные пачки остаются — индексы всё равно перечитываем
+            await publish_shops_reloaded()
+            print(f"❌ {path}: {e}")
+            return
+    await publish_shops_reloaded()
 
-def seed_shops():
-    session = SessionLocal()
+    for row, error in stats.errors:
+        print(f"⚠️  record {row}: {error}")
+    if stats.invalid > len(stats.errors):
+        print(f"⚠️  ... and {stats.invalid - len(stats.errors)} more invalid records")
+    print(
+        f"✅ {stats.upserted} shops upserted in {stats.batches} batches, {stats.invalid} invalid, "
+        f"{stats.elapsed:.1f}s ({stats.rows_per_second:.0f} rows/s)"
+    )
 
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(BASE_DIR, "shops.json"), "r", encoding="utf-8") as f:
-        shops = json.load(f)
 
-    for shop in shops:
-        shop_obj = Shop(
-            id=shop["id"],
-            shop_name=shop["shop_name"],
-            address=shop["address"],
-            lat=float(shop["lat"]) if shop["lat"] else None,
-            lng=float(shop["lng"]) if shop["lng"] else None,
-            tz=shop["tz"],
-            open_hours=shop["open_hours"],  # JSON в колонку JSON
-            is_active=shop["is_active"],
-            created_at=shop.get("created_at"),
-        )
-
-        session.merge(shop_obj)  # UPSERT (insert or update)
-
-    session.commit()
-    session.close()
-    print("✅ Shops inserted successfully!")
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка кофеен из JSON / NDJSON фида (upsert по id)")
+    parser.add_argument("path", nargs="?", default=os.path.join(BASE_DIR, "shops.json"))
+    parser.add_argument("--batch", type=int, default=SHOP_IMPORT_BATCH, help="строк в одном INSERT")
+    args = parser.parse_args()
+    asyncio.run(seed_shops(args.path, args.batch))
 
 
 if __name__ == "__main__":
-    seed_shops()
+    main()
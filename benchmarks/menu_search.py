@@ -0,0 +1,88 @@
+"""Бенчмарк поиска по меню: задержка GET /menu/search на 100k позиций.
+
+Создаёт --shops магазинов по --items позиций со сгенерированными названиями,
+прогоняет набор запросов через search_menu и печатает p50/p95/max, затем
+удаляет тестовые данные. На Postgres работает pg_trgm-индекс, на SQLite —
+триграммный индекс в памяти.
+
+Запуск:
+    python -m benchmarks.menu_search --shops 500 --items 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.menu_search import search_index, search_menu
+from app.models import Shop, MenuItem
+
+SHOP_PREFIX = "bench-menu-search"
+BASES = ("Латте", "Капучино", "Раф", "Флэт уайт", "Американо", "Эспрессо", "Матча латте", "Какао", "Чай", "Моккачино")
+FLAVOURS = ("ванильный", "карамельный", "лавандовый", "солёная карамель", "кокосовый", "ореховый", "", "", "")
+SIZES = ("S", "M", "L", "")
+QUERIES = ("раф", "матча", "латте карамель", "капучино", "флет", "солёная", "hfa", "эспрессо", "какао", "лаванда")
+
+
+async def seed(Session, shops: int, items: int):
+    rng = random.Random(42)
+    shop_ids = [uuid.uuid4() for _ in range(shops)]
+    async with Session() as db:
+        await db.execute(insert(Shop), [{"id": s, "shop_name": f"{SHOP_PREFIX}-{i}", "is_active": True} for i, s in enumerate(shop_ids)])
+        rows = []
+        for s in shop_ids:
+            for _ in range(items):
+                name = " ".join(p for p in (rng.choice(BASES), rng.choice(FLAVOURS), rng.choice(SIZES)) if p)
+                rows.append({"id": uuid.uuid4(), "shop_id": s, "item_name": name, "base_price": rng.randint(120, 450)})
+                if len(rows) >= 5000:
+                    await db.execute(insert(MenuItem), rows)
+                    rows = []
+        if rows:
+            await db.execute(insert(MenuItem), rows)
+        await db.commit()
+    return shop_ids
+
+
+async def main(shops: int, items: int, rounds: int):
+    engine = create_async_engine(settings.DATABASE_URL)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    shop_ids = await seed(Session, shops, items)
+    search_index.invalidate()
+    try:
+        async with Session() as db:
+            started = time.perf_counter()
+            await search_menu(db, QUERIES[0])
+            print(f"backend={engine.dialect.name} items={shops * items} first query {1000 * (time.perf_counter() - started):.1f} ms")
+            for q in QUERIES:
+                timings = []
+                for _ in range(rounds):
+                    t = time.perf_counter()
+                    hits = await search_menu(db, q, limit=50)
+                    timings.append(1000 * (time.perf_counter() - t))
+                timings.sort()
+                print(
+                    f"{q:>16}: {len(hits):>3} hits  p50 {statistics.median(timings):6.2f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:6.2f} ms  max {timings[-1]:6.2f} ms"
+                )
+    finally:
+        async with Session() as db:
+            await db.execute(delete(MenuItem).where(MenuItem.shop_id.in_(shop_ids)))
+            await db.execute(delete(Shop).where(Shop.id.in_(shop_ids)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shops", type=int, default=500)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.shops, args.items, args.rounds))
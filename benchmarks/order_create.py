@@ -0,0 +1,123 @@
+"""Бенчмарк создания заказа: flush на каждую позицию против батча INSERT на таблицу.
+
+Для заказов из 1, 5 и 20 позиций (у каждой позиции одна опция, у заказа один
+платёж) считает заказы/сек прежнего пути create_order и текущего.
+
+Запуск (нужен Postgres из DATABASE_URL):
+    python -m benchmarks.order_create --orders 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.crud.order import create_order
+from app.models import Shop, MenuItem, ItemOptionGroup, ItemOption, Order, OrderItem, OrderItemOption, Payment
+from app.schemas.order import OrderCreate
+
+SIZES = (1, 5, 20)
+
+
+async def legacy_create_order(db: AsyncSession, order_in: OrderCreate):
+    # воспроизводит путь до батчевой вставки: flush заказа и каждой позиции
+    order_data = order_in.model_dump(exclude={"order_items", "payments", "note"})
+    order = Order(**order_data, note_text=order_in.note)
+    db.add(order)
+    await db.flush()
+    for item in order_in.order_items:
+        item_data = item.model_dump()
+        order_item = OrderItem(
+            order_id=order.id,
+            menu_item_id=item_data["menu_item_id"],
+            name_snapshot=item_data["name_snapshot"],
+            unit_price=item_data["unit_price"],
+            qty=item_data["qty"],
+            line_total=item_data["line_total"],
+        )
+        db.add(order_item)
+        await db.flush()
+        for opt in item_data.get("options") or []:
+            db.add(OrderItemOption(order_item_id=order_item.id, option_id=opt["option_id"]))
+    for p in order_in.payments:
+        pdata = p.model_dump()
+        db.add(Payment(order_id=order.id, method=pdata["method"], status=pdata.get("status"), amount=pdata["amount"]))
+    await db.commit()
+    await db.refresh(order)
+    return order
+
+
+async def setup(Session):
+    shop_id, item_id, option_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    group_id = uuid.uuid4()
+    async with Session() as db:
+        db.add(Shop(id=shop_id, shop_name="bench-order-create", is_active=False))
+        await db.flush()
+        db.add(MenuItem(id=item_id, shop_id=shop_id, item_name="Латте", base_price=250))
+        await db.flush()
+        db.add(ItemOptionGroup(id=group_id, menu_item_id=item_id, name="Сироп"))
+        await db.flush()
+        db.add(ItemOption(id=option_id, group_id=group_id, name="Ваниль", price_delta=30))
+        await db.commit()
+    return shop_id, item_id, option_id
+
+
+def make_payload(shop_id, item_id, option_id, size: int) -> OrderCreate:
+    return OrderCreate(
+        user_id=None,
+        shop_id=shop_id,
+        slot_id=None,
+        total_amount=280 * size,
+        order_items=[
+            {
+                "menu_item_id": item_id, "name_snapshot": "Латте", "unit_price": 280, "qty": 1,
+                "line_total": 280, "options": [{"option_id": option_id}],
+            }
+            for _ in range(size)
+        ],
+        payments=[{"method": "card", "amount": 280 * size}],
+    )
+
+
+async def run(name, strategy, Session, payload, args) -> float:
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with sem, Session() as db:
+            await strategy(db, payload)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.orders)))
+    return args.orders / (time.perf_counter() - t0)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    shop_id, item_id, option_id = await setup(Session)
+    try:
+        for size in SIZES:
+            payload = make_payload(shop_id, item_id, option_id, size)
+            legacy = await run("legacy", legacy_create_order, Session, payload, args)
+            batched = await run("batched", create_order, Session, payload, args)
+            print(f"{size:>3} items: legacy {legacy:8.1f} orders/s  batched {batched:8.1f} orders/s  "
+                  f"speedup x{batched / legacy:.2f}")
+    finally:
+        async with Session() as db:
+            await db.execute(delete(Shop).where(Shop.id == shop_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""Бенчмарк поиска ближайших магазинов по сетке ShopGeoIndex (без БД).
+
+Раскладывает --shops точек в прямоугольнике вокруг Москвы и меряет nearby()
+для случайных точек и нескольких радиусов, плюс стоимость upsert.
+
+Запуск:
+    python -m benchmarks.shop_nearby --shops 50000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.crud.shop_geo import ShopGeoIndex
+
+# ~ Москва в пределах ЦКАД
+LAT = (55.3, 56.1)
+LNG = (36.9, 38.3)
+RADII = (1000, 3000, 10000)
+
+
+def main(shops: int, queries: int):
+    rng = random.Random(42)
+    index = ShopGeoIndex()
+    ids = [uuid.uuid4() for _ in range(shops)]
+    started = time.perf_counter()
+    for shop_id in ids:
+        index.upsert(shop_id, rng.uniform(*LAT), rng.uniform(*LNG), True)
+    build = time.perf_counter() - started
+    print(f"{len(index)} shops indexed in {1000 * build:.0f} ms ({1e6 * build / shops:.2f} us/upsert)")
+
+    points = [(rng.uniform(*LAT), rng.uniform(*LNG)) for _ in range(queries)]
+    for radius in RADII:
+        timings, found = [], 0
+        for lat, lng in points:
+            t = time.perf_counter()
+            found += len(index.nearby(lat, lng, radius, 20))
+            timings.append(1000 * (time.perf_counter() - t))
+        timings.sort()
+        print(
+            f"radius {radius:>5} m: avg {found / queries:5.1f} hits  p50 {statistics.median(timings):.3f} ms  "
+            f"p95 {timings[int(queries * 0.95) - 1]:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shops", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+    main(args.shops, args.queries)
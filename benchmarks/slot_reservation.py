@@ -0,0 +1,119 @@
+"""Бенчмарк резервирования слотов под конкуренцией.
+
+Сравнивает прежний путь patch_order_slot (cleanup + commit, два COUNT, INSERT hold)
+с DatabaseHoldStore (условный UPDATE ... RETURNING + INSERT в одной транзакции).
+Для каждого варианта создаётся отдельный слот, N заказов одновременно пытаются
+его занять; считаются пропускная способность и переполнение слота.
+
+Запуск (нужен Postgres из DATABASE_URL):
+    python -m benchmarks.slot_reservation --requests 1000 --concurrency 50 --capacity 100
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, delete, and_
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.crud.hold_store import DatabaseHoldStore, HOLD_TTL_SECONDS
+from app.models import Shop, TimeSlot, SlotHold, Order
+
+
+async def legacy_reserve(db: AsyncSession, slot: TimeSlot, order_id) -> bool:
+    # воспроизводит путь до перехода на счётчики
+    now = datetime.utcnow()
+    await db.execute(delete(SlotHold).where(SlotHold.expires_at <= now))
+    await db.commit()
+    holds = (await db.execute(
+        select(func.count()).select_from(SlotHold).where(and_(SlotHold.slot_id == slot.id, SlotHold.expires_at > now))
+    )).scalar()
+    orders = (await db.execute(
+        select(func.count()).select_from(Order).where(and_(Order.slot_id == slot.id, Order.status != "cancelled"))
+    )).scalar()
+    if slot.capacity - holds - orders <= 0:
+        return False
+    db.add(SlotHold(slot_id=slot.id, order_id=order_id, expires_at=now + timedelta(seconds=HOLD_TTL_SECONDS)))
+    await db.commit()
+    return True
+
+
+async def atomic_reserve(db: AsyncSession, slot: TimeSlot, order_id) -> bool:
+    expires_at = await DatabaseHoldStore().acquire(db, slot, order_id)
+    if expires_at is None:
+        await db.rollback()
+        return False
+    await db.commit()
+    return True
+
+
+async def setup(Session, shop_id, capacity: int, n_orders: int):
+    async with Session() as db:
+        slot = TimeSlot(
+            id=uuid.uuid4(), shop_id=shop_id, capacity=capacity,
+            start=datetime.utcnow() + timedelta(hours=1), end=datetime.utcnow() + timedelta(hours=2),
+        )
+        orders = [Order(id=uuid.uuid4(), shop_id=shop_id, status="new", total_amount=0) for _ in range(n_orders)]
+        db.add(slot)
+        db.add_all(orders)
+        await db.commit()
+        return slot, [o.id for o in orders]
+
+
+async def run(name, strategy, Session, shop_id, args):
+    slot, order_ids = await setup(Session, shop_id, args.capacity, args.requests)
+    sem = asyncio.Semaphore(args.concurrency)
+    granted = 0
+
+    async def one(order_id):
+        nonlocal granted
+        async with sem, Session() as db:
+            if await strategy(db, slot, order_id):
+                granted += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(oid) for oid in order_ids))
+    elapsed = time.perf_counter() - t0
+
+    async with Session() as db:
+        held = (await db.execute(
+            select(func.count()).select_from(SlotHold).where(SlotHold.slot_id == slot.id)
+        )).scalar()
+    overbooked = max(0, held - args.capacity)
+    print(f"{name:>8}: {args.requests / elapsed:8.1f} req/s  granted={granted:<5} "
+          f"holds={held:<5} capacity={args.capacity:<5} overbooked={overbooked}")
+    return args.requests / elapsed, overbooked
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    shop_id = uuid.uuid4()
+    async with Session() as db:
+        db.add(Shop(id=shop_id, shop_name="bench-slot-reservation", is_active=False))
+        await db.commit()
+    try:
+        legacy_rps, _ = await run("legacy", legacy_reserve, Session, shop_id, args)
+        atomic_rps, atomic_over = await run("atomic", atomic_reserve, Session, shop_id, args)
+        print(f"speedup: x{atomic_rps / legacy_rps:.2f}")
+        if atomic_over:
+            raise SystemExit("atomic path overbooked the slot")
+    finally:
+        async with Session() as db:
+            await db.execute(delete(Shop).where(Shop.id == shop_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Бенчмарк разбора вебхука: событий в секунду на одно ядро.
+
+Генерирует --events тел order-status (с лишними полями, как у реальных
+отправителей), подписывает их HMAC-SHA256 и сравнивает прежний путь
+(json.loads, затем ещё раз json.loads внутри логики и dict-доступ) с
+текущим: verify_signature + decode_event прямо в типизированную модель.
+Отдельно — loads() для payload в фоновой записи (orjson, если установлен).
+
+Запуск:
+    python -m benchmarks.webhook_decode --events 20000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+from app.core import webhook
+from app.core.webhook import decode_event, sign, verify_signature
+from app.schemas.webhook_event import OrderStatusWebhook
+
+STATUSES = ("accepted", "preparing", "ready", "completed", "cancelled")
+
+
+def make_bodies(events: int):
+    rng = random.Random(42)
+    bodies = []
+    for i in range(events):
+        payload = {
+            "event": "order.status",
+            "order_id": str(uuid.uuid4()),
+            "status": rng.choice(STATUSES),
+            "seq": i,
+            "sent_at": "2026-10-18T12:00:00+00:00",
+            "meta": {"source": "pos", "terminal": rng.randint(1, 40), "tags": ["bench"] * rng.randint(0, 5)},
+        }
+        bodies.append(json.dumps(payload).encode())
+    return bodies
+
+
+def old_path(body: bytes, signature: str, secret: str):
+    # как было в роутере: сравнение строк, json.loads для лога и ещё раз для логики
+    if signature != secret:
+        raise ValueError("bad token")
+    json.loads(body)
+    payload = json.loads(body)
+    return uuid.UUID(str(payload["order_id"])), payload["status"]
+
+
+def new_path(body: bytes, signature: str, secret: str):
+    if not verify_signature(body, signature, secret):
+        raise ValueError("bad signature")
+    event = decode_event(body, OrderStatusWebhook)
+    return event.order_id, event.status
+
+
+def run(name: str, fn, items, rounds: int):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for args in items:
+            fn(*args)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:>28}: {len(items) / best / 1000:8.1f}k events/s  ({1e6 * best / len(items):5.2f} us/event)")
+
+
+def main(events: int, secret: str, rounds: int):
+    bodies = make_bodies(events)
+    print(f"events={events} avg body {sum(map(len, bodies)) / len(bodies):.0f} bytes  orjson={'yes' if webhook.orjson else 'no'}")
+    run("old: token + json.loads x2", old_path, [(b, secret, secret) for b in bodies], rounds)
+    run("new: hmac + validate_json", new_path, [(b, sign(b, secret), secret) for b in bodies], rounds)
+    run("hmac only", verify_signature, [(b, sign(b, secret), secret) for b in bodies], rounds)
+    run("decode_event only", decode_event, [(b, OrderStatusWebhook) for b in bodies], rounds)
+    run("json.loads", json.loads, [(b,) for b in bodies], rounds)
+    run("webhook.loads", webhook.loads, [(b,) for b in bodies], rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--secret", default="bench-secret")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    main(args.events, args.secret, args.rounds)
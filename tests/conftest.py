@@ -0,0 +1,22 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models
+import app.models.webhook_event
+from app.core.database import Base
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Сессия на чистой SQLite в памяти со всеми таблицами."""
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with Session() as session:
+        yield session
+    await engine.dispose()
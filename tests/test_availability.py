@@ -0,0 +1,62 @@
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.crud import slot as slot_crud
+from app.crud.availability import AvailabilityGrid, DayGrid, SlotCell
+from app.models import Order, Shop, SlotHold, TimeSlot
+
+
+def make_grid():
+    grid = AvailabilityGrid()
+    slot_id = uuid.uuid4()
+    cell = SlotCell(slot_id=slot_id, start=None, end=None, capacity=5, held=1, confirmed=0)
+    grid._store(DayGrid(shop_id=uuid.uuid4(), day=date.today(), cells=[cell], stale_at=time.monotonic() + 60))
+    return grid, slot_id, cell
+
+
+@pytest.mark.asyncio
+async def test_adjust_applies_after_commit(db):
+    grid, slot_id, cell = make_grid()
+
+    grid.adjust(db, slot_id, held=1)
+    assert cell.held == 1  # до commit сетка не меняется
+    await db.commit()
+
+    assert cell.held == 2
+    assert grid._cells[slot_id][1] is cell
+
+
+@pytest.mark.asyncio
+async def test_rollback_drops_grid_instead_of_phantom_hold(db):
+    grid, slot_id, cell = make_grid()
+    await db.execute(text("SELECT 1"))  # транзакция уже идёт, как в роутере
+
+    grid.adjust(db, slot_id, held=1)
+    await db.rollback()
+
+    assert cell.held == 1
+    assert slot_id not in grid._cells
+
+
+@pytest.mark.asyncio
+async def test_expiry_sweep_drops_only_affected_grids(db, monkeypatch):
+    grid, other_slot, _ = make_grid()
+    monkeypatch.setattr(slot_crud, "availability_grid", grid)
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    slot = TimeSlot(id=uuid.uuid4(), shop_id=shop.id, capacity=2, held_count=1)
+    order = Order(id=uuid.uuid4(), shop_id=shop.id, status="new", slot_id=slot.id)
+    db.add_all([shop, slot, order])
+    await db.flush()
+    db.add(SlotHold(slot_id=slot.id, order_id=order.id, expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    cell = SlotCell(slot_id=slot.id, start=None, end=None, capacity=2, held=1, confirmed=0)
+    grid._store(DayGrid(shop_id=shop.id, day=date.today(), cells=[cell], stale_at=time.monotonic() + 60))
+
+    assert await slot_crud.cleanup_expired_holds(db, limit=10) == 1
+    await db.commit()
+
+    assert slot.id not in grid._cells
+    assert other_slot in grid._cells
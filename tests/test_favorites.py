@@ -0,0 +1,78 @@
+import uuid
+
+import pytest
+
+import app.crud.user_favorite as favorites
+from app.crud.user_favorite import FavoritesCache, add_favorite
+from app.models import Shop
+
+
+async def make_favorites(db, count):
+    user_id = uuid.uuid4()
+    shops = [Shop(id=uuid.uuid4(), shop_name=f"s{i}") for i in range(count)]
+    db.add_all(shops)
+    await db.flush()
+    for shop in shops:
+        await add_favorite(db, user_id, shop.id)
+    await db.commit()
+    return user_id, shops
+
+
+def load_with_event(monkeypatch, event):
+    load = favorites._load
+
+    async def racing_load(db, user_id):
+        shops = await load(db, user_id)
+        event(user_id)  # событие пришло, пока шёл запрос
+        return shops
+
+    monkeypatch.setattr(favorites, "_load", racing_load)
+    return load
+
+
+@pytest.mark.asyncio
+async def test_cached_until_invalidated(db):
+    cache = FavoritesCache()
+    user_id, shops = await make_favorites(db, 2)
+
+    entry = await cache.get(db, user_id)
+    assert entry.ids == {s.id for s in shops}
+    assert await cache.get(db, user_id) is entry
+
+    cache.invalidate(user_id)
+    assert cache.peek(user_id) is None
+    assert (await cache.get(db, user_id)).ids == entry.ids
+
+
+@pytest.mark.asyncio
+async def test_favorites_changed_during_load_is_not_cached(db, monkeypatch):
+    cache = FavoritesCache()
+    user_id, shops = await make_favorites(db, 1)
+    load = load_with_event(monkeypatch, cache.invalidate)
+
+    entry = await cache.get(db, user_id)
+    assert entry.ids == {shops[0].id}
+    assert cache.peek(user_id) is None
+
+    monkeypatch.setattr(favorites, "_load", load)
+    assert await cache.get(db, user_id) is cache.peek(user_id)
+
+
+@pytest.mark.asyncio
+async def test_shop_changed_during_load_is_not_cached(db, monkeypatch):
+    cache = FavoritesCache()
+    user_id, shops = await make_favorites(db, 1)
+    load_with_event(monkeypatch, lambda _: cache.invalidate_shop(shops[0].id))
+
+    await cache.get(db, user_id)
+    assert cache.peek(user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_other_user_event_during_load_keeps_entry(db, monkeypatch):
+    cache = FavoritesCache()
+    user_id, _ = await make_favorites(db, 1)
+    load_with_event(monkeypatch, lambda _: cache.invalidate(uuid.uuid4()))
+
+    entry = await cache.get(db, user_id)
+    assert cache.peek(user_id) is entry
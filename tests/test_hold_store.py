@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.crud.hold_store import MemoryHoldStore, RedisHoldStore, wait_pending
+from app.models import Order, TimeSlot
+
+
+def make_store(kind, ttl=120):
+    if kind == "memory":
+        return MemoryHoldStore(ttl=ttl)
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Lua-скрипты в fakeredis
+    return RedisHoldStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=ttl)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_hold_store_respects_capacity(kind):
+    store = make_store(kind)
+    slot = TimeSlot(id=uuid.uuid4(), capacity=3, confirmed_count=1)
+
+    results = await asyncio.gather(*(store.acquire(None, slot, uuid.uuid4()) for _ in range(5)))
+
+    assert sum(r is not None for r in results) == 2
+    assert (await store.held_counts(None, [slot]))[slot.id] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_hold_store_release_and_reacquire(kind):
+    store = make_store(kind)
+    slot = TimeSlot(id=uuid.uuid4(), capacity=1, confirmed_count=0)
+    first, second = uuid.uuid4(), uuid.uuid4()
+
+    assert await store.acquire(None, slot, first) is not None
+    # повторный захват тем же заказом продлевает hold, а не занимает второе место
+    assert await store.acquire(None, slot, first) is not None
+    assert await store.acquire(None, slot, second) is None
+
+    order = type("O", (), {"id": first, "slot_id": slot.id})()
+    assert await store.release(None, order) is True
+    assert await store.acquire(None, slot, second) is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_hold_store_expires_natively(kind):
+    store = make_store(kind, ttl=0.05)
+    slot = TimeSlot(id=uuid.uuid4(), capacity=1, confirmed_count=0)
+
+    assert await store.acquire(None, slot, uuid.uuid4()) is not None
+    await asyncio.sleep(0.1)
+
+    assert (await store.held_counts(None, [slot]))[slot.id] == 0
+    assert await store.acquire(None, slot, uuid.uuid4()) is not None
+
+
+@pytest.mark.asyncio
+async def test_memory_expire_reports_released_slots():
+    store = MemoryHoldStore(ttl=0.05)
+    busy = TimeSlot(id=uuid.uuid4(), capacity=3, confirmed_count=0)
+    idle = TimeSlot(id=uuid.uuid4(), capacity=3, confirmed_count=0)
+    for _ in range(2):
+        await store.acquire(None, busy, uuid.uuid4())
+    await asyncio.sleep(0.1)
+    await store.acquire(None, idle, uuid.uuid4())
+
+    assert await store.expire(None) == {busy.id: 2}
+    assert await store.expire(None) == {}
+
+
+async def make_slot(db, capacity=2):
+    start = datetime.now(timezone.utc) + timedelta(hours=1)
+    slot = TimeSlot(
+        id=uuid.uuid4(), shop_id=uuid.uuid4(), start=start, end=start + timedelta(minutes=15),
+        capacity=capacity, held_count=0, confirmed_count=0,
+    )
+    db.add(slot)
+    await db.commit()
+    return slot
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_confirm_moves_hold_to_confirmed_after_commit(db, kind):
+    store = make_store(kind)
+    slot = await make_slot(db, capacity=2)
+    order = Order(id=uuid.uuid4(), slot_id=slot.id)
+    assert await store.acquire(db, slot, order.id) is not None
+    await db.commit()
+
+    assert await store.confirm(db, order) is True
+    # до commit место учитывается holds, после — только confirmed_count
+    assert (await store.held_counts(db, [slot]))[slot.id] == 1
+    await db.commit()
+    await wait_pending()
+
+    await db.refresh(slot)
+    assert slot.confirmed_count == 1
+    assert (await store.held_counts(db, [slot]))[slot.id] == 0
+    assert await store.acquire(db, slot, uuid.uuid4()) is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_rollback_undoes_claim_and_keeps_hold_on_failed_confirm(db, kind):
+    store = make_store(kind)
+    slot = await make_slot(db, capacity=1)
+    order = Order(id=uuid.uuid4(), slot_id=slot.id)
+
+    assert await store.acquire(db, slot, order.id) is not None
+    await db.rollback()
+    await wait_pending()
+    await db.refresh(slot)
+    assert (await store.held_counts(db, [slot]))[slot.id] == 0
+
+    assert await store.acquire(db, slot, order.id) is not None
+    await db.commit()
+    assert await store.confirm(db, order) is True
+    await db.rollback()
+    await wait_pending()
+    # оплата не записалась — hold остаётся за заказом
+    await db.refresh(slot)
+    assert (await store.held_counts(db, [slot]))[slot.id] == 1
+    assert slot.confirmed_count == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_rechecks_confirmed_count(db):
+    store = make_store("memory")
+    slot = await make_slot(db, capacity=1)
+    stale = TimeSlot(id=slot.id, capacity=1, confirmed_count=0)
+    # место подтверждено другим воркером после того, как слот был прочитан
+    await db.execute(update(TimeSlot).where(TimeSlot.id == slot.id).values(confirmed_count=1))
+    await db.commit()
+
+    assert await store.acquire(db, stale, uuid.uuid4()) is None
+    assert (await store.held_counts(db, [slot]))[slot.id] == 0
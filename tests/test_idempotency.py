@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.idempotency import (
+    HEADER, MAX_STORED_BYTES, IdempotencyMiddleware, KeyMismatch, MemoryIdempotencyStore,
+    RedisIdempotencyStore, StoredResponse,
+)
+
+
+def make_store(kind):
+    if kind == "memory":
+        return MemoryIdempotencyStore(ttl=60, max_keys=100)
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisIdempotencyStore(ttl=60, client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_duplicates_wait_for_first_response(kind):
+    store = make_store(kind)
+    executed = 0
+
+    async def request():
+        nonlocal executed
+        stored = await store.begin("POST:/orders/:k", "fp", wait=5)
+        if stored is not None:
+            return stored
+        executed += 1
+        await asyncio.sleep(0.1)
+        response = StoredResponse(status=201, headers=[("content-type", "application/json")], body=b'{"id": 1}')
+        await store.complete("POST:/orders/:k", "fp", response)
+        return response
+
+    results = await asyncio.gather(*(request() for _ in range(5)))
+
+    assert executed == 1
+    assert {r.body for r in results} == {b'{"id": 1}'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_key_reuse_with_other_body_and_abort(kind):
+    store = make_store(kind)
+
+    assert await store.begin("k", "fp1", wait=1) is None
+    with pytest.raises(KeyMismatch):
+        await store.begin("k", "fp2", wait=1)
+
+    # после abort ключ свободен и запрос выполняется заново
+    await store.abort("k")
+    assert await store.begin("k", "fp1", wait=1) is None
+
+
+def make_app():
+    app = FastAPI()
+    calls = {"cookies": 0, "stream": 0, "upload": 0}
+
+    @app.post("/cookies")
+    async def cookies():
+        calls["cookies"] += 1
+        response = JSONResponse({"n": calls["cookies"]}, status_code=201)
+        response.set_cookie("a", "1")
+        response.set_cookie("b", "2")
+        return response
+
+    @app.post("/stream")
+    async def stream():
+        calls["stream"] += 1
+
+        async def rows():
+            for i in range(3):
+                yield f'{{"i": {i}}}\n'.encode()
+
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        calls["upload"] += 1
+        return {"size": len(await request.body())}
+
+    app.add_middleware(IdempotencyMiddleware, store=MemoryIdempotencyStore(ttl=60, max_keys=100), wait=1)
+    return app, calls
+
+
+async def post(app, path, key, content=b"{}"):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(path, content=content, headers={HEADER: key})
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_repeated_headers():
+    app, calls = make_app()
+    first = await post(app, "/cookies", "k1")
+    replay = await post(app, "/cookies", "k1")
+
+    assert calls["cookies"] == 1
+    assert replay.status_code == 201 and replay.content == first.content
+    assert first.headers.get_list("set-cookie") == replay.headers.get_list("set-cookie")
+    assert len(replay.headers.get_list("set-cookie")) == 2
+    assert replay.headers["content-type"] == "application/json"
+    assert replay.headers["idempotent-replayed"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_not_stored():
+    app, calls = make_app()
+    first = await post(app, "/stream", "k2")
+    again = await post(app, "/stream", "k2")
+
+    assert first.text.count("\n") == 3 and again.text == first.text
+    assert calls["stream"] == 2
+    assert "idempotent-replayed" not in again.headers
+
+
+@pytest.mark.asyncio
+async def test_large_request_body_bypasses_middleware():
+    app, calls = make_app()
+    body = b"x" * (MAX_STORED_BYTES + 1)
+    first = await post(app, "/upload", "k3", body)
+    again = await post(app, "/upload", "k3", body)
+
+    assert first.json() == {"size": len(body)} and again.json() == first.json()
+    assert calls["upload"] == 2
@@ -0,0 +1,93 @@
+import uuid
+
+import pytest
+from sqlalchemy import event, select
+
+import app.crud.order as order_crud
+from app.crud.menu_cache import MenuCache
+from app.models import MenuItem, Shop
+from app.schemas.menu_item import MenuItemCreate
+
+
+def tree(shop_id, version, active=True):
+    item = {"id": "latte", "name": "Латте", "is_active": active, "option_groups": []}
+    return {"shop_id": str(shop_id), "version": version, "items": [item]}, {"latte": item}
+
+
+def test_build_older_than_seen_event_is_not_cached():
+    cache = MenuCache()
+    shop_id = uuid.uuid4()
+
+    # menu.changed v5 пришёл, пока собиралось меню v4
+    cache.invalidate(shop_id, below_version=5)
+    menu = cache._store(shop_id, 4, *tree(shop_id, 4))
+
+    assert menu.version == 4
+    assert cache.peek(shop_id) is None
+    assert cache._store(shop_id, 5, *tree(shop_id, 5)) is cache.peek(shop_id)
+
+
+def test_availability_event_during_build_blocks_stale_store():
+    cache = MenuCache()
+    shop_id = uuid.uuid4()
+
+    cache.patch(shop_id, 3, {"latte": False}, {})
+    cache._store(shop_id, 2, *tree(shop_id, 2))
+
+    assert cache.peek(shop_id) is None
+
+
+def test_patch_at_next_version_updates_in_place():
+    cache = MenuCache()
+    shop_id = uuid.uuid4()
+    cache._store(shop_id, 4, *tree(shop_id, 4))
+
+    cache.patch(shop_id, 5, {"latte": False}, {"unknown-option": False})
+
+    menu = cache.peek(shop_id)
+    assert (menu.version, menu.tree["version"], menu.etag) == (5, 5, f'"menu-{shop_id}-5"')
+    assert menu.nodes["latte"]["is_active"] is False
+    assert b'"is_active":false' in menu.body
+
+
+def test_patch_across_version_gap_drops_menu():
+    cache = MenuCache()
+    shop_id = uuid.uuid4()
+    cache._store(shop_id, 4, *tree(shop_id, 4))
+
+    cache.patch(shop_id, 7, {"latte": False}, {})
+
+    assert cache.peek(shop_id) is None
+
+
+def test_patch_with_older_version_is_ignored():
+    cache = MenuCache()
+    shop_id = uuid.uuid4()
+    menu = cache._store(shop_id, 4, *tree(shop_id, 4))
+    body = menu.body
+
+    cache.patch(shop_id, 4, {"latte": False}, {})
+    cache.patch(shop_id, 3, {"latte": False}, {})
+
+    assert cache.peek(shop_id) is menu
+    assert (menu.version, menu.body, menu.nodes["latte"]["is_active"]) == (4, body, True)
+
+
+@pytest.mark.asyncio
+async def test_crud_create_publishes_menu_changed_after_commit(db, monkeypatch):
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    db.add(shop)
+    await db.commit()
+    calls = []
+    event.listen(db.sync_session, "after_commit", lambda session: calls.append("commit"))
+
+    async def publish(shop_id, version):
+        calls.append(("publish", shop_id, version))
+
+    monkeypatch.setattr(order_crud, "publish_menu_changed", publish)
+    item = await order_crud.menu_item.create(db, MenuItemCreate(shop_id=shop.id, name="latte", base_price=200))
+
+    await db.refresh(shop)
+    assert calls == ["commit", ("publish", shop.id, shop.menu_version)]
+    saved = (await db.execute(select(MenuItem.item_name).where(MenuItem.id == item.id))).scalar()
+    assert saved == "latte"
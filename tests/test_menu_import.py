@@ -0,0 +1,51 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.crud.menu_import import import_menu
+from app.models import MenuItem, Shop
+
+
+async def chunks(records):
+    yield json.dumps(records).encode()
+
+
+async def make_shop(db, *names):
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    db.add(shop)
+    await db.flush()
+    db.add_all([MenuItem(id=uuid.uuid4(), shop_id=shop.id, item_name=n, base_price=100) for n in names])
+    await db.commit()
+    return shop
+
+
+async def prices(db, shop):
+    res = await db.execute(select(MenuItem.item_name, MenuItem.base_price).where(MenuItem.shop_id == shop.id))
+    return sorted((name, float(price)) for name, price in res)
+
+
+@pytest.mark.asyncio
+async def test_reimport_updates_item_by_name(db):
+    shop = await make_shop(db, "Латте")
+
+    result = await import_menu(db, shop.id, chunks([{"name": "Латте", "base_price": 150}]), "json")
+    await db.commit()
+
+    assert result.invalid == 0 and result.items == 1
+    assert await prices(db, shop) == [("Латте", 150.0)]
+
+
+@pytest.mark.asyncio
+async def test_name_matching_several_items_is_reported(db):
+    shop = await make_shop(db, "Латте", "Латте", "Капучино")
+
+    records = [{"name": "Латте", "base_price": 150}, {"name": "Капучино", "base_price": 150}]
+    result = await import_menu(db, shop.id, chunks(records), "json")
+    await db.commit()
+
+    assert result.invalid == 1 and result.items == 1
+    assert [(e.row, "Латте" in e.error) for e in result.errors] == [(1, True)]
+    # ни одна из двух позиций не обновлена наугад
+    assert await prices(db, shop) == [("Капучино", 150.0), ("Латте", 100.0), ("Латте", 100.0)]
@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.crud.order import apply_transitions, set_order_status, update_order
+from app.crud.order_events import InvalidTransition, OrderWaiters, transition
+from app.crud.payment import mark_order_paid
+from app.crud.slot import assign_slot, cleanup_expired_holds
+from app.models import Order, Payment, Shop, SlotHold, TimeSlot
+from app.schemas.order import OrderUpdate
+
+STATUSES = ("new", "paid", "accepted", "preparing", "ready", "completed", "cancelled")
+# разрешённые переходы, выписанные явно, а не из ALLOWED_FROM
+LEGAL = {
+    ("new", "paid"), ("new", "accepted"), ("paid", "accepted"),
+    ("accepted", "preparing"), ("preparing", "ready"), ("ready", "completed"),
+    ("new", "cancelled"), ("paid", "cancelled"), ("accepted", "cancelled"),
+}
+
+
+@pytest.mark.parametrize("current", STATUSES)
+@pytest.mark.parametrize("target", STATUSES + ("unknown",))
+def test_transition_matrix(current, target):
+    order = Order(id=uuid.uuid4(), status=current, version=3)
+
+    applied = transition(order, target)
+
+    assert applied == ((current, target) in LEGAL)
+    if applied:
+        assert (order.status, order.version) == (target, 4)
+    else:
+        assert (order.status, order.version) == (current, 3)
+
+
+def test_transition_sets_status_timestamp():
+    order = Order(id=uuid.uuid4(), status="preparing", version=0)
+
+    assert transition(order, "ready")
+    assert order.ready_at is not None
+
+
+async def make_order(db, status):
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    order = Order(id=uuid.uuid4(), shop_id=shop.id, status=status, total_amount=100)
+    db.add_all([shop, order])
+    await db.commit()
+    return order
+
+
+@pytest.mark.asyncio
+async def test_late_webhook_does_not_reopen_completed_order(db):
+    order = await make_order(db, "completed")
+
+    assert await set_order_status(db, order.id, "preparing") is None
+    assert order.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_payment_for_cancelled_order_keeps_it_cancelled(db):
+    order = await make_order(db, "cancelled")
+    payment = Payment(id=uuid.uuid4(), order_id=order.id, method="card", status="pending", amount=100)
+    db.add(payment)
+    await db.commit()
+
+    await mark_order_paid(db, payment.id)
+
+    await db.refresh(order)
+    assert (order.status, order.paid_at, payment.status) == ("cancelled", None, "paid")
+
+
+@pytest.mark.asyncio
+async def test_update_order_rejects_illegal_status(db):
+    order = await make_order(db, "ready")
+
+    with pytest.raises(InvalidTransition):
+        await update_order(db, order, OrderUpdate(user_id=None, shop_id=order.shop_id, slot_id=None, status="new"))
+    # без явного статуса PUT не сбрасывает заказ в "new"
+    updated = await update_order(db, order, OrderUpdate(user_id=None, shop_id=order.shop_id, slot_id=None, note="x"))
+    assert updated.status == "ready"
+
+
+def status_event(order_id, version, status="accepted"):
+    return {"type": "order.status", "order_id": str(order_id), "status": status, "version": version}
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_event_published_before_registration():
+    waiters = OrderWaiters()
+    order_id = uuid.uuid4()
+    waiters.on_event("shop:x", status_event(order_id, 1, "new"))
+    # маршрут прочитал version=1, и пока закрывал сессию, пришло событие с version=2
+    waiters.on_event("shop:x", status_event(order_id, 2))
+
+    state = await asyncio.wait_for(waiters.wait(order_id, since_version=1, timeout=5), 1)
+    assert state["version"] == 2
+    assert not waiters._waiters
+
+
+@pytest.mark.asyncio
+async def test_wait_wakes_on_newer_version_only():
+    waiters = OrderWaiters()
+    order_id = uuid.uuid4()
+    task = asyncio.create_task(waiters.wait(order_id, since_version=2, timeout=5))
+    await asyncio.sleep(0)
+    waiters.on_event("shop:x", status_event(order_id, 2))
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    waiters.on_event("shop:x", status_event(order_id, 3, "preparing"))
+    assert (await task)["status"] == "preparing"
+    assert await waiters.wait(uuid.uuid4(), since_version=0, timeout=0.01) is None
+
+
+async def make_held_order(db):
+    order = await make_order(db, "new")
+    start = datetime.now(timezone.utc) + timedelta(hours=1)
+    slot = TimeSlot(id=uuid.uuid4(), shop_id=order.shop_id, start=start, end=start + timedelta(minutes=15), capacity=2)
+    payment = Payment(id=uuid.uuid4(), order_id=order.id, method="card", status="pending", amount=100)
+    db.add_all([slot, payment])
+    await db.flush()
+    assert await assign_slot(db, order, slot) is not None
+    await db.commit()
+    return order, slot, payment
+
+
+async def expire_all_holds(db):
+    await db.execute(update(SlotHold).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    await cleanup_expired_holds(db)
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_webhook_paid_confirms_slot_before_hold_expires(db):
+    order, slot, payment = await make_held_order(db)
+
+    assert await set_order_status(db, order.id, "paid") is not None
+    await db.commit()
+    # платёжный webhook после статусного только отмечает платёж
+    await mark_order_paid(db, payment.id)
+    await expire_all_holds(db)
+
+    await db.refresh(order)
+    await db.refresh(slot)
+    await db.refresh(payment)
+    assert (order.status, order.slot_id, payment.status) == ("paid", slot.id, "paid")
+    assert (slot.held_count, slot.confirmed_count) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_bulk_and_manual_paid_confirm_slot(db):
+    bulk, slot, _ = await make_held_order(db)
+    manual, _, _ = await make_held_order(db)
+    await db.refresh(slot)
+
+    applied, rejected = await apply_transitions(db, bulk.shop_id, [(bulk.id, "paid")])
+    assert [r.slot_id for r in applied] == [slot.id] and rejected == []
+    await update_order(db, manual, OrderUpdate(user_id=None, shop_id=manual.shop_id, slot_id=None, status="paid"))
+    await expire_all_holds(db)
+
+    for order in (bulk, manual):
+        await db.refresh(order)
+        assert order.status == "paid" and order.slot_id is not None
+    await db.refresh(slot)
+    assert (slot.held_count, slot.confirmed_count) == (0, 1)
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud.payment import mark_order_paid
+from app.crud.slot import assign_slot, release_slot
+from app.models import Order, Payment, Shop, TimeSlot
+
+
+async def make_paid_flow(db):
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    start = datetime.now(timezone.utc) + timedelta(hours=1)
+    slot = TimeSlot(id=uuid.uuid4(), shop_id=shop.id, start=start, end=start + timedelta(minutes=15), capacity=2)
+    order = Order(id=uuid.uuid4(), shop_id=shop.id, status="new", total_amount=100)
+    payment = Payment(id=uuid.uuid4(), order_id=order.id, method="card", status="pending", amount=100)
+    db.add_all([shop, slot, order, payment])
+    await db.flush()
+    assert await assign_slot(db, order, slot) is not None
+    await db.commit()
+    return slot, order, payment
+
+
+@pytest.mark.asyncio
+async def test_repeated_paid_webhook_confirms_slot_once(db):
+    slot, order, payment = await make_paid_flow(db)
+
+    await mark_order_paid(db, payment.id)
+    await mark_order_paid(db, payment.id)
+
+    await db.refresh(slot)
+    await db.refresh(order)
+    assert order.status == "paid"
+    assert order.slot_id == slot.id
+    assert (slot.held_count, slot.confirmed_count) == (0, 1)
+
+    # отмена оплаченного заказа возвращает подтверждённое место
+    await release_slot(db, order)
+    await db.commit()
+    await db.refresh(slot)
+    assert slot.confirmed_count == 0
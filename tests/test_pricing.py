@@ -0,0 +1,70 @@
+import time
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.crud.order import create_order
+from app.crud.pricing import MenuPriceIndex, PricedItem, PricedOption, PricingError, ShopPrices
+from app.models import MenuItem, Shop
+from app.schemas import OrderCreate
+
+
+async def make_menu(db, price=200):
+    shop = Shop(id=uuid.uuid4(), shop_name="s")
+    item = MenuItem(id=uuid.uuid4(), shop_id=shop.id, item_name="latte", base_price=price)
+    db.add_all([shop, item])
+    await db.commit()
+    return shop, item
+
+
+def order_payload(shop, item, payments):
+    return OrderCreate(
+        user_id=None, shop_id=shop.id, slot_id=None, order_items=[{"menu_item_id": str(item.id), "qty": 2}], payments=payments,
+    )
+
+
+@pytest.mark.asyncio
+async def test_payment_amount_and_status_come_from_server(db):
+    shop, item = await make_menu(db)
+
+    payload = order_payload(shop, item, [{"method": "card", "amount": 400, "status": "paid"}])
+    payload.status = "paid"
+    order = await create_order(db, payload)
+
+    assert (order.status, order.total_amount) == ("new", 400)
+    assert [(p.status, Decimal(str(p.amount))) for p in order.payments] == [("pending", Decimal("400"))]
+
+
+@pytest.mark.asyncio
+async def test_underpayment_is_rejected(db):
+    shop, item = await make_menu(db)
+
+    with pytest.raises(PricingError, match="does not match"):
+        await create_order(db, order_payload(shop, item, [{"method": "card", "amount": 1}]))
+
+
+@pytest.mark.asyncio
+async def test_item_without_price_is_not_sold(db):
+    shop, item = await make_menu(db, price=None)
+
+    with pytest.raises(PricingError, match="has no price"):
+        await create_order(db, order_payload(shop, item, []))
+
+
+def test_price_index_patch_toggles_availability():
+    shop_id, item_id, option_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    option = PricedOption(option_id=option_id, name="ваниль", price_delta=Decimal("30"), menu_item_id=item_id)
+    item = PricedItem(
+        menu_item_id=item_id, name="latte", base_price=Decimal("200"), is_active=True, options={option_id: option},
+    )
+    index = MenuPriceIndex()
+    index._shops[shop_id] = ShopPrices(
+        shop_id=shop_id, items={item_id: item}, options={option_id: option}, stale_at=time.monotonic() + 60,
+    )
+
+    index.patch(shop_id, items={item_id: False, uuid.uuid4(): False}, options={option_id: False})
+    index.patch(uuid.uuid4(), items={item_id: True}, options={})  # магазина нет в индексе — ничего не делает
+
+    assert (item.is_active, option.is_available) == (False, False)
+    assert item.base_price == Decimal("200")
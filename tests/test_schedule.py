@@ -0,0 +1,93 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.schedule import MINUTES_PER_DAY, compile_week, is_open_at, parse_open_hours
+from app.crud.shop_hours import OpenHoursIndex
+
+MON, TUE, FRI, SAT, SUN = 0, 1, 4, 5, 6
+
+
+def minute(day: int, hh: int, mm: int = 0) -> int:
+    return day * MINUTES_PER_DAY + hh * 60 + mm
+
+
+def test_overnight_interval_ends_next_day():
+    hours = parse_open_hours({"fri": "20:00-02:00"})
+    assert hours == {FRI: [(20 * 60, 26 * 60)]}
+
+    week = compile_week(hours)
+    assert is_open_at(week, minute(FRI, 23, 59))
+    assert is_open_at(week, minute(SAT, 1, 59))
+    assert not is_open_at(week, minute(SAT, 2))
+    assert not is_open_at(week, minute(FRI, 19, 59))
+
+
+def test_day_range_wraps_through_sunday():
+    hours = parse_open_hours({"fri-mon": "10:00-18:00"})
+    assert sorted(hours) == [MON, FRI, SAT, SUN]
+    assert TUE not in hours
+
+
+def test_specific_key_overrides_range():
+    hours = parse_open_hours({"sun": "closed", "mon-sun": "08:00-20:00", "sat": "10:00-16:00"})
+    assert SUN not in hours
+    assert hours[SAT] == [(10 * 60, 16 * 60)]
+    assert hours[MON] == [(8 * 60, 20 * 60)]
+
+
+def test_sunday_night_carries_into_monday():
+    week = compile_week(parse_open_hours({"sun": "22:00-03:00", "mon": "03:00-05:00"}))
+    # хвост воскресенья склеивается с понедельником в один интервал
+    assert week == ([0, minute(SUN, 22)], [5 * 60, 7 * MINUTES_PER_DAY])
+    assert is_open_at(week, minute(MON, 0))
+    assert is_open_at(week, minute(MON, 4, 59))
+    assert not is_open_at(week, minute(MON, 5))
+    assert is_open_at(week, minute(SUN, 23, 59))
+
+
+@pytest.mark.parametrize("open_hours", [
+    {"mon": "8:00"},
+    {"mon": "25:00-26:00"},
+    {"funday": "08:00-20:00"},
+    ["08:00-20:00"],
+])
+def test_bad_open_hours(open_hours):
+    with pytest.raises(ValueError):
+        parse_open_hours(open_hours)
+
+
+def test_open_at_uses_shop_time_zone():
+    index = OpenHoursIndex()
+    moscow, new_york, utc = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index.upsert(moscow, "Europe/Moscow", {"mon-fri": "08:00-20:00"})
+    index.upsert(new_york, "America/New_York", {"mon-fri": "08:00-20:00"})
+    index.upsert(utc, None, {"sun": "22:00-02:00"})
+
+    # пн 2024-01-08 06:00 UTC: в Москве 09:00, в Нью-Йорке вс 01:00
+    at = datetime(2024, 1, 8, 6, 0, tzinfo=timezone.utc)
+    assert index.open_at(at) == {moscow}
+    assert index.open_at(datetime(2024, 1, 8, 1, 0, tzinfo=timezone.utc)) == {utc}
+
+    # пн 2024-01-08 18:00 UTC: Москва уже закрыта (21:00), Нью-Йорк открыт (13:00)
+    at = datetime(2024, 1, 8, 18, 0, tzinfo=timezone.utc)
+    assert index.open_at(at) == {new_york}
+    assert index.is_open(new_york, at) and not index.is_open(moscow, at)
+
+    # наивное время считается UTC
+    assert index.open_at(datetime(2024, 1, 8, 6, 0)) == {moscow}
+
+
+def test_open_at_skips_bad_hours_and_removed_shops():
+    index = OpenHoursIndex()
+    good, bad, no_zone = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index.upsert(good, "UTC", {"mon-sun": "00:00-24:00"})
+    index.upsert(bad, "UTC", {"mon": "nonsense"})
+    index.upsert(no_zone, "Mars/Olympus", {"mon-sun": "00:00-24:00"})
+    at = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+    assert index.open_at(at) == {good}
+
+    index.remove(good)
+    assert index.open_at(at) == set()
+    assert not index.is_open(good, at)
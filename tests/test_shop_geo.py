@@ -0,0 +1,45 @@
+import random
+import uuid
+
+import pytest
+
+from app.crud.shop_geo import ShopGeoIndex, haversine_m
+
+# (lat, lng, разброс в градусах): город, антимеридиан, высокие широты
+CENTERS = [(55.75, 37.62, 0.3), (-16.5, 179.98, 0.3), (65.0, -179.95, 0.5), (78.2, 15.6, 1.0), (89.7, 0.0, 0.5)]
+
+
+def brute_force(points, lat, lng, radius_m, limit):
+    found = sorted((haversine_m(lat, lng, p_lat, p_lng), shop_id) for shop_id, p_lat, p_lng in points)
+    return [(shop_id, d) for d, shop_id in found if d <= radius_m][:limit]
+
+
+@pytest.mark.parametrize("center", CENTERS)
+@pytest.mark.parametrize("radius_m,limit", [(300, 5), (3_000, 20), (50_000, 50)])
+def test_nearby_matches_brute_force(center, radius_m, limit):
+    rng = random.Random(hash((center, radius_m)))
+    c_lat, c_lng, spread = center
+
+    def jitter():
+        lat, lng = c_lat + rng.uniform(-spread, spread), c_lng + rng.uniform(-spread, spread)
+        if lat > 90.0:  # через полюс — на противоположный меридиан
+            lat, lng = 180.0 - lat, lng + 180.0
+        return lat, (lng + 180.0) % 360.0 - 180.0
+
+    index = ShopGeoIndex()
+    points = []
+    for _ in range(2_000):
+        shop_id = uuid.uuid4()
+        lat, lng = jitter()
+        index.upsert(shop_id, lat, lng, True)
+        points.append((shop_id, lat, lng))
+
+    for _ in range(25):
+        lat, lng = jitter()
+        got = index.nearby(lat, lng, radius_m, limit)
+        expected = brute_force(points, lat, lng, radius_m, limit)
+        assert [d for _, d in got] == pytest.approx([d for _, d in expected])
+        # на границе limit равноудалённые магазины могут выбраться любые
+        if got:
+            edge = expected[-1][1]
+            assert {s for s, d in got if d < edge} == {s for s, d in expected if d < edge}
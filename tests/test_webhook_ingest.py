@@ -0,0 +1,178 @@
+import json
+import os
+import stat
+import uuid
+from datetime import datetime, timezone
+from typing import get_args
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import app.crud.webhook_ingest as ingest
+from app.core.segment_log import SegmentLog
+from app.crud.order_events import ALLOWED_FROM
+from app.crud.webhook_ingest import WebhookIngest
+from app.models import Order
+from app.models.webhook_event import WebhookEvent
+from app.schemas.webhook_event import OrderStatusWebhook, WebhookOrderStatus
+
+
+def body(status="accepted"):
+    return json.dumps({"event": "order.status", "order_id": str(uuid.uuid4()), "status": status}).encode()
+
+
+def segments(root):
+    return [f for _, _, files in os.walk(root) for f in files if f.endswith(".seg")]
+
+
+@pytest.fixture
+def written(monkeypatch):
+    records = []
+
+    async def write_events(batch):
+        records.extend(batch)
+
+    monkeypatch.setattr(ingest, "write_events", write_events)
+    return records
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_active_segment(tmp_path, written):
+    wh = WebhookIngest(str(tmp_path))
+    ids = [await wh.submit(body()) for _ in range(3)]
+
+    # сегмент ещё открыт и фоновая задача его не забирала
+    assert written == []
+    await wh.stop()
+
+    assert [event_id for event_id, _, _ in written] == ids
+    assert segments(tmp_path) == []
+    assert not wh.log.is_open
+
+
+@pytest.mark.asyncio
+async def test_failed_final_drain_is_replayed_on_start(tmp_path, written, monkeypatch):
+    write_events = ingest.write_events
+
+    async def fail(batch):
+        raise RuntimeError("db is down")
+
+    wh = WebhookIngest(str(tmp_path))
+    event_id = await wh.submit(body())
+    monkeypatch.setattr(ingest, "write_events", fail)
+    await wh.stop()
+    assert len(segments(tmp_path)) == 1
+
+    monkeypatch.setattr(ingest, "write_events", write_events)
+    wh = WebhookIngest(str(tmp_path))
+    wh.start()
+    await wh.stop()
+    assert [r[0] for r in written] == [event_id]
+    assert segments(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_poison_segment_goes_to_dead_letter(tmp_path, written, monkeypatch):
+    write_events = ingest.write_events
+
+    async def poison(batch):
+        if any(b"poison" in data for _, _, data in batch):
+            raise ValueError("cannot write")
+        await write_events(batch)
+
+    monkeypatch.setattr(ingest, "write_events", poison)
+    monkeypatch.setattr(ingest, "SEGMENT_MAX_ATTEMPTS", 3)
+    wh = WebhookIngest(str(tmp_path))
+    await wh.submit(body("poison"))
+    await wh.log.seal()
+    good = await wh.submit(body())
+    await wh.log.seal()
+
+    # пока попытки не исчерпаны, сегмент остаётся и держит очередь
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await wh._drain_sealed()
+        assert len(wh.log.sealed()) == 2
+    await wh._drain_sealed()
+
+    assert wh.log.sealed() == []
+    assert [r[0] for r in written] == [good]
+    dead = os.listdir(tmp_path / "dead")
+    assert len(dead) == 1 and dead[0].startswith("slot-0-")
+    await wh.stop()
+    assert segments(tmp_path / "slot-0") == []
+
+
+@pytest.fixture
+def synced_dirs(monkeypatch):
+    dirs = []
+    fsync = os.fsync
+
+    def record(fd):
+        if stat.S_ISDIR(os.fstat(fd).st_mode):
+            dirs.append(os.readlink(f"/proc/self/fd/{fd}"))
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", record)
+    return dirs
+
+
+@pytest.mark.asyncio
+async def test_segment_create_seal_and_dead_letter_sync_directory(tmp_path, synced_dirs):
+    wh = WebhookIngest(str(tmp_path))
+    slot = str(tmp_path / "slot-0")
+
+    await wh.submit(body())
+    # новый сегмент подтверждён только после fsync каталога слота
+    assert synced_dirs == [slot]
+    await wh.log.seal()
+    assert synced_dirs == [slot, slot]
+
+    synced_dirs.clear()
+    wh.log.dead_letter(wh.log.sealed()[0])
+    assert synced_dirs == [str(tmp_path), str(tmp_path / "dead"), slot]
+    await wh.stop()
+
+
+@pytest.mark.asyncio
+async def test_adopted_orphans_sync_both_slots(tmp_path, synced_dirs):
+    orphan = tmp_path / "slot-1"
+    orphan.mkdir(parents=True)
+    (orphan / f"{1:016d}.seg").write_bytes(b"")
+
+    log = SegmentLog(str(tmp_path))
+    log.open()
+    assert synced_dirs == [str(tmp_path / "slot-0"), str(orphan)]
+    assert [os.path.basename(p) for p in log.sealed()] == [f"{1:016d}.seg"]
+    await log.close()
+
+
+def test_status_literal_matches_transition_targets():
+    assert set(get_args(WebhookOrderStatus)) == set(ALLOWED_FROM)
+    with pytest.raises(ValidationError):
+        OrderStatusWebhook.model_validate({"status": "shipped"})
+
+
+@pytest.mark.asyncio
+async def test_write_events_applies_only_legal_statuses(db, monkeypatch):
+    monkeypatch.setattr(ingest, "AsyncSessionLocal", sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False))
+    order = Order(id=uuid.uuid4(), shop_id=uuid.uuid4(), status="new", total_amount=100)
+    db.add(order)
+    await db.commit()
+
+    def record(status):
+        payload = {"event": "order.status", "order_id": str(order.id), "status": status}
+        return uuid.uuid4(), datetime.now(timezone.utc), json.dumps(payload).encode()
+
+    # неизвестный статус (принят до ужесточения схемы) и переход в обход ALLOWED_FROM не применяются
+    records = [record("shipped"), record("accepted"), record("completed")]
+    await ingest.write_events(records)
+
+    await db.refresh(order)
+    assert order.status == "accepted"
+    rows = (await db.execute(select(WebhookEvent.id, WebhookEvent.event_type))).all()
+    assert {r.id for r in rows} == {r[0] for r in records}
+    assert {r.event_type for r in rows} == {"order.status"}